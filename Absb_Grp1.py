@@ -1,65 +1,97 @@
-import matplotlib.pyplot as plt
-
-# --------------------------------------------------
-# 1) Data Setup
-# --------------------------------------------------
-time_points = [0, 24, 48, 72]  # Time in hours
-
-# Seeding densities and absorbance values
-densities = ["5.00×10⁴", "3.90×10⁴", "3.04×10⁴", "2.37×10⁴", "1.85×10⁴", "1.50×10⁴"]
-
-dm_data = [
-    [0.328003, 0.439906, 0.508586, 0.319443],
-    [0.380051, 0.427489, 0.473436, 0.304704],
-    [0.284385, 0.402841, 0.461662, 0.311829],
-    [0.252153, 0.404759, 0.456321, 0.312752],
-    [0.28635,  0.377911, 0.445695, 0.315278],
-    [0.280953, 0.372226, 0.430178, 0.339794],
-]
-
-hela_data = [
-    [0.342276, 0.441617, 0.646196, 0.577428],
-    [0.310251, 0.373875, 0.623763, 0.485233],
-    [0.33684,  0.365097, 0.5693,   0.394081],
-    [0.302833, 0.358662, 0.517293, 0.419843],
-    [0.30624,  0.321545, 0.559839, 0.350763],
-    [0.274288, 0.345019, 0.462045, 0.360551],
-]
-
-# --------------------------------------------------
-# 2) Create Subplots (2 rows × 3 columns)
-# --------------------------------------------------
-fig, axes = plt.subplots(nrows=2, ncols=3, figsize=(15, 8), sharex=True, sharey=True)
-
-for i, ax in enumerate(axes.flat):
-    # Plot for one density
-    dm_line, = ax.plot(time_points, dm_data[i], marker='o', color='tab:blue', label='DM')
-    hela_line, = ax.plot(time_points, hela_data[i], marker='o', linestyle='--', color='tab:red', label='HeLa')
+import numpy as np
+
+from labvis.aggregate import condition_stats
+from labvis.charts import depends_on
+from labvis.growth import fit_growth, growth_curve, kinetic_series, plausible_fits
+from labvis.ingest import load_workbook
+from labvis.layout import fit_layout
+from labvis.render import run_script
+
+# Growth model overlaid on the means; see labvis.growth.MODELS
+FIT_MODEL = 'logistic'
+
+
+@depends_on('Group1')
+def build_figure():
+    """
+    Absorbance over time for DM vs. HeLa at each Group 1 seeding density.
+
+    Returns:
+    Figure: The finished chart
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.lines import Line2D
+
+    # --------------------------------------------------
+    # 1) Data Setup
+    # --------------------------------------------------
+    time_points = [0, 24, 48, 72]  # Time in hours
+
+    # Seeding densities (x10^4 cells) and mean absorbance from the Group1 plate reads
+    densities = ["5.00×10⁴", "3.90×10⁴", "3.04×10⁴", "2.37×10⁴", "1.85×10⁴", "1.50×10⁴"]
+    density_values = [5.0, 3.9, 3.04, 2.37, 1.85, 1.5]
+
+    readings = load_workbook(sheets=['Group1'])
+    means, _ = condition_stats(readings, 'Group1')
+    dm_data = [[means[('', d, 'DM')][f'{t}h'] for t in time_points] for d in density_values]
+    hela_data = [[means[('', d, 'HeLa')][f'{t}h'] for t in time_points] for d in density_values]
+
+    # One growth curve per density and cell type, fitted to all replicate wells
+    keys, hours, values = kinetic_series(readings, [f'{t}h' for t in time_points],
+                                         by=('density', 'cell_type'))
+    fit = fit_growth(np.tile(hours, values.shape[1]), values.reshape(len(keys), -1), FIT_MODEL)
+    fit_hours = np.linspace(0, time_points[-1], 145)
+    curves = dict(zip(keys, growth_curve(FIT_MODEL, fit.params, fit_hours)))
+    # Unconverged or non-growing fits get no curve
+    plausible = dict(zip(keys, plausible_fits(fit).tolist()))
+
+    # --------------------------------------------------
+    # 2) Create Subplots (2 rows × 3 columns)
+    # --------------------------------------------------
+    fig, axes = plt.subplots(nrows=2, ncols=3, figsize=(15, 8), sharex=True, sharey=True)
+
+    for i, ax in enumerate(axes.flat):
+        # Plot for one density
+        dm_line, = ax.plot(time_points, dm_data[i], marker='o', color='tab:blue', label='DM')
+        hela_line, = ax.plot(time_points, hela_data[i], marker='o', linestyle='--', color='tab:red', label='HeLa')
+        for cell_type, color in (('DM', 'tab:blue'), ('HeLa', 'tab:red')):
+            if not plausible[(density_values[i], cell_type)]:
+                continue
+            ax.plot(fit_hours, curves[(density_values[i], cell_type)], color=color,
+                    linestyle=':', linewidth=1.2, alpha=0.8)
     
-    ax.set_title(f'Density {i+1} ({densities[i]})', fontsize=11)
-    ax.set_xticks(time_points)
-    ax.grid(True, linestyle='--', alpha=0.5)
+        ax.set_title(f'Density {i+1} ({densities[i]})', fontsize=11)
+        ax.set_xticks(time_points)
+        ax.grid(True, linestyle='--', alpha=0.5)
     
-    if i >= 3:  # Bottom row
-        ax.set_xlabel("Time (hr)")
-    if i % 3 == 0:  # Left column
-        ax.set_ylabel("Absorbance")
-
-# --------------------------------------------------
-# 3) Shared Legend and Title
-# --------------------------------------------------
-# Adjust the figure to make room for title and legend
-plt.subplots_adjust(top=0.92)  # Reduced space at the top
-
-# Add title at the very top
-fig.suptitle("Absorbance over Time: DM vs HeLa at Different Seeding Densities", fontsize=14, y=0.98)
-
-# Create shared legend below the title but above the plots
-fig.legend([dm_line, hela_line], ["DM", "HeLa"],
-           loc='upper center', bbox_to_anchor=(0.5, 0.94), ncol=2,
-           frameon=False, fontsize=11)
-
-# Adjust layout for the plots, leaving less space for title and legend
-plt.tight_layout(rect=[0, 0, 1, 0.92])
-plt.savefig('Absb_Grp1.png', dpi=300, bbox_inches='tight')
-plt.show()
+        if i >= 3:  # Bottom row
+            ax.set_xlabel("Time (hr)")
+        if i % 3 == 0:  # Left column
+            ax.set_ylabel("Absorbance")
+
+    # --------------------------------------------------
+    # 3) Shared Legend and Title
+    # --------------------------------------------------
+    # Adjust the figure to make room for title and legend
+    plt.subplots_adjust(top=0.92)  # Reduced space at the top
+
+    # Add title at the very top
+    fig.suptitle("Absorbance over Time: DM vs HeLa at Different Seeding Densities", fontsize=14, y=0.98)
+
+    # Create shared legend below the title but above the plots
+    fit_line = Line2D([], [], color='gray', linestyle=':', linewidth=1.2)
+    fig.legend([dm_line, hela_line, fit_line], ["DM", "HeLa", f"{FIT_MODEL.capitalize()} fit"],
+               loc='upper center', bbox_to_anchor=(0.5, 0.94), ncol=3,
+               frameon=False, fontsize=11)
+
+    # Adjust layout for the plots, leaving less space for title and legend
+    fit_layout(fig, 'Absb_Grp1', __file__, rect=[0, 0, 1, 0.92])
+
+    return fig
+
+
+CHARTS = {'Absb_Grp1': build_figure}
+
+
+if __name__ == '__main__':
+    run_script(CHARTS)
@@ -1,5 +1,10 @@
-import matplotlib.pyplot as plt
-import numpy as np
+from functools import partial
+
+from labvis.bars import grouped_bars
+from labvis.charts import depends_on
+from labvis.cube import LabeledArray
+from labvis.layout import fit_layout
+from labvis.render import run_script
 
 # --------------------------
 # 1) Organized Data
@@ -79,68 +84,54 @@ cell_types       = ['DM', 'Normal', 'HeLa']  # 'Normal' may be absent in data
 nutrient_types = ['FBS 2.5%', 'Glutamine', 'Glucose']
 
 # --------------------------
-# 3) Helper: Get value from data
+# 3) Labelled cube: stiffness x nutrient x cell type x density
 # --------------------------
-def get_value(data, ratio, nutrient, cell_type, cell_conc):
-    """
-    Return the value for (stiffness, nutrient, "cellType cellConc") if it exists,
-    otherwise 0. E.g. "HeLa 3.90x10^4".
-    """
-    if ratio not in data:
-        return 0
-    if nutrient not in data[ratio]:
-        return 0
-    key = f"{cell_type} {cell_conc}"
-    return data[ratio][nutrient].get(key, 0)
+# Combinations missing from data_by_stiffness are NaN (no bar), not 0
+counts = LabeledArray.from_records(
+    ((ratio, nutrient, *key.split(' ', 1), value)
+     for ratio, by_nutrient in data_by_stiffness.items()
+     for nutrient, by_cell in by_nutrient.items()
+     for key, value in by_cell.items()),
+    [('stiffness', stiffness_ratios), ('nutrient', nutrient_types),
+     ('cell_type', cell_types), ('density', cell_concs)])
 
 # --------------------------
-# 4) Loop Over Each Nutrient -> One Figure Per Nutrient
+# 4) One Figure Per Nutrient
 # --------------------------
-for nutrient in nutrient_types:
+@depends_on()  # the counts above are all it plots
+def build_figure(nutrient):
+    """
+    Cell counts for one nutrient, grouped by stiffness ratio and cell concentration.
+
+    Returns:
+    Figure: The finished chart
+    """
+    import matplotlib.pyplot as plt
+
     fig, ax = plt.subplots(figsize=(12, 6))
     
     bar_width = 0.12
     group_spacing = 0.5  # spacing between stiffness-ratio groups
     sub_spacing   = 0.02 # spacing between cell-concentration sub-groups
     
-    x_positions = []
-    x_labels = []
+    x_labels = stiffness_ratios
     
-    # We'll compute x-coordinates manually
-    for i, ratio in enumerate(stiffness_ratios):
-        # Left boundary for the group i (this stiffness ratio)
-        group_left = i * (len(cell_concs)*len(cell_types)*bar_width + group_spacing)
-        
-        # For each cell concentration j
-        for j, conc in enumerate(cell_concs):
-            # left boundary for sub-group j within group i
-            sub_left = group_left + j * (len(cell_types)*bar_width + sub_spacing)
-            
-            # Now place bars for each cell type
-            for k, ctype in enumerate(cell_types):
-                x = sub_left + k * bar_width
-                val = get_value(data_by_stiffness, ratio, nutrient, ctype, conc)
-                
-                # We'll color by cell type, or you can do a dictionary if you like
-                if ctype == 'DM':
-                    color = 'royalblue'
-                elif ctype == 'Normal':
-                    color = 'forestgreen'
-                else:  # HeLa
-                    color = 'firebrick'
-                
-                # Label only once to avoid legend repetition
-                label = ctype if (i == 0 and j == 0 and k == 0) else None
-                
-                ax.bar(x, val, bar_width, color=color, edgecolor='black', label=label)
-        
-        # Center of the entire group for x-tick labeling
-        # total width of subgroups = len(cell_concs)*(len(cell_types)*bar_width + sub_spacing)
-        # But we subtract the last sub_spacing to be exact
-        total_subgroups_width = len(cell_concs)*len(cell_types)*bar_width + (len(cell_concs)-1)*sub_spacing
-        group_center = group_left + total_subgroups_width / 2.0
-        x_positions.append(group_center)
-        x_labels.append(ratio)
+    # values[ratio, conc, cell type]; x-coordinates come from the same grid
+    values = counts.sel(nutrient=nutrient).transpose('stiffness', 'density', 'cell_type').values
+    
+    # We'll color by cell type, one bar call (and legend entry) per cell type
+    colors = {'DM': 'royalblue', 'Normal': 'forestgreen', 'HeLa': 'firebrick'}
+    bar_x, _ = grouped_bars(ax, values,
+                            colors=[colors[ctype] for ctype in cell_types],
+                            labels=cell_types,
+                            bar_width=bar_width, group_spacing=group_spacing,
+                            sub_spacing=sub_spacing, edgecolor='black')
+    
+    # Center of the entire group for x-tick labeling
+    # total width of subgroups = len(cell_concs)*(len(cell_types)*bar_width + sub_spacing)
+    # But we subtract the last sub_spacing to be exact
+    total_subgroups_width = len(cell_concs)*len(cell_types)*bar_width + (len(cell_concs)-1)*sub_spacing
+    x_positions = bar_x[:, 0, 0] + total_subgroups_width / 2.0
     
     # X-axis labels
     ax.set_xticks(x_positions)
@@ -155,5 +146,14 @@ for nutrient in nutrient_types:
     ax.legend(title="Cell Type")
     ax.grid(axis='y', linestyle='--', alpha=0.5)
     
-    plt.tight_layout()
-    plt.show()
+    fit_layout(fig, 'Analysis_Grp3', __file__)
+
+    return fig
+
+
+CHARTS = {f"Analysis_Grp3_{nutrient.split()[0]}": partial(build_figure, nutrient)
+          for nutrient in nutrient_types}
+
+
+if __name__ == '__main__':
+    run_script(CHARTS)
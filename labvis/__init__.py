@@ -0,0 +1,15 @@
+"""
+Shared data handling for the lab data visualisation scripts.
+
+``labvis.ingest`` reads the plate blocks of "All biomaterial experiment
+data.xlsx" into a table of single-well readings and ``labvis.aggregate``
+turns those into the per-condition means/SEMs the chart scripts plot.
+
+Importing the package loads neither NumPy nor matplotlib: the data modules
+need NumPy only, and plotting libraries are imported inside the functions
+that draw, so compute-only callers never pay for them.
+"""
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_WORKBOOK = os.path.join(PROJECT_ROOT, 'All biomaterial experiment data.xlsx')
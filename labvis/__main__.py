@@ -0,0 +1,285 @@
+"""
+Command line entry point: ``python -m labvis <command>``.
+
+``stats`` is the compute-only command used by scripts and LIMS hooks: it
+prints per-condition statistics, doubling times or significance tests as CSV
+without importing matplotlib.  Its output is cached per workbook version next to the parsed
+columns (see ``labvis.cache``), so a repeated call only stats the workbook,
+reads a small text file and never imports NumPy either.
+
+``update`` is the incremental counterpart of ``render-all``: it re-parses,
+re-aggregates, re-derives and re-renders only the nodes downstream of what
+changed in the workbook since the last run (see ``labvis.incremental``).
+``watch`` stays running and does the same every time a workbook or chart
+script in the project changes (see ``labvis.watch``).
+
+``ingest`` reads many workbooks at once and reports files/s and MB/s (see
+``labvis.bulk``).
+
+``store add`` loads workbooks into the SQLite experiment store and ``store
+query`` prints the per-condition metrics (or, with ``--wells``, the readings)
+matching any combination of condition filters, across every stored
+experiment (see ``labvis.store``).
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+from labvis import DEFAULT_WORKBOOK, PROJECT_ROOT
+
+
+def _render_all(args):
+    from labvis.profiling import Profiler, profiling
+    from labvis.render import DEFAULT_OUTPUT, print_report, render_all
+
+    profiler = Profiler() if args.profile else None
+    start = time.perf_counter()
+    with profiling(profiler) if profiler else contextlib.nullcontext():
+        results = render_all(args.output or DEFAULT_OUTPUT, names=args.charts,
+                             jobs=args.jobs, force=args.force)
+    print_report(results, time.perf_counter() - start)
+    if profiler:
+        profiler.print_summary()
+        profiler.write(args.profile)
+        print(f'trace written to {args.profile}')
+
+
+def _update(args):
+    from labvis.incremental import IncrementalBuild, print_update
+    from labvis.profiling import Profiler, profiling
+
+    profiler = Profiler() if args.profile else None
+    with profiling(profiler) if profiler else contextlib.nullcontext():
+        report = IncrementalBuild(args.output).update(force=args.force)
+    print_update(report)
+    if profiler:
+        profiler.print_summary()
+        profiler.write(args.profile)
+        print(f'trace written to {args.profile}')
+
+
+def _watch(args):
+    from labvis.watch import watch
+
+    watch(args.directory, args.output, store=args.store, debounce=args.debounce,
+          poll=args.poll, interval=args.interval)
+
+
+def _ingest(args):
+    from labvis.bulk import ingest_workbooks, print_throughput
+
+    result = ingest_workbooks(args.workbooks, jobs=args.jobs, max_pending=args.max_pending,
+                              executor='thread' if args.threads else 'process')
+    print_throughput(result)
+    if args.store:
+        from labvis.store import ExperimentStore
+
+        with ExperimentStore(args.store) as store:
+            for f in result.files:
+                if f.table is not None:
+                    store.add_readings(f.table, workbook=os.path.basename(f.path))
+
+
+# Bump when the stats CSV for an unchanged workbook changes
+STATS_VERSION = 2
+
+
+def _stats_csv(args):
+    """CSV of n/mean/SD/SEM per condition, or of doubling times, t-tests or ANOVAs."""
+    import csv
+    import io
+
+    from labvis.aggregate import condition_table
+    from labvis.ingest import load_workbook
+    from labvis.records import CONDITION_FIELDS
+
+    table = condition_table(load_workbook(args.workbook, sheets=[args.group]),
+                            args.group, args.medium)
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator='\n')
+    if args.doubling:
+        from labvis.doubling import table_doubling_times
+
+        keys, result, hours = table_doubling_times(table, args.start, args.end)
+        writer.writerow(CONDITION_FIELDS[:3] + ('hours', 'doubling_time', 'error'))
+        for row in zip(keys, hours.tolist(), result.time.tolist(), result.error.tolist()):
+            writer.writerow(row[0] + row[1:])
+        return out.getvalue()
+    if args.compare:
+        from labvis.significance import cell_type_tests, significance_labels
+
+        keys, result, adjusted = cell_type_tests(table, tuple(args.compare), args.correction)
+        writer.writerow(('concentration', 'density', 'time_point', 'difference', 'stderr', 't',
+                         'df', 'p', 'p_adjusted', 'significance'))
+        for row in zip(keys, result.difference.tolist(), result.stderr.tolist(),
+                       result.statistic.tolist(), result.df.tolist(), result.pvalue.tolist(),
+                       adjusted.tolist(), significance_labels(adjusted).tolist()):
+            writer.writerow(row[0] + row[1:])
+        return out.getvalue()
+    if args.anova:
+        from labvis.significance import concentration_anova
+
+        keys, result = concentration_anova(table, tuple(args.anova))
+        effects = ('concentration', 'cell_type', 'interaction')
+        writer.writerow(('density', 'time_point', 'effect', 'ss', 'df', 'f', 'p'))
+        for key, ss, df, f, p, ss_e, df_e in zip(keys, *(field.tolist() for field in result)):
+            for row in zip(effects, ss, df, f, p):
+                writer.writerow(key + row)
+            writer.writerow(key + ('residual', ss_e, df_e, '', ''))
+        return out.getvalue()
+    names = ('n', 'mean', 'sd', 'sem')
+    writer.writerow(CONDITION_FIELDS + names)
+    labels = [table.categories[f].decode(table.codes[f]) for f in CONDITION_FIELDS]
+    values = [table['n'].astype(int).tolist()] + [table[name].tolist() for name in names[1:]]
+    for row in zip(*labels, *values):
+        writer.writerow(row)
+    return out.getvalue()
+
+
+def _stats(args):
+    from labvis.cache import WorkbookCache
+
+    key = f'stats-v{STATS_VERSION}-{args.group}-{args.medium}'
+    if args.doubling:
+        key += f'-doubling-{args.start}-{args.end}'
+    elif args.compare:
+        key += f'-compare-{"-".join(args.compare)}-{args.correction}'
+    elif args.anova:
+        key += f'-anova-{"-".join(args.anova)}'
+    cache = None if args.no_cache else WorkbookCache(args.workbook)
+    text = cache.get_text(key) if cache else None
+    if text is None:
+        text = _stats_csv(args)
+        if cache:
+            cache.put_text(key, text)
+    sys.stdout.write(text)
+
+
+# Condition filters of `store query`, as in labvis.store.FILTER_FIELDS
+STORE_FILTERS = ('group', 'medium', 'concentration', 'density', 'cell_type', 'time_point',
+                 'stiffness')
+
+
+def _store(args):
+    import csv
+
+    from labvis.store import ExperimentStore
+
+    with ExperimentStore(args.db) as store:
+        if args.action == 'add':
+            for path in args.workbooks or [DEFAULT_WORKBOOK]:
+                print(f'{path}: {store.add_workbook(path)} wells')
+            return
+        filters = {field: values[0] if len(values) == 1 else values
+                   for field, values in vars(args).items()
+                   if field in STORE_FILTERS and values is not None}
+        if 'density' in filters:
+            filters['density'] = [float(d) for d in args.density]
+        writer = csv.writer(sys.stdout, lineterminator='\n')
+        if args.wells:
+            table = store.readings(**filters)
+            names = list(table.columns)
+            columns = [table[name].tolist() for name in names]
+        else:
+            found = store.metrics(**filters)
+            names = list(found)
+            columns = [found[name].tolist() for name in names]
+        writer.writerow(names)
+        writer.writerows(zip(*columns))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m labvis')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    render = commands.add_parser('render-all', help='render every chart to PNG')
+    render.add_argument('charts', nargs='*', help='chart names to render (default: all)')
+    render.add_argument('-o', '--output', default=None,
+                        help='output directory (default: Charts/)')
+    render.add_argument('-j', '--jobs', type=int, default=1,
+                        help='worker processes; 0 = one per CPU (default: 1)')
+    render.add_argument('-f', '--force', action='store_true',
+                        help='re-render charts even if they are up to date')
+    render.add_argument('--profile', metavar='TRACE.json',
+                        help='time each pipeline stage and write a Chrome trace')
+    render.set_defaults(func=_render_all)
+
+    update = commands.add_parser('update', help='recompute and re-render only what the last '
+                                                'workbook edit changed')
+    update.add_argument('-o', '--output', default=None,
+                        help='output directory (default: Charts/)')
+    update.add_argument('-f', '--force', action='store_true',
+                        help='re-render every chart')
+    update.add_argument('--profile', metavar='TRACE.json',
+                        help='time each pipeline stage and write a Chrome trace')
+    update.set_defaults(func=_update)
+
+    watcher = commands.add_parser('watch', help='re-render affected charts whenever workbooks '
+                                                'or chart scripts change')
+    watcher.add_argument('directory', nargs='?', default=PROJECT_ROOT,
+                         help='directory to watch (default: the project root)')
+    watcher.add_argument('-o', '--output', default=None,
+                         help='output directory (default: Charts/)')
+    watcher.add_argument('--store', metavar='DB',
+                         help='also load other new or changed workbooks into this experiment store')
+    watcher.add_argument('--debounce', type=float, default=0.3,
+                         help='quiet seconds that end a burst of file events (default: 0.3)')
+    watcher.add_argument('--poll', action='store_true',
+                         help='rescan the directory instead of using inotify')
+    watcher.add_argument('--interval', type=float, default=1.0,
+                         help='seconds between rescans when polling (default: 1)')
+    watcher.set_defaults(func=_watch)
+
+    ingest = commands.add_parser('ingest', help='read many workbooks concurrently and report '
+                                                'throughput')
+    ingest.add_argument('workbooks', nargs='+', help='workbooks to read')
+    ingest.add_argument('-j', '--jobs', type=int, default=0,
+                        help='parser workers; 0 = one per CPU (default: 0)')
+    ingest.add_argument('--threads', action='store_true',
+                        help='parse in threads instead of worker processes')
+    ingest.add_argument('--max-pending', type=int, default=None,
+                        help='files read but not yet parsed at once (default: 2 x jobs)')
+    ingest.add_argument('--store', metavar='DB',
+                        help='also load every workbook read into this experiment store')
+    ingest.set_defaults(func=_ingest)
+
+    stats = commands.add_parser('stats', help='print per-condition statistics as CSV')
+    stats.add_argument('group', help="workbook sheet, e.g. 'Group2'")
+    stats.add_argument('medium', nargs='?', default='',
+                       help="nutrient, e.g. 'FBS'; omit for Group1")
+    output = stats.add_mutually_exclusive_group()
+    output.add_argument('--doubling', action='store_true',
+                        help='print doubling times and errors instead')
+    output.add_argument('--compare', nargs=2, metavar=('CELL', 'CELL'),
+                        help='print Welch t-tests of two cell types in every condition')
+    output.add_argument('--anova', nargs='+', metavar='CELL',
+                        help='print a concentration x cell type ANOVA per density and time point')
+    stats.add_argument('--start', default='0h', help='doubling: first time point (default: 0h)')
+    stats.add_argument('--end', default='48h', help='doubling: last time point (default: 48h)')
+    stats.add_argument('--correction', default='holm', choices=('bonferroni', 'holm', 'fdr_bh'),
+                       help='compare: multiple-comparison correction (default: holm)')
+    stats.add_argument('--workbook', default=DEFAULT_WORKBOOK)
+    stats.add_argument('--no-cache', action='store_true',
+                       help='recompute instead of reusing the cached result')
+    stats.set_defaults(func=_stats)
+
+    store = commands.add_parser('store', help='load workbooks into, or query, the experiment store')
+    store.add_argument('action', choices=('add', 'query'))
+    store.add_argument('workbooks', nargs='*', help='add: workbooks to load (default: the bundled one)')
+    store.add_argument('--db', default=os.path.join(PROJECT_ROOT, 'experiments.sqlite'),
+                       help='SQLite file (default: experiments.sqlite in the project root)')
+    for field in STORE_FILTERS:
+        store.add_argument('--' + field.replace('_', '-'), dest=field, nargs='+', metavar='VALUE',
+                           help=f'query: only these {field.replace("_", " ")} values')
+    store.add_argument('--wells', action='store_true',
+                       help='query: print single-well readings instead of per-condition metrics')
+    store.set_defaults(func=_store)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
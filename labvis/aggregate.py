@@ -0,0 +1,52 @@
+"""
+Per-condition summaries of a ReadingTable.
+"""
+from labvis.profiling import stage
+from labvis.records import ConditionTable
+from labvis.replicates import ReplicateStore
+
+
+def condition_table(table, group, medium=''):
+    """
+    n, mean, SD and SEM of every condition in one group/medium as a ConditionTable.
+
+    Parameters:
+    table (ReadingTable): Readings from labvis.ingest
+    group (str): Sheet/group name, e.g. 'Group2'
+    medium (str): Nutrient, e.g. 'FBS'; '' for plates without one
+
+    Returns:
+    ConditionTable: One row per (concentration, density, cell_type, time_point),
+    with n, mean, sd, sem, read_at (mean plate read time, Unix seconds) and
+    replicates (the well readings, NaN-padded to the largest n)
+    """
+    with stage('aggregate', group=group, medium=medium):
+        summary = ReplicateStore.from_table(table.where(group=group, medium=medium)).aggregate()
+        # KEY_FIELDS order: group, medium, concentration, density, cell_type, time_point
+        labels = {'concentration': [k[2] for k in summary.keys],
+                  'density': [k[3] for k in summary.keys],
+                  'cell_type': [k[4] for k in summary.keys],
+                  'time_point': [k[5] for k in summary.keys]}
+        return ConditionTable.from_columns(labels, {'n': summary.n, 'mean': summary.mean,
+                                                    'sd': summary.sd, 'sem': summary.sem,
+                                                    'read_at': summary.read_at,
+                                                    'replicates': summary.replicates})
+
+
+def condition_stats(table, group, medium=''):
+    """
+    Mean and SEM of the replicate wells of every condition in one group/medium.
+
+    The result has the same shape as the dicts the chart scripts used to
+    hard-code, e.g. ``means[('2.5mM', 3.9, 'DM')]['0h']``.
+
+    Parameters:
+    table (ReadingTable): Readings from labvis.ingest
+    group (str): Sheet/group name, e.g. 'Group2'
+    medium (str): Nutrient, e.g. 'FBS'; '' for plates without one
+
+    Returns:
+    tuple: (means, sems) nested dicts keyed by (concentration, density, cell_type) then time point
+    """
+    conditions = condition_table(table, group, medium)
+    return conditions.to_nested('mean'), conditions.to_nested('sem')
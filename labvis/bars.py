@@ -0,0 +1,119 @@
+"""
+Grouped bar charts drawn with one ``ax.bar`` call per series.
+
+The chart scripts lay bars out on a regular grid: groups (e.g. nutrient
+concentration x seeding density) hold optional sub-groups, and each
+(sub-)group holds one bar per series (e.g. cell type x time point).  The
+x-position of every bar is computed at once by broadcasting over that grid,
+and each series is then drawn with a single ``ax.bar`` call taking vectors of
+positions, heights and error bars.  A chart therefore has one BarContainer
+(and one error-bar collection) per series instead of one per bar.
+
+``significance_brackets`` likewise draws every comparison bracket of a
+chart as one LineCollection.
+"""
+import numpy as np
+
+
+def grouped_bar_x(shape, bar_width, group_spacing, sub_spacing=0.0):
+    """
+    x-position of every bar in a grid of grouped bars.
+
+    Bars within a (sub-)group are ``bar_width`` apart, sub-groups are separated
+    by ``sub_spacing`` and the outermost groups by ``group_spacing``.
+
+    Parameters:
+    shape (tuple): (n_groups, [n_subgroups, ...,] n_series)
+    bar_width (float): Width of one bar
+    group_spacing (float): Gap between outermost groups
+    sub_spacing (float): Gap between nested sub-groups
+
+    Returns:
+    ndarray: Positions with the given shape
+    """
+    shape = tuple(shape)
+    x = np.arange(shape[-1]) * bar_width
+    bars_per_level = shape[-1]
+    for depth, n in enumerate(reversed(shape[:-1])):
+        spacing = group_spacing if depth == len(shape) - 2 else sub_spacing
+        stride = bars_per_level * bar_width + spacing
+        x = (np.arange(n) * stride).reshape((n,) + (1,) * x.ndim) + x
+        bars_per_level *= n
+    return x
+
+
+def grouped_bars(ax, values, errors=None, colors=None, labels=None,
+                 bar_width=0.1, group_spacing=0.4, sub_spacing=0.0, x=None, **bar_kw):
+    """
+    Draw a grid of grouped bars, one ``ax.bar`` call per series.
+
+    Every slot of the grid stays inside the autoscaled x-range, including
+    slots whose value is NaN (no bar is drawn there).
+
+    Parameters:
+    ax (Axes): Axes to draw on
+    values (array): Bar heights shaped (n_groups, [n_subgroups, ...,] n_series)
+    errors (array): Symmetric error bars, same shape as values, or (2,) +
+        values.shape for separate lower and upper lengths, or None
+    colors (list): One colour per series
+    labels (list): One legend label per series
+    bar_width, group_spacing, sub_spacing (float): See grouped_bar_x
+    x (array): Precomputed positions shaped like values; overrides the spacings
+    **bar_kw: Passed to every ax.bar call (edgecolor, capsize, ...)
+
+    Returns:
+    tuple: (x positions shaped like values, list of BarContainers per series)
+    """
+    values = np.asarray(values, dtype=float)
+    if x is None:
+        x = grouped_bar_x(values.shape, bar_width, group_spacing, sub_spacing)
+    if errors is not None:
+        errors = np.asarray(errors, dtype=float)
+        asymmetric = errors.ndim == values.ndim + 1
+    containers = []
+    for s in range(values.shape[-1]):
+        kw = dict(bar_kw)
+        if colors is not None:
+            kw['color'] = colors[s]
+        if labels is not None:
+            kw['label'] = labels[s]
+        if errors is not None:
+            kw['yerr'] = errors[..., s].reshape(2, -1) if asymmetric else errors[..., s].ravel()
+        containers.append(ax.bar(x[..., s].ravel(), values[..., s].ravel(),
+                                 width=bar_width, **kw))
+    # NaN bars (missing conditions) add nothing to the data limits; keep
+    # every slot in view, as a 0-height bar would
+    left = x.ravel() - (0.0 if bar_kw.get('align') == 'edge' else bar_width / 2)
+    ax.update_datalim(np.column_stack([np.concatenate([left, left + bar_width]),
+                                       np.zeros(2 * left.size)]))
+    ax.autoscale_view()
+    return x, containers
+
+
+def significance_brackets(ax, x0, x1, y, labels, tick=0.02, fontsize=9, **line_kw):
+    """
+    Draw a bracket from x0 to x1 at height y, with its label on top, for each comparison.
+
+    Parameters:
+    ax (Axes): Axes to draw on
+    x0, x1, y (array): Bracket ends and heights, one per comparison (data coordinates)
+    labels (list): Text above each bracket, e.g. '**'
+    tick (float): Length of the bracket ends, in data units
+    fontsize (float): Label size
+    **line_kw: Passed to the LineCollection (color, linewidth, ...)
+
+    Returns:
+    LineCollection: The brackets
+    """
+    from matplotlib.collections import LineCollection
+
+    x0, x1, y = (np.asarray(v, dtype=float).ravel() for v in (x0, x1, y))
+    # One 4-point polyline per bracket: down-tick, bar, down-tick
+    segments = np.stack([np.stack([x0, y - tick], axis=-1), np.stack([x0, y], axis=-1),
+                         np.stack([x1, y], axis=-1), np.stack([x1, y - tick], axis=-1)], axis=1)
+    line_kw.setdefault('color', 'black')
+    line_kw.setdefault('linewidth', 0.8)
+    brackets = ax.add_collection(LineCollection(segments, **line_kw))
+    for x, height, label in zip(((x0 + x1) / 2).tolist(), y.tolist(), labels):
+        ax.text(x, height, label, ha='center', va='bottom', fontsize=fontsize)
+    return brackets
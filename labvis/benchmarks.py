@@ -0,0 +1,838 @@
+"""
+Timing comparisons for the data pipeline.
+
+Run with ``python -m labvis.benchmarks [workbook.xlsx]``.  Add ``--scaling``
+to also time ingest, aggregation, doubling times and rendering on synthetic
+96/384/1536-well experiments at 1x, 10x and 100x today's data volume (see
+``labvis.synthetic``); ``--scales`` and ``--formats`` narrow the sweep.
+
+Before timing anything it checks the rendered charts (``check_*``) and
+exits with status 1 if one fails.
+
+The startup benchmarks run compute-only commands in fresh interpreters with
+``-X importtime``.  Only the cached ``stats`` call is checked against
+STARTUP_BUDGET: anything that computes imports NumPy, and that import alone
+takes about as long as the budget.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from labvis import PROJECT_ROOT
+from labvis.cache import WorkbookCache
+from labvis.ingest import DEFAULT_WORKBOOK, read_workbook
+
+# Wall time allowed for a repeat ``stats`` call (answered from the cached CSV)
+STARTUP_BUDGET = 0.100
+
+
+def measure(func, repeat=5):
+    """
+    Best wall time and peak traced allocation of ``func()`` over ``repeat`` runs.
+
+    Returns:
+    tuple: (seconds, peak_bytes)
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def bench_ingest(path=DEFAULT_WORKBOOK, repeat=5):
+    """
+    Streaming ingest vs. a full pandas ``read_excel`` load of every sheet.
+
+    Returns:
+    dict: name -> (seconds, peak_bytes); pandas is skipped if not installed
+    """
+    results = {'labvis.ingest.read_workbook': measure(lambda: read_workbook(path), repeat)}
+    try:
+        import pandas as pd
+    except ImportError:
+        return results
+    results['pandas.read_excel(sheet_name=None)'] = measure(
+        lambda: pd.read_excel(path, sheet_name=None, header=None), repeat)
+    return results
+
+
+def bench_cache(path=DEFAULT_WORKBOOK, repeat=5):
+    """
+    Cold load (parse + store) vs. warm load (memory-mapped columns).
+
+    The cache lives in a temporary directory, so the project's
+    ``.labvis_cache`` is left alone.
+
+    Returns:
+    dict: name -> (seconds, peak_bytes)
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = WorkbookCache(path, cache_dir=tmp)
+
+        def cold():
+            cache.clear()
+            cache.load()
+
+        results = {'WorkbookCache.load (cold cache)': measure(cold, repeat)}
+        results['WorkbookCache.load (warm cache)'] = measure(cache.load, repeat)
+    return results
+
+
+def bench_bars(n_groups=500, n_series=4, repeat=1):
+    """
+    Per-bar ``ax.bar`` loop vs. one call per series, building and drawing a
+    grouped bar chart of ``n_groups * n_series`` bars with error bars.
+
+    Returns:
+    dict: name -> (seconds, peak_bytes, artist_count)
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    from labvis.bars import grouped_bar_x, grouped_bars
+
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0.1, 1.0, (n_groups, n_series))
+    errors = values * 0.05
+
+    def per_bar():
+        fig, ax = plt.subplots()
+        x = grouped_bar_x(values.shape, 0.1, 0.4)
+        for i in range(n_groups):
+            for s in range(n_series):
+                ax.bar(x[i, s], values[i, s], width=0.1, yerr=errors[i, s], capsize=3)
+        return fig
+
+    def per_series():
+        fig, ax = plt.subplots()
+        grouped_bars(ax, values, errors, bar_width=0.1, group_spacing=0.4, capsize=3)
+        return fig
+
+    results = {}
+    for name, build in (('ax.bar per bar', per_bar), ('grouped_bars per series', per_series)):
+        def run():
+            fig = build()
+            fig.canvas.draw()
+            plt.close(fig)
+        seconds, peak = measure(run, repeat)
+        fig = build()
+        artists = sum(1 for _ in fig.findobj())
+        plt.close(fig)
+        results[f'{name} ({n_groups * n_series} bars)'] = (seconds, peak, artists)
+    return results
+
+
+def bench_doubling(n=100_000, repeat=5):
+    """
+    Vectorised doubling-time kernel vs. a per-condition Python loop.
+
+    Returns:
+    dict: name -> (seconds, peak_bytes)
+    """
+    import math
+
+    import numpy as np
+
+    from labvis.doubling import doubling_times
+
+    rng = np.random.default_rng(0)
+    m0 = rng.uniform(0.2, 0.6, n)
+    m1 = m0 * rng.uniform(0.8, 3.0, n)
+    s0, s1 = m0 * 0.05, m1 * 0.05
+
+    def per_condition():
+        out = []
+        for a, b, ea, eb in zip(m0.tolist(), m1.tolist(), s0.tolist(), s1.tolist()):
+            log_ratio = math.log(b / a)
+            t = 48 * math.log(2) / log_ratio
+            out.append((t, abs(t) * math.hypot(ea / a, eb / b) / abs(log_ratio)))
+        return out
+
+    return {f'doubling times, Python loop ({n})': measure(per_condition, repeat),
+            f'doubling_times, vectorised ({n})': measure(
+                lambda: doubling_times(m0, m1, s0, s1), repeat)}
+
+
+def bench_growth(n=100_000, repeat=1):
+    """
+    Batched fits of every growth model to ``n`` noisy 0/24/48/72 h series.
+
+    Returns:
+    dict: name -> (seconds, peak_bytes)
+    """
+    import numpy as np
+
+    from labvis.growth import MODELS, fit_growth, growth_curve
+
+    rng = np.random.default_rng(0)
+    hours = np.array([0.0, 24.0, 48.0, 72.0])
+    truth = {'exponential': (0.2, 0.02), 'logistic': (0.8, 0.08, 30.0),
+             'gompertz': (0.8, 0.06, 25.0)}
+    results = {}
+    for model in MODELS:
+        params = np.asarray(truth[model]) * rng.uniform(0.8, 1.2, (n, len(truth[model])))
+        values = growth_curve(model, params, hours) * rng.lognormal(0, 0.02, (n, len(hours)))
+        results[f'fit_growth {model} ({n} series)'] = measure(
+            lambda: fit_growth(hours, values, model), repeat)
+    return results
+
+
+def bench_bootstrap(n=10_000, n_resamples=1000, repeat=1):
+    """
+    Bootstrap intervals of ``n`` triplicate means, in this process and on every CPU.
+
+    Returns:
+    dict: name -> (seconds, peak_bytes)
+    """
+    import numpy as np
+
+    from labvis.bootstrap import bootstrap_ci
+
+    replicates = np.random.default_rng(0).normal(0.4, 0.05, (n, 3))
+    return {f'bootstrap_ci ({n} x {n_resamples}, 1 job)': measure(
+                lambda: bootstrap_ci(replicates, n_resamples=n_resamples), repeat),
+            f'bootstrap_ci ({n} x {n_resamples}, all CPUs)': measure(
+                lambda: bootstrap_ci(replicates, n_resamples=n_resamples, jobs=0), repeat)}
+
+
+def bench_store(scale=250, repeat=5):
+    """
+    Bulk ingest of a synthetic 1536-well experiment into an ExperimentStore,
+    indexed cross-experiment queries against it, then the ingest of a second
+    run with the same plates (checked to keep the first).
+
+    Returns:
+    dict: name -> (seconds, peak_bytes)
+    """
+    from labvis.store import ExperimentStore
+    from labvis.synthetic import PlateDesign, synthetic_table
+
+    table = synthetic_table(PlateDesign(wells=1536), scale)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'experiments.sqlite')
+
+        def ingest():
+            if os.path.exists(path):
+                os.remove(path)
+            with ExperimentStore(path) as store:
+                store.add_readings(table)
+
+        results = {f'ExperimentStore ingest ({len(table)} wells)': measure(ingest, 1)}
+        with ExperimentStore(path) as store:
+            results['store.readings(HeLa, 3.9, 5mM)'] = measure(
+                lambda: store.readings(cell_type='HeLa', density=3.9, concentration='5mM'),
+                repeat)
+            results['store.metrics(HeLa, 3.9, 48h, 3 media)'] = measure(
+                lambda: store.metrics(cell_type='HeLa', density=3.9, time_point='48h',
+                                      medium=['FBS', 'Glucose', 'Glutamine']), repeat)
+            # A second run with the same plate names must sit beside the first
+            results['ExperimentStore ingest, second run'] = measure(
+                lambda: store.add_readings(table, workbook='run2.xlsx'), 1)
+            if len(store) != 2 * len(table):
+                raise RuntimeError(f'second run replaced the first: {len(store)} wells stored')
+    return results
+
+
+def _edit_one_well(path, offset=0.5):
+    """Rewrite a workbook with one reading near the middle of its sheet raised by ``offset``."""
+    import re
+    import shutil
+    import zipfile
+
+    edited = path + '.edit'
+    with zipfile.ZipFile(path) as book, zipfile.ZipFile(edited, 'w', zipfile.ZIP_DEFLATED) as out:
+        for info in book.infolist():
+            data = book.read(info)
+            if info.filename.startswith('xl/worksheets/'):
+                xml = data.decode()
+                # Plate readings, not the 1.0 ... 12.0 well-column numbers
+                cells = [m for m in re.finditer(r'<v>([^<]+)</v>', xml)
+                         if not m.group(1).endswith('.0')]
+                cell = cells[len(cells) // 2]
+                xml = (xml[:cell.start(1)] + repr(float(cell.group(1)) + offset)
+                       + xml[cell.end(1):])
+                data = xml.encode()
+            out.writestr(info, data)
+    shutil.move(edited, path)
+
+
+def bench_bulk(n_files=40, scale=10):
+    """
+    Serial ``read_workbook`` of ``n_files`` synthetic run workbooks vs.
+    ``ingest_workbooks`` with worker processes and with threads.
+
+    Returns:
+    dict: name -> (seconds, files/s, MB/s)
+    """
+    from labvis.bulk import ingest_workbooks
+    from labvis.synthetic import write_workbook
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [write_workbook(os.path.join(tmp, f'run{i}.xlsx'), scale=scale, seed=i)
+                 for i in range(n_files)]
+        megabytes = sum(os.path.getsize(path) for path in paths) / 1e6
+        start = time.perf_counter()
+        for path in paths:
+            read_workbook(path)
+        seconds = time.perf_counter() - start
+        results = {f'read_workbook x {n_files}, serial': (seconds, n_files / seconds,
+                                                          megabytes / seconds)}
+        for executor in ('process', 'thread'):
+            t = ingest_workbooks(paths, executor=executor).throughput
+            results[f'ingest_workbooks x {n_files}, {executor} pool'] = (
+                t.seconds, t.files_per_second, t.mb_per_second)
+    return results
+
+
+def bench_template(n_runs=20, dpi=100):
+    """
+    ``n_runs`` same-shaped Group 2 absorbance charts, one per synthetic run:
+    each built from scratch with ``build_grouped_chart``'s renderer vs. one
+    ``GroupedChart`` updated in place for every run, both saved as PNG.
+
+    Returns:
+    dict: name -> (seconds per chart, artists created per chart)
+    """
+    import io
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    from labvis.aggregate import condition_table
+    from labvis.charts import GroupedChart, GroupedSpec
+    from labvis.synthetic import PlateDesign, concentration_labels, synthetic_table
+
+    design = PlateDesign()
+    spec = GroupedSpec(name='template', metric='absorbance', medium='FBS', group='Synthetic',
+                       concentrations=tuple(concentration_labels(design)))
+    runs = [condition_table(synthetic_table(design, seed=seed), 'Synthetic', 'FBS')
+            for seed in range(n_runs)]
+
+    def save(fig):
+        fig.savefig(io.BytesIO(), format='png', dpi=dpi)
+
+    start = time.perf_counter()
+    created = 0
+    for conditions in runs:
+        fig = GroupedChart(spec, conditions).figure
+        save(fig)
+        created += len(fig.findobj())
+        plt.close(fig)
+    scratch = (time.perf_counter() - start) / n_runs, created / n_runs
+
+    start = time.perf_counter()
+    chart = GroupedChart(spec, runs[0])
+    created = len(chart.figure.findobj())
+    for conditions in runs:
+        save(chart.update(conditions).figure)
+    plt.close(chart.figure)
+    reused = (time.perf_counter() - start) / n_runs, created / n_runs
+    return {f'grouped chart x {n_runs}, from scratch': scratch,
+            f'grouped chart x {n_runs}, GroupedChart.update': reused}
+
+
+def bench_layout(dpi=100):
+    """
+    Every chart of the project built and saved twice through ``labvis.layout``
+    with an empty in-memory cache (after an untimed warm-up): the first pass
+    measures each layout, the second reuses it.  Figure draws and ``tight_layout`` passes are counted
+    per figure.
+
+    Returns:
+    dict: name -> (seconds per figure, draws per figure, layout passes per figure)
+    """
+    import io
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.figure import Figure
+
+    from labvis.layout import LayoutCache, save_figure, use_cache
+    from labvis.render import SAVE_OPTIONS, discover_charts
+
+    charts = discover_charts(PROJECT_ROOT)
+    counts = {'draw': 0, 'tight_layout': 0}
+    originals = {name: getattr(Figure, name) for name in counts}
+
+    def counted(name):
+        def method(self, *args, **kwargs):
+            counts[name] += 1
+            return originals[name](self, *args, **kwargs)
+        return method
+
+    def render_all():
+        for build in charts.values():
+            fig = build()
+            save_figure(fig, io.BytesIO(), format='png', **dict(SAVE_OPTIONS, dpi=dpi))
+            plt.close(fig)
+
+    results = {}
+    previous = use_cache(False)
+    render_all()  # load the workbook and fonts before timing
+    use_cache(LayoutCache(None))
+    for name in counts:
+        setattr(Figure, name, counted(name))
+    try:
+        for label in ('measured', 'cached'):
+            counts.update(draw=0, tight_layout=0)
+            start = time.perf_counter()
+            render_all()
+            n = len(charts)
+            results[f'{n} project charts, layout {label}'] = (
+                (time.perf_counter() - start) / n, counts['draw'] / n, counts['tight_layout'] / n)
+    finally:
+        for name, method in originals.items():
+            setattr(Figure, name, method)
+        use_cache(previous)
+    return results
+
+
+def bench_incremental(scale=84):
+    """
+    ``IncrementalBuild.update`` on a synthetic workbook of ~1,000 plates:
+    the first full run, a run after editing one well, and a no-op run.
+
+    No chart scripts are loaded, so the times cover the ingest, aggregate and
+    derive nodes and the fingerprint bookkeeping.
+
+    Returns:
+    dict: name -> (seconds, conditions changed, derive nodes recomputed)
+    """
+    from labvis.incremental import IncrementalBuild
+    from labvis.synthetic import write_workbook
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_workbook(os.path.join(tmp, 'synthetic.xlsx'), scale=scale)
+        n_plates = len(set(read_workbook(path)['plate'].tolist()))
+        scripts = os.path.join(tmp, 'scripts')
+        os.makedirs(scripts)
+
+        def update():
+            report = IncrementalBuild(os.path.join(tmp, 'Charts'), path, scripts).update()
+            return report.seconds, report.conditions[0], report.derived[0]
+
+        results[f'update, first run ({n_plates} plates)'] = update()
+        _edit_one_well(path)
+        results['update, one well edited'] = update()
+        results['update, nothing changed'] = update()
+    return results
+
+
+def bench_significance(n=100_000, n_designs=10_000, repeat=3):
+    """
+    Welch t-tests with a Holm correction over ``n`` triplicate comparisons, and
+    two-way ANOVAs of ``n_designs`` 4 x 2 x 3 designs.
+
+    Returns:
+    dict: name -> (seconds, peak_bytes)
+    """
+    import numpy as np
+
+    from labvis.significance import adjust_pvalues, two_way_anova, welch_ttest
+
+    rng = np.random.default_rng(0)
+    a, b = rng.normal(0.4, 0.05, (n, 3)), rng.normal(0.45, 0.05, (n, 3))
+    designs = rng.normal(0.4, 0.05, (n_designs, 4, 2, 3))
+    return {f'welch_ttest + holm ({n} tests)': measure(
+                lambda: adjust_pvalues(welch_ttest(a, b).pvalue, 'holm'), repeat),
+            f'two_way_anova ({n_designs} designs)': measure(
+                lambda: two_way_anova(designs), repeat)}
+
+
+def bench_cube(n_ratios=300, n_media=30, repeat=5):
+    """
+    Nested-dict lookups with a key string per value (the old Analysis_Grp3
+    ``get_value``) vs. label selection on a LabeledArray, fetching every
+    (ratio, density, cell type) value of every medium.
+
+    Returns:
+    dict: name -> (seconds, peak_bytes)
+    """
+    import numpy as np
+
+    from labvis.cube import LabeledArray
+
+    ratios = [f'{r}:1' for r in range(n_ratios)]
+    media = [f'medium {m}' for m in range(n_media)]
+    cell_types = ['DM', 'Normal', 'HeLa']
+    densities = ['3.9x10^4', '2.37x10^4', '1.85x10^4']
+    rng = np.random.default_rng(0)
+    nested = {r: {m: {f'{ct} {d}': float(rng.integers(0, 500))
+                      for ct in ('DM', 'HeLa') for d in densities}
+                  for m in media}
+              for r in ratios}
+    cube = LabeledArray.from_records(
+        ((r, m, *key.split(' ', 1), v) for r, by_m in nested.items()
+         for m, by_key in by_m.items() for key, v in by_key.items()),
+        [('stiffness', ratios), ('nutrient', media),
+         ('cell_type', cell_types), ('density', densities)])
+
+    def nested_lookup():
+        return [[[[nested.get(r, {}).get(m, {}).get(f'{ct} {d}', 0)
+                   for ct in cell_types] for d in densities] for r in ratios] for m in media]
+
+    def cube_select():
+        return [cube.sel(nutrient=m).transpose('stiffness', 'density', 'cell_type').values
+                for m in media]
+
+    n = n_ratios * n_media * 9
+    return {f'nested dict get_value ({n} values)': measure(nested_lookup, repeat),
+            f'LabeledArray.sel ({n} values)': measure(cube_select, repeat)}
+
+
+def _traced(build):
+    """Result of ``build()`` and the bytes it left allocated."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def bench_records(n_conc=250, n_density=100, n_cell=10, n_lookups=100_000):
+    """
+    Tuple-keyed nested dicts vs. a ConditionTable at n_conc * n_density *
+    n_cell * 4 time points conditions (10^6 by default): resident memory and
+    the time to look up ``n_lookups`` random conditions.
+
+    Returns:
+    dict: name -> (seconds, bytes held by the structure)
+    """
+    import numpy as np
+
+    from labvis.records import ConditionTable
+
+    concs = [f'{c / 10:g}mM' for c in range(n_conc)]
+    densities = [round(1 + d * 0.01, 2) for d in range(n_density)]
+    cells = [f'cell{c}' for c in range(n_cell)]
+    times = ['0h', '24h', '48h', '72h']
+    rng = np.random.default_rng(0)
+    n = n_conc * n_density * n_cell * len(times)
+
+    def nested():
+        values = iter(rng.random(n).tolist())
+        return {(c, d, ct): {tp: next(values) for tp in times}
+                for c in concs for d in densities for ct in cells}
+
+    means, dict_bytes = _traced(nested)
+
+    def columns():
+        grid = np.meshgrid(np.arange(n_conc), np.arange(n_density),
+                           np.arange(n_cell), np.arange(len(times)), indexing='ij')
+        labels = {'concentration': np.array(concs)[grid[0].ravel()],
+                  'density': np.array(densities)[grid[1].ravel()],
+                  'cell_type': np.array(cells)[grid[2].ravel()],
+                  'time_point': np.array(times)[grid[3].ravel()]}
+        return ConditionTable.from_columns(labels, {'mean': rng.random(n)})
+
+    table, _ = _traced(columns)
+
+    pick = [rng.integers(0, k, n_lookups) for k in (n_conc, n_density, n_cell, len(times))]
+    keys = list(zip(*[np.array(v)[p].tolist() for v, p in zip((concs, densities, cells, times), pick)]))
+    label_arrays = [np.array(v)[p] for v, p in zip((concs, densities, cells, times), pick)]
+
+    def dict_lookup():
+        return [means[(c, d, ct)][tp] for c, d, ct, tp in keys]
+
+    def table_lookup():
+        return table.take('mean', *label_arrays)
+
+    return {f'nested dicts ({n} conditions)': (measure(dict_lookup, 3)[0], dict_bytes),
+            f'ConditionTable ({n} conditions)': (measure(table_lookup, 3)[0], table.nbytes())}
+
+
+def bench_scaling(scales=(1, 10, 100), formats=(96, 384, 1536), repeat=3):
+    """
+    Ingest, aggregation, doubling-time and render times on synthetic data.
+
+    Ingest reads a Group2-style workbook of 96-well blocks written by
+    ``labvis.synthetic.write_workbook``.  Aggregation and doubling times run
+    per medium on ``synthetic_table`` readings in each plate format; render
+    draws one grouped bar chart of every medium's means and saves it with the
+    batch renderer's options.
+
+    Returns:
+    dict: name -> (seconds, peak_bytes, items), items being readings or bars
+    """
+    import numpy as np
+
+    from labvis.aggregate import condition_table
+    from labvis.doubling import doubling_times
+    from labvis.synthetic import PlateDesign, concentration_labels, synthetic_table, write_workbook
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            path = write_workbook(os.path.join(tmp, f'synthetic_{scale}x.xlsx'), scale=scale)
+            readings = len(read_workbook(path))
+            results[f'ingest 96-well {scale}x'] = (
+                *measure(lambda: read_workbook(path), repeat), readings)
+
+    for wells in formats:
+        design = PlateDesign(wells=wells)
+        for scale in scales:
+            table = synthetic_table(design, scale)
+            conc = np.repeat(concentration_labels(design, scale), len(design.densities))[:, None]
+            dens = np.tile(np.asarray(design.densities), design.concentrations * scale)[:, None]
+            cells = np.asarray(design.cell_types)[None, :]
+
+            def aggregate():
+                return [condition_table(table, 'Synthetic', medium) for medium in design.media]
+
+            tables = aggregate()
+
+            def doubling():
+                return [doubling_times(t.take('mean', conc, dens, cells, '0h'),
+                                       t.take('mean', conc, dens, cells, '48h'),
+                                       t.take('sem', conc, dens, cells, '0h'),
+                                       t.take('sem', conc, dens, cells, '48h'))
+                        for t in tables]
+
+            label = f'{wells}-well {scale}x'
+            results[f'aggregate {label}'] = (*measure(aggregate, repeat), len(table))
+            results[f'doubling {label}'] = (*measure(doubling, repeat), len(table))
+
+    for scale in scales:
+        seconds, peak, bars = _bench_render(scale)
+        results[f'render {scale}x'] = (seconds, peak, bars)
+    return results
+
+
+def _bench_render(scale, repeat=1):
+    """Build and save one grouped bar chart of every medium's synthetic means."""
+    import io
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    from labvis.aggregate import condition_table
+    from labvis.bars import grouped_bars
+    from labvis.render import SAVE_OPTIONS
+    from labvis.synthetic import PlateDesign, concentration_labels, synthetic_table
+
+    design = PlateDesign()
+    table = synthetic_table(design, scale)
+    conc = np.repeat(concentration_labels(design, scale), len(design.densities))[:, None]
+    dens = np.tile(np.asarray(design.densities), design.concentrations * scale)[:, None]
+    cells = np.repeat(design.cell_types, len(design.time_points))[None, :]
+    times = np.tile(design.time_points, len(design.cell_types))[None, :]
+    tables = [condition_table(table, 'Synthetic', medium) for medium in design.media]
+    values = np.stack([t.take('mean', conc, dens, cells, times) for t in tables])
+    errors = np.stack([t.take('sem', conc, dens, cells, times) for t in tables])
+
+    def render():
+        fig, ax = plt.subplots(figsize=(14, 6))
+        grouped_bars(ax, values, errors, bar_width=0.1, group_spacing=0.4, sub_spacing=0.1,
+                     edgecolor='black', linewidth=0.5, capsize=3)
+        plt.tight_layout()
+        fig.savefig(io.BytesIO(), format='png', **SAVE_OPTIONS)
+        plt.close(fig)
+
+    return (*measure(render, repeat), values.size)
+
+
+def import_times(args):
+    """
+    Run ``python -X importtime <args>`` and parse its report.
+
+    Returns:
+    list: (depth, module name, cumulative seconds) per import, depth 0 for
+    imports not triggered by another import
+    """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=PROJECT_ROOT,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                          check=True)
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # The name is indented by two spaces per nesting level after one separator
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((depth, name.strip(), int(cumulative) / 1e6))
+    return imports
+
+
+def bench_startup(repeat=5):
+    """
+    Start-up cost of the compute-only entry points in fresh interpreters.
+
+    ``stats`` is timed warm (answered from the cached CSV) and with
+    ``--no-cache`` (NumPy, cached columns and aggregation); the import of the
+    data modules is timed on its own.  matplotlib must not appear in any of
+    them.  Only the warm call has a budget (STARTUP_BUDGET); the others
+    import NumPy and are reported without one.
+
+    Returns:
+    dict: name -> (wall seconds, seconds importing, top import, matplotlib imported,
+    budget in seconds or None)
+    """
+    commands = {
+        'python -m labvis stats Group2 FBS': (['-m', 'labvis', 'stats', 'Group2', 'FBS'],
+                                              STARTUP_BUDGET),
+        'python -m labvis stats --no-cache': (['-m', 'labvis', 'stats', 'Group2', 'FBS',
+                                               '--no-cache'], None),
+        'import aggregate, doubling': (['-c', 'import labvis.aggregate, labvis.doubling'], None),
+    }
+    results = {}
+    for name, (args, budget) in commands.items():
+        def run():
+            subprocess.run([sys.executable, *args], cwd=PROJECT_ROOT, check=True,
+                           stdout=subprocess.DEVNULL)
+        run()  # warm the caches
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        imports = import_times(args)
+        top = {module: seconds for depth, module, seconds in imports if depth == 0}
+        heaviest = max(top, key=top.get)
+        results[name] = (best, sum(top.values()), f'{heaviest} {top[heaviest] * 1000:.1f} ms',
+                         any(module == 'matplotlib' for _, module, _ in imports), budget)
+    return results
+
+
+# --------------------------------------------------
+# Chart checks
+# --------------------------------------------------
+def check_stiffness_ticks():
+    """
+    Every stiffness-ratio tick of the Analysis_Grp3 charts lies inside the
+    x-range, including groups whose bars are all missing (NaN).
+
+    Returns:
+    list: One message per tick outside its chart's x-range
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    from labvis.render import discover_charts
+
+    problems = []
+    for name, build in discover_charts(PROJECT_ROOT).items():
+        if not name.startswith('Analysis_Grp3'):
+            continue
+        fig = build()
+        ax = fig.axes[0]
+        low, high = sorted(ax.get_xlim())
+        for tick, label in zip(ax.get_xticks(), ax.get_xticklabels()):
+            if not low < tick < high:
+                problems.append(f'{name}: tick {label.get_text()!r} at {tick:.2f} '
+                                f'outside x-range ({low:.2f}, {high:.2f})')
+        plt.close(fig)
+    return problems
+
+
+def check_growth_fits():
+    """
+    Unconverged or non-growing fits are masked by ``plausible_fits``, and
+    every growth curve drawn on the Absb_Grp1 chart rises.
+
+    Returns:
+    list: One message per failed check
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    from labvis.growth import fit_growth, plausible_fits
+    from labvis.render import discover_charts
+
+    problems = []
+    hours = np.array([0.0, 24.0, 48.0, 72.0])
+    series = np.array([0.2 / (0.2 + 0.8 * np.exp(-0.1 * hours)),  # logistic growth
+                       0.5 * np.exp(-0.02 * hours)])              # shrinking
+    mask = plausible_fits(fit_growth(hours, series, 'logistic'))
+    if mask.tolist() != [True, False]:
+        problems.append(f'plausible_fits of a growing and a shrinking series: {mask.tolist()}')
+
+    build = discover_charts(PROJECT_ROOT).get('Absb_Grp1')
+    if build is not None:
+        fig = build()
+        for ax in fig.axes:
+            for line in ax.get_lines():
+                y = line.get_ydata()
+                if line.get_linestyle() == ':' and not y[-1] > y[0]:
+                    problems.append(f'Absb_Grp1: {ax.get_title()} has a non-growing fit curve')
+        plt.close(fig)
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m labvis.benchmarks')
+    parser.add_argument('workbook', nargs='?', default=DEFAULT_WORKBOOK)
+    parser.add_argument('--scaling', action='store_true',
+                        help='also run the synthetic-data scaling benchmarks')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--formats', type=int, nargs='+', default=[96, 384, 1536])
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    path = args.workbook
+    problems = check_stiffness_ticks() + check_growth_fits()
+    for problem in problems:
+        print(f'check failed: {problem}')
+    if problems:
+        raise SystemExit(1)
+    results = bench_ingest(path)
+    results.update(bench_cache(path))
+    results.update(bench_doubling())
+    results.update(bench_cube())
+    results.update(bench_growth())
+    results.update(bench_significance())
+    results.update(bench_bootstrap())
+    results.update(bench_store())
+    for name, (seconds, peak) in results.items():
+        print(f'{name:40s} {seconds * 1000:9.1f} ms  {peak / 1e6:8.2f} MB peak')
+    for name, (seconds, held) in bench_records().items():
+        print(f'{name:40s} {seconds * 1000:9.1f} ms  {held / 1e6:8.2f} MB held  (100000 lookups)')
+    for name, (seconds, peak, artists) in bench_bars().items():
+        print(f'{name:40s} {seconds * 1000:9.1f} ms  {peak / 1e6:8.2f} MB peak  '
+              f'{artists:6d} artists')
+    for name, (seconds, artists) in bench_template().items():
+        print(f'{name:40s} {seconds * 1000:9.1f} ms/chart  {artists:8.1f} artists created/chart')
+    for name, (seconds, draws, passes) in bench_layout().items():
+        print(f'{name:40s} {seconds * 1000:9.1f} ms/chart  {draws:4.1f} draws/chart  '
+              f'{passes:4.1f} tight_layout passes/chart')
+    for name, (seconds, files, megabytes) in bench_bulk().items():
+        print(f'{name:40s} {seconds * 1000:9.1f} ms  {files:6.1f} files/s  '
+              f'{megabytes:6.2f} MB/s')
+    for name, (seconds, changed, derived) in bench_incremental().items():
+        print(f'{name:40s} {seconds * 1000:9.1f} ms  {changed:6d} conditions  '
+              f'{derived:6d} derived')
+    for name, (seconds, imports, heaviest, mpl, budget) in bench_startup().items():
+        if budget is None:
+            verdict = 'no budget (imports NumPy)'
+        else:
+            verdict = 'ok' if seconds < budget else 'over budget'
+        print(f'{name:40s} {seconds * 1000:9.1f} ms  imports {imports * 1000:6.1f} ms  '
+              f'(top: {heaviest}){"  matplotlib!" if mpl else ""}  {verdict}')
+    if not args.scaling:
+        return
+    for name, (seconds, peak, items) in bench_scaling(args.scales, args.formats).items():
+        unit = 'bars' if name.startswith('render') else 'readings'
+        print(f'{name:40s} {seconds * 1000:9.1f} ms  {peak / 1e6:8.2f} MB peak  '
+              f'{items:7d} {unit}  ({items / seconds:10.0f}/s)')
+
+
+if __name__ == '__main__':
+    main()
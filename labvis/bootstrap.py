@@ -0,0 +1,130 @@
+"""
+Bootstrap confidence intervals for every condition at once.
+
+With three replicate wells per condition the SEM is a rough uncertainty
+estimate, so the charts can instead show percentile bootstrap intervals of
+the mean.  ``bootstrap_means`` resamples the NaN-padded replicate matrix of
+all conditions in one 3-D operation: a (conditions, resamples, replicates)
+array of indices drawn below each condition's own replicate count, gathered
+and averaged along the last axis.
+
+Resamples are generated in blocks of ``_BLOCK_RESAMPLES``, each with its
+own stream spawned from ``np.random.SeedSequence(seed)``.  The block layout
+depends only on ``n_resamples``, never on how many conditions are passed
+or how the work is split, and the blocks are the same whether they run in
+this process or across a ``ProcessPoolExecutor`` (``jobs``), so a given
+seed gives identical intervals for any number of workers.  Within a block
+the rows are drawn in chunks sized so that one chunk's index array stays
+around ``_BLOCK_VALUES`` elements (a few MB, which keeps the gather in
+cache); consecutive draws from one stream are the same numbers as a
+single draw, so the chunking does not change the result.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+BootstrapCI = namedtuple('BootstrapCI', 'estimate low high')
+
+DEFAULT_RESAMPLES = 10_000
+DEFAULT_CONFIDENCE = 0.95
+
+# Resamples per RNG block, and the largest index array one chunk of rows may draw
+_BLOCK_RESAMPLES = 1000
+_BLOCK_VALUES = 1 << 18
+
+
+def _resample_block(values, n_valid, seed, n_resamples):
+    """Means of ``n_resamples`` resamples of every row of a left-packed matrix."""
+    rng = np.random.default_rng(seed)
+    n, k = values.shape
+    rows = max(_BLOCK_VALUES // max(n_resamples * k, 1), 1)
+    means = np.empty((n, n_resamples))
+    for lo in range(0, n, rows):
+        chunk, valid = values[lo:lo + rows], n_valid[lo:lo + rows]
+        draws = rng.random((len(chunk), n_resamples, k))
+        index = np.minimum((draws * valid[:, None, None]).astype(np.intp), max(k - 1, 0))
+        taken = chunk[np.arange(len(chunk))[:, None, None], index]
+        used = np.arange(k) < valid[:, None, None]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means[lo:lo + rows] = np.where(used, taken, 0.0).sum(axis=-1) / valid[:, None]
+    return means
+
+
+def _resample_blocks(values, n_valid, blocks):
+    return np.concatenate([_resample_block(values, n_valid, seed, size) for seed, size in blocks],
+                          axis=-1)
+
+
+def bootstrap_means(replicates, n_resamples=DEFAULT_RESAMPLES, seed=0, jobs=1):
+    """
+    Bootstrap distribution of the mean of every row of replicate readings.
+
+    Parameters:
+    replicates (array): (..., n_replicates) readings, NaN-padded
+    n_resamples (int): Resamples per row
+    seed (int or sequence of int): Entropy of the SeedSequence the block
+        streams are spawned from
+    jobs (int): Worker processes; 1 resamples in this process, 0 uses every CPU
+
+    Returns:
+    ndarray: (..., n_resamples) resampled means; NaN for rows without readings
+    """
+    replicates = np.asarray(replicates, dtype=float)
+    shape = replicates.shape[:-1]
+    # NaN sorts last, so each row's readings are packed to the left
+    values = np.sort(replicates.reshape(-1, replicates.shape[-1]), axis=-1)
+    n_valid = np.isfinite(values).sum(axis=-1)
+
+    sizes = [min(_BLOCK_RESAMPLES, n_resamples - start)
+             for start in range(0, n_resamples, _BLOCK_RESAMPLES)]
+    blocks = list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+
+    from labvis.render import resolve_jobs
+
+    jobs = min(resolve_jobs(jobs), len(blocks)) or 1
+    if jobs == 1:
+        means = _resample_blocks(values, n_valid, blocks)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Contiguous runs of blocks per worker keep the serial order
+        bounds = np.linspace(0, len(blocks), jobs + 1).astype(int)
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            parts = [pool.submit(_resample_blocks, values, n_valid, blocks[lo:hi])
+                     for lo, hi in zip(bounds[:-1], bounds[1:])]
+            means = np.concatenate([part.result() for part in parts], axis=-1)
+    return means.reshape(shape + (n_resamples,))
+
+
+def percentile_interval(samples, confidence=DEFAULT_CONFIDENCE):
+    """
+    Equal-tailed percentile interval of bootstrap samples along the last axis.
+
+    Returns:
+    tuple: (low, high) arrays
+    """
+    tail = (1.0 - confidence) / 2.0
+    low, high = np.quantile(samples, [tail, 1.0 - tail], axis=-1)
+    return low, high
+
+
+def bootstrap_ci(replicates, confidence=DEFAULT_CONFIDENCE, n_resamples=DEFAULT_RESAMPLES,
+                 seed=0, jobs=1):
+    """
+    Percentile bootstrap confidence interval of the mean of every row.
+
+    Parameters:
+    replicates (array): (..., n_replicates) readings, NaN-padded
+    confidence (float): Coverage of the interval, e.g. 0.95
+    n_resamples, seed, jobs: See ``bootstrap_means``
+
+    Returns:
+    BootstrapCI: sample mean, lower and upper bound per row
+    """
+    replicates = np.asarray(replicates, dtype=float)
+    present = np.isfinite(replicates)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        estimate = np.where(present, replicates, 0.0).sum(axis=-1) / present.sum(axis=-1)
+    low, high = percentile_interval(bootstrap_means(replicates, n_resamples, seed, jobs),
+                                    confidence)
+    return BootstrapCI(estimate, low, high)
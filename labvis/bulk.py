@@ -0,0 +1,141 @@
+"""
+Concurrent ingest of many workbooks into one experiment table.
+
+Production runs produce one workbook per run, shaped like the bundled
+"All biomaterial experiment data.xlsx".  Reading hundreds of them one after
+another leaves the disk idle while a file is inflated and parsed, and the
+parser idle while the next file is read.  ``ingest_workbooks`` overlaps the
+two:
+
+- an asyncio event loop orchestrates the files; each file's bytes are read
+  in a thread (``asyncio.to_thread``), so reads proceed while earlier files
+  are being parsed
+- the zip inflate and XML parse of each file run in a bounded pool of
+  ``jobs`` worker processes (or threads with ``executor='thread'``), fed
+  the bytes that were read
+- a semaphore caps the files that have been read but not yet parsed at
+  ``max_pending``, so a slow pool applies backpressure to the reads and
+  memory stays bounded however many files are queued
+- a file that cannot be read or parsed is recorded with its error and
+  the rest carry on
+
+Plate ids are prefixed with the workbook's file name ('run7.xlsx:Group2!W6')
+so plates of different runs stay distinct in the merged ReadingTable, and
+tables are merged in input order, so the result does not depend on which
+file finished first.  The returned ``Throughput`` gives files/s and MB/s.
+
+Run with ``python -m labvis ingest WORKBOOK...``.
+"""
+import asyncio
+import io
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+EXECUTORS = ('process', 'thread')
+
+FileResult = namedtuple('FileResult', 'path table bytes seconds error')
+Throughput = namedtuple('Throughput', 'files failed megabytes seconds files_per_second '
+                                      'mb_per_second')
+BulkIngest = namedtuple('BulkIngest', 'table files throughput')
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as fh:
+        return fh.read()
+
+
+def parse_workbook_bytes(data, name, sheets=None):
+    """
+    Parse an in-memory .xlsx file, prefixing every plate id with ``name``.
+
+    Returns:
+    ReadingTable: One row per well
+    """
+    from labvis.ingest import ReadingTable, read_workbook
+
+    table = read_workbook(io.BytesIO(data), sheets)
+    columns = dict(table.columns)
+    columns['plate'] = np.char.add(f'{name}:', np.asarray(columns['plate'], dtype=str))
+    return ReadingTable(columns)
+
+
+async def ingest_workbooks_async(paths, jobs=0, max_pending=None, executor='process',
+                                 sheets=None):
+    """
+    Coroutine behind ``ingest_workbooks``; use it from code already running an event loop.
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    from labvis.ingest import ReadingTable
+    from labvis.render import resolve_jobs
+
+    if executor not in EXECUTORS:
+        raise ValueError(f'unknown executor {executor!r}; expected one of {EXECUTORS}')
+    paths = list(paths)
+    jobs = min(resolve_jobs(jobs), max(len(paths), 1))
+    pending = asyncio.Semaphore(max_pending or 2 * jobs)
+    loop = asyncio.get_running_loop()
+    pool_class = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+
+    async def ingest(pool, path):
+        start = time.perf_counter()
+        size = 0
+        async with pending:
+            try:
+                data = await asyncio.to_thread(_read_bytes, path)
+                size = len(data)
+                table = await loop.run_in_executor(pool, parse_workbook_bytes, data,
+                                                   os.path.basename(path), sheets)
+            except Exception as exc:  # noqa: BLE001  (one bad file must not sink the batch)
+                return FileResult(path, None, size, time.perf_counter() - start,
+                                  f'{type(exc).__name__}: {exc}')
+        return FileResult(path, table, size, time.perf_counter() - start, None)
+
+    start = time.perf_counter()
+    with pool_class(max_workers=jobs) as pool:
+        files = await asyncio.gather(*(ingest(pool, path) for path in paths))
+    seconds = time.perf_counter() - start
+
+    table = ReadingTable.concat(f.table for f in files if f.table is not None)
+    megabytes = sum(f.bytes for f in files) / 1e6
+    throughput = Throughput(len(files), sum(f.error is not None for f in files), megabytes,
+                            seconds, len(files) / seconds if seconds else 0.0,
+                            megabytes / seconds if seconds else 0.0)
+    return BulkIngest(table, files, throughput)
+
+
+def ingest_workbooks(paths, jobs=0, max_pending=None, executor='process', sheets=None):
+    """
+    Read many workbooks concurrently and merge their readings into one table.
+
+    Parameters:
+    paths (list): Workbook paths
+    jobs (int): Parser workers; 0 uses every CPU
+    max_pending (int): Files read but not yet parsed at any time; default 2 x jobs
+    executor (str): 'process' (parse in worker processes) or 'thread'
+    sheets (list): Sheet names to read from every workbook; default every plate sheet
+
+    Returns:
+    BulkIngest: merged ReadingTable, a FileResult per path (in input order,
+    with ``error`` set for files that failed) and the Throughput
+    """
+    return asyncio.run(ingest_workbooks_async(paths, jobs, max_pending, executor, sheets))
+
+
+def print_throughput(result, stream=None):
+    """
+    Print per-file failures and the throughput of a bulk ingest.
+    """
+    import sys
+
+    stream = stream or sys.stdout
+    for f in result.files:
+        if f.error is not None:
+            print(f'{f.path}: failed ({f.error})', file=stream)
+    t = result.throughput
+    print(f'{t.files - t.failed} of {t.files} workbooks, {len(result.table)} wells, '
+          f'{t.megabytes:.1f} MB in {t.seconds:.2f} s  '
+          f'({t.files_per_second:.1f} files/s, {t.mb_per_second:.2f} MB/s)', file=stream)
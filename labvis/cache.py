@@ -0,0 +1,221 @@
+"""
+Columnar on-disk cache of parsed workbooks.
+
+Each parsed sheet is stored as one ``.npy`` file per ReadingTable column in
+a ``.labvis_cache`` directory next to the workbook:
+
+    .labvis_cache/
+        index.json                     workbook name -> size, mtime, sha256
+        <sha256>/<sheet>/plate.npy     one file per column
+        <sha256>/<sheet>/value.npy
+        ...
+
+Entries are keyed by the SHA-256 of the workbook contents and the sheet
+name, so editing the workbook (or dropping a different file in under the
+same name) lands on a new key.  The hash is only recomputed when the file's
+size or mtime differ from what the index recorded.  Columns are opened with
+``np.load(mmap_mode='r')``, so a warm load costs a few small reads rather
+than a zip/XML parse.
+
+Small derived results (e.g. the CSV printed by ``python -m labvis stats``)
+can be stored under the same key with ``put_text``.  Computing the key needs
+only the standard library, so NumPy and the ingest code are imported on the
+first column read or write, and a command answered from ``get_text`` never
+loads them.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+
+CACHE_DIR_NAME = '.labvis_cache'
+# Bump when the ingest output for an unchanged workbook changes
+FORMAT_VERSION = 2
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    SHA-256 hex digest of a file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _safe_name(sheet):
+    return re.sub(r'[^\w.-]', '_', sheet)
+
+
+class WorkbookCache:
+    """
+    Cache of the ReadingTables parsed from one workbook.
+
+    Parameters:
+    path (str): Path to the .xlsx file
+    cache_dir (str): Cache directory; defaults to .labvis_cache next to the workbook
+    """
+
+    def __init__(self, path, cache_dir=None):
+        self.path = os.path.abspath(path)
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(self.path), CACHE_DIR_NAME)
+        self._index_path = os.path.join(self.cache_dir, 'index.json')
+        self._digest = None
+
+    # --------------------------------------------------
+    # Keys
+    # --------------------------------------------------
+    def _read_index(self):
+        try:
+            with open(self._index_path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.json')
+        with os.fdopen(fd, 'w') as fh:
+            json.dump(index, fh, indent=1, sort_keys=True)
+        os.replace(tmp, self._index_path)
+
+    def digest(self):
+        """
+        Content key of the workbook; rehashes only if size or mtime changed.
+        """
+        if self._digest is not None:
+            return self._digest
+        stat = os.stat(self.path)
+        name = os.path.basename(self.path)
+        index = self._read_index()
+        entry = index.get(name)
+        if (entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+                and entry['sha256'].endswith(f'-v{FORMAT_VERSION}')):
+            self._digest = entry['sha256']
+            return self._digest
+
+        self._digest = f'{file_digest(self.path)}-v{FORMAT_VERSION}'
+        stale = entry['sha256'] if entry else None
+        index[name] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                       'sha256': self._digest}
+        self._write_index(index)
+        if stale and stale != self._digest and not any(
+                e['sha256'] == stale for e in index.values()):
+            shutil.rmtree(os.path.join(self.cache_dir, stale), ignore_errors=True)
+        return self._digest
+
+    def _entry_dir(self, sheet=None):
+        root = os.path.join(self.cache_dir, self.digest())
+        return root if sheet is None else os.path.join(root, _safe_name(sheet))
+
+    # --------------------------------------------------
+    # Read / write
+    # --------------------------------------------------
+    def get(self, sheet):
+        """
+        Memory-mapped ReadingTable for one sheet, or None on a cache miss.
+        """
+        import numpy as np
+
+        from labvis.ingest import FIELDS, ReadingTable
+        entry = self._entry_dir(sheet)
+        try:
+            columns = {name: np.load(os.path.join(entry, name + '.npy'), mmap_mode='r')
+                       for name in FIELDS}
+        except (OSError, ValueError):
+            return None
+        return ReadingTable(columns)
+
+    def put(self, sheet, table):
+        """
+        Store a sheet's ReadingTable; concurrent writers race harmlessly.
+        """
+        import numpy as np
+
+        from labvis.ingest import FIELDS
+        entry = self._entry_dir(sheet)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=os.path.dirname(entry), prefix='.tmp-')
+        for name in FIELDS:
+            np.save(os.path.join(tmp, name + '.npy'), np.ascontiguousarray(table[name]))
+        try:
+            os.replace(tmp, entry)
+        except OSError:
+            # Another process stored the same sheet first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _sheet_names(self):
+        path = os.path.join(self._entry_dir(), 'sheets.json')
+        try:
+            with open(path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            pass
+        from labvis.ingest import plate_sheets
+        from labvis.xlsx import XlsxReader
+
+        with XlsxReader(self.path) as book:
+            names = plate_sheets(book)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as fh:
+            json.dump(names, fh)
+        return names
+
+    def load(self, sheets=None):
+        """
+        ReadingTable for the given sheets, parsing and storing any that miss.
+
+        Parameters:
+        sheets (list): Sheet names; defaults to every sheet with a plate layout
+
+        Returns:
+        ReadingTable: Rows of all requested sheets, in sheet order
+        """
+        from labvis.ingest import ReadingTable, read_sheet
+        from labvis.xlsx import XlsxReader
+
+        if sheets is None:
+            sheets = self._sheet_names()
+        tables = {sheet: self.get(sheet) for sheet in sheets}
+        missing = [sheet for sheet, table in tables.items() if table is None]
+        if missing:
+            with XlsxReader(self.path) as book:
+                for sheet in missing:
+                    table = read_sheet(book, sheet)
+                    self.put(sheet, table)
+                    tables[sheet] = table
+        return ReadingTable.concat(tables[sheet] for sheet in sheets)
+
+    def _text_path(self, name):
+        return os.path.join(self._entry_dir(), 'derived', _safe_name(name) + '.txt')
+
+    def get_text(self, name):
+        """
+        Derived result ``name`` stored for this workbook version, or None.
+        """
+        try:
+            with open(self._text_path(name), encoding='utf-8') as fh:
+                return fh.read()
+        except OSError:
+            return None
+
+    def put_text(self, name, text):
+        """
+        Store a derived result; it is dropped with the entry when the workbook changes.
+        """
+        path = self._text_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.txt')
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            fh.write(text)
+        os.replace(tmp, path)
+
+    def clear(self):
+        """
+        Remove every cached entry of every workbook in the cache directory.
+        """
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self._digest = None
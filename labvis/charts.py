@@ -0,0 +1,516 @@
+"""
+Declarative chart specs and the renderers that draw them.
+
+The nutrient charts differ only in their data and labels, so each chart
+script just declares a spec and hands it to one of the builders here:
+
+- ``GroupedSpec`` -> ``build_grouped_chart``: Group 2 absorbance (0h vs.
+  48h with SEM error bars) or doubling time, one group of bars per
+  (concentration, seeding density), DM vs. HeLa.  Absorbance specs can set
+  ``significance`` to a multiple-comparison correction ('holm', ...) to
+  mark DM vs. HeLa differences that pass a Welch t-test with brackets, and
+  ``error_bars='ci'`` to replace SEM error bars by bootstrap confidence
+  intervals (doubling charts then get error bars too).
+  ``GroupedChart`` is the same chart as an object whose ``update`` swaps
+  in another ConditionTable without rebuilding the figure.
+- ``StiffnessSpec`` -> ``build_stiffness_chart``: Group 3 cell counts on
+  stiff vs. soft substrates.
+
+Bar positions, tick positions, the concentration label anchors and the
+separator lines depend only on the shape of the grid and the bar geometry,
+so they are computed once per shape by ``grouped_layout`` and shared by every
+spec with the same shape.
+"""
+from collections import namedtuple
+from functools import lru_cache, partial
+
+import numpy as np
+
+from labvis.bars import grouped_bar_x, grouped_bars, significance_brackets
+from labvis.layout import fit_layout
+from labvis.profiling import stage
+
+DENSITIES = (3.9, 2.97, 1.85)
+DENSITY_KEY = ("Density Key:\n"
+               "Density-1: 3.90×10⁴\n"
+               "Density-2: 2.97×10⁴\n"
+               "Density-3: 1.85×10⁴")
+
+# Per-metric styling: what the bars show and how each series is drawn
+METRICS = {
+    'absorbance': {
+        'ylabel': 'Absorbance',
+        'bar_width': 0.1,
+        'legend_ncol': 2,
+        'colors': {
+            ('DM', '0h'):    '#87CEFA',  # Light sky blue
+            ('DM', '48h'):   '#0000CD',  # Medium blue
+            ('HeLa', '0h'):  '#FFA07A',  # Light salmon
+            ('HeLa', '48h'): '#B22222',  # Firebrick
+        },
+    },
+    'doubling': {
+        'ylabel': 'Doubling Time (hrs)',
+        'bar_width': 0.15,
+        'legend_ncol': 1,
+        'colors': {
+            'DM':   '#90EE90',  # Light green
+            'HeLa': '#FFA07A',  # Light salmon
+        },
+    },
+}
+
+GroupedSpec = namedtuple('GroupedSpec', [
+    'name',            # output name, e.g. 'FBS_Grp2'
+    'metric',          # 'absorbance' or 'doubling'
+    'medium',          # 'FBS', 'Glucose' or 'Glutamine'
+    'concentrations',  # e.g. ('2.5mM', '5mM', '10mM', '12.5mM')
+    'group',           # workbook sheet holding the plate reads
+    'densities',       # seeding densities (x10^4), one bar group each
+    'cell_types',
+    'time_points',     # absorbance: one bar per cell type x time point
+    'key_position',    # density key, axes coordinates
+    'legend_anchor',   # legend bbox_to_anchor, axes coordinates
+    'ylim',            # fixed y-range, or None to autoscale
+    'label_y',         # height of the concentration labels; None = 90% of the autoscaled top
+    'group_spacing',
+    'significance',    # correction for DM vs. HeLa brackets (see labvis.significance), or None
+    'error_bars',      # 'sem' or 'ci' (bootstrap interval, see labvis.bootstrap)
+], defaults=('Group2', DENSITIES, ('DM', 'HeLa'), ('0h', '48h'), (0.87, 0.95),
+             (0, 1.15), None, None, 0.4, None, 'sem'))
+
+ERROR_BARS = ('sem', 'ci')
+
+# Bootstrap error bars: interval coverage, resamples and seed; fixed so that
+# every render of a chart draws the same intervals
+CONFIDENCE = 0.95
+BOOTSTRAP_RESAMPLES = 10_000
+BOOTSTRAP_SEED = 0
+
+# Significance brackets: gap above the error bars, rise between stacked
+# brackets and tick length, as fractions of the y-range
+BRACKET_PAD = 0.02
+BRACKET_STEP = 0.07
+BRACKET_TICK = 0.015
+
+StiffnessSpec = namedtuple('StiffnessSpec', [
+    'name',
+    'medium',
+    'counts',            # cell type -> one count per (stiffness, density) group
+    'stiffness_labels',
+    'density_names',
+    'key_position',
+    'bar_width',
+], defaults=(('Stiff (15:1)', 'Soft (40:1)'), ('Density 1', 'Density 2', 'Density 3'),
+             (0.87, 0.8), 0.35))
+
+GroupedLayout = namedtuple('GroupedLayout', 'bar_x centers separators label_x')
+
+# What a chart reads from the workbook: sheet names plus KEY_FIELDS -> allowed
+# values for the conditions it plots, and whether it plots their derived
+# (first -> last time point) values (see labvis.incremental)
+ChartInputs = namedtuple('ChartInputs', 'sheets criteria derived', defaults=(False,))
+
+
+def _frozen(array):
+    array.setflags(write=False)
+    return array
+
+
+@lru_cache(maxsize=None)
+def grouped_layout(n_outer, n_inner, n_series, bar_width, group_spacing):
+    """
+    Geometry of an (outer x inner) grid of bar groups with n_series bars each.
+
+    Returns:
+    GroupedLayout: bar x-positions (n_outer * n_inner, n_series), group centres,
+    x of the separators between outer groups and x of each outer group's label
+    """
+    bar_x = grouped_bar_x((n_outer * n_inner, n_series), bar_width, group_spacing)
+    centers = bar_x.mean(axis=-1)
+    separators = (centers[n_inner - 1:-1:n_inner] + centers[n_inner::n_inner]) / 2
+    half = n_series * bar_width / 2
+    starts = np.concatenate([[centers[0] - half], separators])
+    ends = np.concatenate([separators, [centers[-1] + half]])
+    return GroupedLayout(_frozen(bar_x), _frozen(centers), _frozen(separators),
+                         _frozen((starts + ends) / 2))
+
+
+def _concentration_list(concentrations):
+    return ', '.join(c[:-len('mM')] for c in concentrations) + ' mM'
+
+
+def _condition_grid(spec):
+    """Concentration and density of each bar group, shaped (groups, 1)."""
+    conc = np.repeat(spec.concentrations, len(spec.densities))[:, None]
+    dens = np.tile(np.asarray(spec.densities, dtype=float), len(spec.concentrations))[:, None]
+    return conc, dens
+
+
+def _interval_errors(values, low, high):
+    """Lower and upper error-bar lengths, stacked on a leading axis, of intervals around values."""
+    return np.stack([np.clip(values - low, 0, None), np.clip(high - values, 0, None)])
+
+
+def _grouped_data(spec, conditions):
+    """
+    Bar heights and errors shaped (concentration x density, series).
+
+    Errors are SEMs (absorbance) or none (doubling); with ``error_bars='ci'``
+    they are (2, ...) lower/upper lengths of bootstrap intervals instead.
+    """
+    if spec.error_bars not in ERROR_BARS:
+        raise ValueError(f'unknown error_bars {spec.error_bars!r}; expected one of {ERROR_BARS}')
+    conc, dens = _condition_grid(spec)
+    ci = spec.error_bars == 'ci'
+    if spec.metric == 'doubling':
+        from labvis.doubling import doubling_interval, doubling_times, elapsed_hours, nominal_hours
+
+        cell_type = np.asarray(spec.cell_types)[None, :]
+        start, end = spec.time_points[0], spec.time_points[-1]
+        with stage('derive', quantity='doubling_times'):
+            hours = elapsed_hours(conditions.take('read_at', conc, dens, cell_type, start),
+                                  conditions.take('read_at', conc, dens, cell_type, end),
+                                  nominal_hours(end) - nominal_hours(start))
+            result = doubling_times(conditions.take('mean', conc, dens, cell_type, start),
+                                    conditions.take('mean', conc, dens, cell_type, end),
+                                    hours=hours)
+        if not ci:
+            return result.time, None
+        from labvis.bootstrap import bootstrap_means
+
+        with stage('derive', quantity='bootstrap'):
+            # Separate streams for the two time points' independent plates
+            start_means, end_means = (
+                bootstrap_means(conditions.take('replicates', conc, dens, cell_type, tp),
+                                BOOTSTRAP_RESAMPLES, seed=[BOOTSTRAP_SEED, i])
+                for i, tp in enumerate((start, end)))
+            low, high = doubling_interval(start_means, end_means, hours, CONFIDENCE)
+        return result.time, _interval_errors(result.time, low, high)
+    cell_type = np.repeat(spec.cell_types, len(spec.time_points))[None, :]
+    time_point = np.tile(spec.time_points, len(spec.cell_types))[None, :]
+    means = conditions.take('mean', conc, dens, cell_type, time_point)
+    if not ci:
+        return means, conditions.take('sem', conc, dens, cell_type, time_point)
+    from labvis.bootstrap import bootstrap_ci
+
+    with stage('derive', quantity='bootstrap'):
+        interval = bootstrap_ci(conditions.take('replicates', conc, dens, cell_type, time_point),
+                                CONFIDENCE, BOOTSTRAP_RESAMPLES, BOOTSTRAP_SEED)
+    return means, _interval_errors(means, interval.low, interval.high)
+
+
+def _significance_brackets(ax, spec, conditions, bar_x, tops):
+    """Bracket each time point's DM vs. HeLa bars where the adjusted p < 0.05."""
+    from labvis.significance import (SIGNIFICANCE_LEVELS, adjust_pvalues, significance_labels,
+                                     welch_ttest)
+
+    if spec.metric != 'absorbance' or len(spec.cell_types) != 2:
+        raise ValueError('significance brackets need an absorbance spec with two cell types')
+    conc, dens = _condition_grid(spec)
+    n_times = len(spec.time_points)
+    time_point = np.asarray(spec.time_points)[None, :]
+    with stage('derive', quantity='welch_ttest'):
+        first, second = (conditions.take('replicates', conc, dens, cell_type, time_point)
+                         for cell_type in spec.cell_types)
+        p = adjust_pvalues(welch_ttest(first, second).pvalue, spec.significance)
+    labels = significance_labels(p)
+
+    # Series are (cell type, time point), so time point k pairs bars k and
+    # n_times + k; later time points stack above the earlier brackets they overlap
+    k = np.arange(n_times)
+    low, high = ax.get_ylim()
+    span = high - low
+    spanned = np.array([np.nanmax(tops[:, i:n_times + i + 1], axis=-1) for i in k]).T
+    y = spanned + span * (BRACKET_PAD + BRACKET_TICK + BRACKET_STEP * k)
+    shown = p <= SIGNIFICANCE_LEVELS[-1][0]
+    significance_brackets(ax, bar_x[:, k][shown], bar_x[:, n_times + k][shown], y[shown],
+                          labels[shown].tolist(), tick=span * BRACKET_TICK)
+
+
+class GroupedChart:
+    """
+    Grouped bar chart of one nutrient's Group 2 absorbance or doubling times,
+    built once and then re-pointed at new data with ``update``.
+
+    Everything that depends only on the spec is created in the constructor:
+    the axes, title and tick labels, the concentration label boxes, the
+    density key, the legend patches, the separators and grid, and the
+    margins (``labvis.layout.fit_layout``).  ``update(conditions)`` then
+    changes only what depends on the data: it sets each bar's Rectangle
+    height, moves each error bar's segment and caps, re-autoscales the y-axis
+    when the spec has no fixed ``ylim`` (moving the concentration labels with
+    it) and redraws any significance brackets.  Saving one chart per plate or per run
+    therefore reuses the same few hundred artists instead of creating them
+    again for every figure.
+
+    Parameters:
+    spec (GroupedSpec): The chart
+    conditions (ConditionTable): Data of the first render; defaults to the
+        spec's group and medium in the bundled workbook
+
+    Attributes:
+    figure, ax: The matplotlib Figure and Axes
+    containers (list): One BarContainer per series
+    """
+
+    def __init__(self, spec, conditions=None):
+        import matplotlib.patches as mpatches
+        import matplotlib.pyplot as plt
+
+        self.spec = spec
+        style = METRICS[spec.metric]
+        concentrations = _concentration_list(spec.concentrations)
+        cell_types = ' vs. '.join(spec.cell_types)
+        if spec.metric == 'doubling':
+            series = list(spec.cell_types)
+            series_labels = series
+            title = f"{spec.medium} Doubling Times: {concentrations} ({cell_types})"
+        else:
+            series = [(ct, tp) for ct in spec.cell_types for tp in spec.time_points]
+            series_labels = [f"{ct} {tp}" for ct, tp in series]
+            title = (f"{spec.medium}: {concentrations} "
+                     f"({' vs. '.join(spec.time_points)}, {cell_types})")
+        colors = [style['colors'][s] for s in series]
+        bar_width = style['bar_width']
+
+        with stage('layout', chart=spec.name):
+            self.layout = layout = grouped_layout(len(spec.concentrations), len(spec.densities),
+                                                  len(series), bar_width, spec.group_spacing)
+        if conditions is None:
+            from labvis.aggregate import condition_table
+            from labvis.ingest import load_workbook
+
+            conditions = condition_table(load_workbook(sheets=[spec.group]), spec.group,
+                                         spec.medium)
+        values, errors = _grouped_data(spec, conditions)
+
+        self.figure, ax = fig, ax = plt.subplots(figsize=(14, 6))
+        self.ax = ax
+        bar_kw = {'capsize': 3} if errors is not None else {}
+        _, self.containers = grouped_bars(ax, values, errors, colors=colors, bar_width=bar_width,
+                                          x=layout.bar_x, edgecolor='black', linewidth=0.5,
+                                          **bar_kw)
+
+        ax.set_title(title, fontsize=14)
+        ax.set_xlabel("Cell Seeding Density", fontsize=12)
+        ax.set_ylabel(style['ylabel'], fontsize=12)
+
+        density_labels = [f"Density-{i + 1}" for i in range(len(spec.densities))]
+        ax.set_xticks(layout.centers)
+        ax.set_xticklabels(density_labels * len(spec.concentrations), fontsize=8)
+
+        # Concentration labels above each block of densities
+        self.labels = [
+            ax.text(x, self._label_y(), concentration, ha='center', va='center',
+                    fontweight='bold', fontsize=12,
+                    bbox=dict(facecolor='white', alpha=0.8, edgecolor='black',
+                              boxstyle='round,pad=0.4'))
+            for x, concentration in zip(layout.label_x, spec.concentrations)]
+
+        ax.text(*spec.key_position, DENSITY_KEY, ha='left', va='top', fontsize=9,
+                transform=ax.transAxes,
+                bbox=dict(facecolor='white', alpha=0.8, edgecolor='black',
+                          boxstyle='round,pad=0.5'))
+
+        legend_handles = [mpatches.Patch(color=color, label=label, linewidth=0.5)
+                          for color, label in zip(colors, series_labels)]
+        ax.legend(handles=legend_handles, loc='upper left', ncol=style['legend_ncol'],
+                  bbox_to_anchor=spec.legend_anchor)
+
+        for x_line in layout.separators:
+            ax.axvline(x_line, color='black', linestyle='--', alpha=0.8)
+
+        ax.grid(axis='y', linestyle='--', alpha=0.5)
+        if spec.ylim is not None:
+            ax.set_ylim(*spec.ylim)
+        self._brackets = []
+        self._draw_brackets(conditions, values, errors)
+
+        with stage('layout', chart=spec.name):
+            fit_layout(fig, spec, __file__)
+
+    def _label_y(self):
+        """Height of the concentration labels for the current y-range."""
+        spec = self.spec
+        label_y = spec.label_y if spec.label_y is not None else self.ax.get_ylim()[1] * 0.9
+        if spec.label_y is None and spec.ylim is not None:
+            # Long error bars (e.g. bootstrap intervals) must not push the labels off a fixed range
+            label_y = min(label_y, spec.ylim[1] * 0.9)
+        return label_y
+
+    def _draw_brackets(self, conditions, values, errors):
+        for artist in self._brackets:
+            artist.remove()
+        self._brackets = []
+        if not self.spec.significance:
+            return
+        upper = errors[1] if errors is not None and errors.ndim > values.ndim else errors
+        tops = np.nan_to_num(values) + (np.nan_to_num(upper) if upper is not None else 0.0)
+        n_texts = len(self.ax.texts)
+        n_collections = len(self.ax.collections)
+        _significance_brackets(self.ax, self.spec, conditions, self.layout.bar_x, tops)
+        self._brackets = (list(self.ax.collections[n_collections:])
+                          + list(self.ax.texts[n_texts:]))
+
+    def update(self, conditions):
+        """
+        Show another ConditionTable's data on the existing artists.
+
+        Parameters:
+        conditions (ConditionTable): Data with the spec's concentrations,
+            densities, cell types and time points, e.g. one run's
+            ``condition_table``
+
+        Returns:
+        GroupedChart: self, so ``chart.update(run).figure.savefig(...)`` chains
+        """
+        values, errors = _grouped_data(self.spec, conditions)
+        asymmetric = errors is not None and errors.ndim > values.ndim
+        for s, container in enumerate(self.containers):
+            heights = values[..., s].ravel()
+            for patch, height in zip(container.patches, heights.tolist()):
+                patch.set_height(height)
+            container.datavalues = heights
+            if errors is None:
+                continue
+            # Same segments and caps ax.errorbar builds for the bar tops
+            err = errors[..., s].reshape(2, -1) if asymmetric else errors[..., s].ravel()
+            low, high = heights + np.vstack([-1.0, 1.0]) * err
+            x = self.layout.bar_x[..., s].ravel()
+            _, caplines, (barlines,) = container.errorbar.lines
+            verts = np.ma.empty((len(x), 2, 2))
+            verts[:, 0, 0] = x
+            verts[:, 0, 1] = low
+            verts[:, 1, 0] = x
+            verts[:, 1, 1] = high
+            barlines.set_segments(verts)
+            for capline, ends in zip(caplines, (low, high)):
+                capline.set_ydata(ends)
+        # Autoscale to the new data; a fixed ylim is applied after the label
+        # height is taken from the autoscaled range, as in the constructor
+        self.ax.set_autoscaley_on(True)
+        self.ax.relim()
+        self.ax.autoscale_view(scalex=False)
+        label_y = self._label_y()
+        if self.spec.ylim is not None:
+            self.ax.set_ylim(*self.spec.ylim)
+        for label in self.labels:
+            label.set_y(label_y)
+        self._draw_brackets(conditions, values, errors)
+        return self
+
+
+def build_grouped_chart(spec):
+    """
+    Grouped bar chart of one nutrient's Group 2 absorbance or doubling times.
+
+    Returns:
+    Figure: The finished chart
+    """
+    return GroupedChart(spec).figure
+
+
+def build_stiffness_chart(spec):
+    """
+    DM vs. HeLa cell counts at each density on stiff and soft substrates.
+
+    Returns:
+    Figure: The finished chart
+    """
+    import matplotlib.pyplot as plt
+
+    colors = {
+        'DM': '#87CEFA',    # Light sky blue
+        'HeLa': '#FFA07A',  # Light salmon
+    }
+    n_density = len(spec.density_names)
+    x = np.arange(len(spec.stiffness_labels) * n_density)
+    bar_width = spec.bar_width
+    offsets = (np.arange(len(spec.counts)) - (len(spec.counts) - 1) / 2) * bar_width
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    for offset, (cell_type, counts) in zip(offsets, spec.counts.items()):
+        ax.bar(x + offset, counts, width=bar_width, label=cell_type, color=colors[cell_type])
+
+    ax.set_xticks(x)
+    ax.set_xticklabels(list(spec.density_names) * len(spec.stiffness_labels), fontsize=10)
+
+    ax.set_ylabel('Cell Count', fontsize=12)
+    cell_types = ' and '.join(spec.counts)
+    ax.set_title(f'Cell count for {cell_types} cells in {spec.medium} on two substrate stiffnesses',
+                 fontsize=14)
+
+    # Divider between stiffness groups
+    for i in range(1, len(spec.stiffness_labels)):
+        ax.axvline(x=i * n_density - 0.5, color='black', linestyle='--', alpha=0.6)
+
+    ax.legend(title='Cell Type')
+    ax.grid(axis='y', linestyle='--', alpha=0.4)
+
+    # Stiffness labels on top
+    max_y = ax.get_ylim()[1] * 0.9
+    for i, stiff in enumerate(spec.stiffness_labels):
+        start = x[i * n_density] - bar_width / 2
+        end = x[(i + 1) * n_density - 1] + bar_width / 2
+        ax.text((start + end) / 2, max_y, stiff, ha='center', va='center', fontweight='bold', fontsize=12,
+                bbox=dict(facecolor='white', alpha=0.8, edgecolor='black', boxstyle='round,pad=0.4'))
+
+    density_key = "Density Key:\n" + "\n".join(
+        f"{name}: {d:.2f}×10⁴" for name, d in zip(spec.density_names, DENSITIES))
+    ax.text(*spec.key_position, density_key, ha='left', va='top', fontsize=9, transform=ax.transAxes,
+            bbox=dict(facecolor='white', alpha=0.8, edgecolor='black', boxstyle='round,pad=0.5'))
+
+    with stage('layout', chart=spec.name):
+        fit_layout(fig, spec, __file__)
+    return fig
+
+
+def depends_on(*sheets, **criteria):
+    """
+    Decorator declaring the workbook data a hand-written chart builder reads.
+
+    ``@depends_on('Group1')`` marks a chart that plots every Group 1 condition;
+    keyword arguments narrow it to conditions whose KEY_FIELDS take one of
+    the given values, and ``@depends_on()`` marks one that reads nothing.
+    Builders without a declaration are assumed to read the whole workbook.
+    """
+    def mark(build):
+        build.inputs = ChartInputs(sheets, {field: tuple(values)
+                                            for field, values in criteria.items()})
+        return build
+    return mark
+
+
+def chart_inputs(build):
+    """
+    ChartInputs of a CHARTS builder, or None if it may read anything.
+    """
+    inputs = getattr(build, 'inputs', None)
+    if inputs is None and isinstance(build, partial):
+        inputs = getattr(build.func, 'inputs', None)
+    return inputs
+
+
+def _spec_inputs(spec):
+    if isinstance(spec, StiffnessSpec):
+        return ChartInputs((), {})
+    time_points = spec.time_points
+    if spec.metric == 'doubling':
+        time_points = (time_points[0], time_points[-1])
+    return ChartInputs((spec.group,), {'medium': (spec.medium,),
+                                       'concentration': tuple(spec.concentrations),
+                                       'density': tuple(spec.densities),
+                                       'cell_type': tuple(spec.cell_types),
+                                       'time_point': tuple(time_points)},
+                       derived=spec.metric == 'doubling')
+
+
+def chart_builder(spec):
+    """
+    Zero-argument builder for a spec, for use in a script's CHARTS.
+    """
+    build = build_stiffness_chart if isinstance(spec, StiffnessSpec) else build_grouped_chart
+    builder = partial(build, spec)
+    builder.inputs = _spec_inputs(spec)
+    return builder
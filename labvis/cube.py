@@ -0,0 +1,170 @@
+"""
+Dense N-dimensional arrays with labelled, integer-coded axes.
+
+A ``LabeledArray`` is a float64 ndarray plus, for every dimension, a name
+and a tuple of labels, e.g.
+
+    stiffness  ('10:1', '15:1', '25:1', '35:1', '40:1')
+    nutrient   ('FBS 2.5%', 'Glutamine', 'Glucose')
+    cell_type  ('DM', 'Normal', 'HeLa')
+    density    ('3.9x10^4', '2.37x10^4', '1.85x10^4')
+
+Each label maps to its integer position through a dict built once per axis,
+so selecting by label is an O(1) lookup followed by ordinary NumPy indexing
+and never walks nested dicts or builds key strings.  Combinations that were
+never measured are NaN, which keeps "absent" distinct from a measured zero.
+Reductions skip NaNs and return NaN only where every input was missing.
+"""
+import warnings
+
+import numpy as np
+
+
+class LabeledArray:
+    """
+    ndarray with a name and a label tuple per dimension.
+
+    Parameters:
+    values (array): Data; converted to float64
+    axes (list): (name, labels) pairs, one per dimension, in order
+    """
+
+    def __init__(self, values, axes):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.dims = tuple(name for name, _ in axes)
+        self.labels = {name: tuple(labels) for name, labels in axes}
+        self._codes = {name: {label: i for i, label in enumerate(labels)}
+                       for name, labels in self.labels.items()}
+        expected = tuple(len(self.labels[name]) for name in self.dims)
+        if self.values.shape != expected:
+            raise ValueError(f'values shape {self.values.shape} does not match axes {expected}')
+
+    @classmethod
+    def from_records(cls, records, axes):
+        """
+        Build from (label, label, ..., value) records; unlisted cells are NaN.
+
+        Parameters:
+        records (iterable): Tuples with one label per axis followed by the value
+        axes (list): (name, labels) pairs fixing the axis order and label order
+        """
+        cube = cls(np.full([len(labels) for _, labels in axes], np.nan), axes)
+        for *labels, value in records:
+            cube.values[cube.index(*labels)] = value
+        return cube
+
+    # --------------------------------------------------
+    # Labels
+    # --------------------------------------------------
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def mask(self):
+        """True where a value is present."""
+        return ~np.isnan(self.values)
+
+    def code(self, dim, label):
+        """
+        Integer position of ``label`` along ``dim``.
+        """
+        return self._codes[dim][label]
+
+    def index(self, *labels):
+        """
+        Index tuple for one label per dimension.
+        """
+        return tuple(self._codes[dim][label] for dim, label in zip(self.dims, labels))
+
+    def _axes(self, dims=None):
+        return [(name, self.labels[name]) for name in (dims or self.dims)]
+
+    # --------------------------------------------------
+    # Selection and reshaping
+    # --------------------------------------------------
+    def sel(self, **selection):
+        """
+        Select by label: a single label drops the dimension, a list keeps it.
+
+        Returns:
+        LabeledArray: View-backed where NumPy indexing allows it
+        """
+        index, axes = [], []
+        for name in self.dims:
+            if name not in selection:
+                index.append(slice(None))
+                axes.append((name, self.labels[name]))
+                continue
+            wanted = selection[name]
+            if isinstance(wanted, (list, tuple)):
+                index.append(np.array([self._codes[name][w] for w in wanted], dtype=np.intp))
+                axes.append((name, wanted))
+            else:
+                index.append(self._codes[name][wanted])
+        # Apply list selections one axis at a time so they do not broadcast together
+        values = self.values
+        for axis in reversed(range(len(index))):
+            if isinstance(index[axis], np.ndarray):
+                values = np.take(values, index[axis], axis=axis)
+                index[axis] = slice(None)
+        return LabeledArray(values[tuple(index)], axes)
+
+    def get(self, *labels, default=np.nan):
+        """
+        Value at one label per dimension, or ``default`` if absent or unknown.
+        """
+        try:
+            value = self.values[self.index(*labels)]
+        except KeyError:
+            return default
+        return default if np.isnan(value) else float(value)
+
+    def transpose(self, *dims):
+        """
+        Reorder dimensions by name.
+        """
+        order = [self.dims.index(name) for name in dims]
+        return LabeledArray(self.values.transpose(order), self._axes(dims))
+
+    def filled(self, value=0.0):
+        """
+        Plain ndarray with missing cells replaced by ``value``.
+        """
+        return np.where(self.mask, self.values, value)
+
+    # --------------------------------------------------
+    # Reductions
+    # --------------------------------------------------
+    def reduce(self, func, dim):
+        """
+        Apply a NaN-aware reduction such as ``np.nanmean`` along one named dimension.
+        """
+        axis = self.dims.index(dim)
+        present = self.mask.any(axis=axis)
+        with warnings.catch_warnings():
+            # All-NaN slices warn; they are set to NaN below anyway
+            warnings.simplefilter('ignore', RuntimeWarning)
+            reduced = func(self.values, axis=axis)
+        return LabeledArray(np.where(present, reduced, np.nan),
+                            [a for a in self._axes() if a[0] != dim])
+
+    def sum(self, dim):
+        return self.reduce(np.nansum, dim)
+
+    def mean(self, dim):
+        return self.reduce(np.nanmean, dim)
+
+    def max(self, dim):
+        return self.reduce(np.nanmax, dim)
+
+    def count(self, dim):
+        """
+        Number of present values along ``dim``.
+        """
+        axis = self.dims.index(dim)
+        return LabeledArray(self.mask.sum(axis=axis), [a for a in self._axes() if a[0] != dim])
+
+    def __repr__(self):
+        dims = ', '.join(f'{name}: {len(self.labels[name])}' for name in self.dims)
+        return f'LabeledArray({dims})'
@@ -0,0 +1,188 @@
+"""
+Doubling times and their propagated errors, computed over whole arrays.
+
+For mean readings ``m0`` at the start and ``m1`` after ``hours`` the
+exponential growth rate is ``r = ln(m1 / m0) / hours`` and the doubling time
+is ``ln 2 / r``.  Its standard error follows from first-order propagation of
+the SEMs ``s0`` and ``s1`` of the two means:
+
+    dT/dm0 =  hours * ln 2 / (m0 * ln(m1/m0)**2)
+    dT/dm1 = -hours * ln 2 / (m1 * ln(m1/m0)**2)
+    err    = sqrt((dT/dm0 * s0)**2 + (dT/dm1 * s1)**2)
+           = |T| * sqrt((s0/m0)**2 + (s1/m1)**2) / |ln(m1/m0)|
+
+Non-growth is handled explicitly rather than left to whatever the division
+produces:
+
+- ``m1 < m0``: the culture shrank, ``r < 0`` and the doubling time is
+  negative; its magnitude is the halving time.  These are the negative
+  values (e.g. -448.078 h) on the doubling-time charts.
+- ``m1 == m0``: no net change, the doubling time is ``inf``.
+- ``m1`` slightly above ``m0``: a valid but very long doubling time
+  (e.g. 1829.858 h) whose error is correspondingly large.
+- A non-positive or non-finite mean: no doubling time can be defined and
+  both the time and the error are NaN.
+
+``DoublingTimes.growing`` marks the entries with a finite, positive doubling
+time.
+
+``hours`` is the time between the two reads.  ``elapsed_hours`` takes it
+from the plates' recorded read times where both are known and agree with the
+nominal interval (e.g. 48 h for 0h -> 48h) to within MAX_DRIFT_HOURS, so
+reads that drift by a few hours are timed exactly.  Otherwise it uses the
+nominal interval.  The bundled workbook needs that fallback: its Group1
+blocks are stamped, but the 0h-72h plates were seeded and read on separate
+days, so their stamps are not in time-point order.
+
+``doubling_interval`` turns bootstrap resamples of both means (see
+``labvis.bootstrap``) into a confidence interval of the doubling time via
+the percentile interval of the growth rate.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+LN2 = np.log(2.0)
+
+# Largest difference (h) between measured and nominal read intervals that is
+# still taken as drift rather than as unrelated plates
+MAX_DRIFT_HOURS = 12.0
+
+DoublingTimes = namedtuple('DoublingTimes', 'time error rate growing')
+
+
+def doubling_times(m0, m1, s0=None, s1=None, hours=48.0):
+    """
+    Doubling time and propagated error for every element of the inputs.
+
+    Parameters:
+    m0 (array): Mean reading at the start
+    m1 (array): Mean reading after ``hours``
+    s0, s1 (array): SEMs of m0 and m1; errors are NaN if omitted
+    hours (float or array): Time between the two readings
+
+    Returns:
+    DoublingTimes: time (h), error (h), rate (1/h) and growing mask, broadcast to a common shape
+    """
+    m0 = np.asarray(m0, dtype=float)
+    m1 = np.asarray(m1, dtype=float)
+    hours = np.asarray(hours, dtype=float)
+    valid = np.isfinite(m0) & np.isfinite(m1) & (m0 > 0) & (m1 > 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_ratio = np.where(valid, np.log(np.where(valid, m1 / m0, 1.0)), np.nan)
+        rate = log_ratio / hours
+        time = np.where(log_ratio == 0, np.inf, LN2 / rate)
+
+        if s0 is None or s1 is None:
+            error = np.full_like(time, np.nan)
+        else:
+            rel = np.hypot(np.asarray(s0, dtype=float) / m0,
+                           np.asarray(s1, dtype=float) / m1)
+            error = np.where(log_ratio == 0, np.inf, np.abs(time) * rel / np.abs(log_ratio))
+
+    growing = np.isfinite(time) & (time > 0)
+    return DoublingTimes(time, error, rate, growing)
+
+
+def doubling_interval(m0_samples, m1_samples, hours=48.0, confidence=0.95):
+    """
+    Confidence interval of the doubling time from bootstrap samples of both means.
+
+    The percentile interval of the rate ln(m1 / m0) / hours is mapped through
+    ln 2 / rate.  Where the rate interval contains 0 the doubling time is
+    unbounded and both limits are NaN.
+
+    Parameters:
+    m0_samples, m1_samples (array): (..., n_resamples) resampled means
+    hours (float or array): Time between the readings, broadcast against (...)
+    confidence (float): Coverage of the interval
+
+    Returns:
+    tuple: (low, high) doubling-time limits in hours
+    """
+    from labvis.bootstrap import percentile_interval
+
+    hours = np.asarray(hours, dtype=float)[..., None]
+    rate = doubling_times(m0_samples, m1_samples, hours=hours).rate
+    low, high = percentile_interval(rate, confidence)
+    excludes_zero = (low > 0) | (high < 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (np.where(excludes_zero, LN2 / high, np.nan),
+                np.where(excludes_zero, LN2 / low, np.nan))
+
+
+def nominal_hours(time_point):
+    """
+    Hours of a time point label such as '48h'.
+    """
+    return float(time_point.rstrip('h'))
+
+
+def elapsed_hours(start_read, end_read, nominal, max_drift=MAX_DRIFT_HOURS):
+    """
+    Hours between two plate reads, or ``nominal`` where they cannot be trusted.
+
+    Parameters:
+    start_read, end_read (array): Read times in Unix seconds; NaN if unknown
+    nominal (float or array): Nominal interval in hours
+    max_drift (float): Largest accepted |measured - nominal| in hours
+
+    Returns:
+    ndarray: Interval in hours, broadcast to a common shape
+    """
+    with np.errstate(invalid='ignore'):
+        measured = (np.asarray(end_read, dtype=float) - np.asarray(start_read, dtype=float)) / 3600
+        trusted = np.isfinite(measured) & (np.abs(measured - nominal) <= max_drift)
+    return np.where(trusted, measured, nominal)
+
+
+def table_doubling_times(table, start='0h', end='48h'):
+    """
+    Doubling times of every condition in a ConditionTable read at both time points.
+
+    The interval of each condition comes from its plates' read times via
+    ``elapsed_hours``.
+
+    Parameters:
+    table (ConditionTable): From labvis.aggregate.condition_table
+    start, end (str): Time points to compare
+
+    Returns:
+    tuple: (keys, DoublingTimes, hours): (concentration, density, cell_type)
+    keys and per-key results and intervals
+    """
+    fields = ('concentration', 'density', 'cell_type')
+    rows = table.codes['time_point'] == table.categories['time_point'].encode([start], add=False)[0]
+    labels = [np.asarray(table.categories[f].decode(table.codes[f][rows]), dtype=object)
+              for f in fields]
+    ends = table.rows(*labels, end)
+    found = ends >= 0
+    starts, ends = np.flatnonzero(rows)[found], ends[found]
+    hours = elapsed_hours(table['read_at'][starts], table['read_at'][ends],
+                          nominal_hours(end) - nominal_hours(start))
+    result = doubling_times(table['mean'][starts], table['mean'][ends],
+                            table['sem'][starts], table['sem'][ends], hours)
+    keys = list(zip(*[column[found].tolist() for column in labels]))
+    return keys, result, hours
+
+
+def condition_doubling_times(means, sems, start='0h', end='48h', hours=48.0):
+    """
+    Doubling times of every condition in ``condition_stats`` output.
+
+    Parameters:
+    means, sems (dict): From labvis.aggregate.condition_stats
+    start, end (str): Time points to compare
+    hours (float): Hours between them
+
+    Returns:
+    tuple: (times, errors) dicts keyed like ``means``, e.g. times[('2.5mM', 3.9, 'DM')]
+    """
+    keys = [k for k in means if start in means[k] and end in means[k]]
+    result = doubling_times([means[k][start] for k in keys], [means[k][end] for k in keys],
+                            [sems[k][start] for k in keys], [sems[k][end] for k in keys],
+                            hours)
+    times = dict(zip(keys, result.time.tolist()))
+    errors = dict(zip(keys, result.error.tolist()))
+    return times, errors
@@ -0,0 +1,294 @@
+"""
+Batched growth-curve fitting.
+
+Every kinetic series (e.g. one well read at 0, 24, 48 and 72 h) is fitted
+to one of three models at the same time as every other series:
+
+    exponential  y = N0 exp(r t)                  params (N0, r)
+    logistic     y = K / (1 + exp(-r (t - tm)))   params (K, r, tm)
+    gompertz     y = K exp(-exp(-r (t - tm)))     params (K, r, tm)
+
+The fit is a Levenberg-Marquardt least-squares solve run on all series at
+once: residuals are (n_series, n_points) arrays, the Jacobians are
+(n_series, n_points, n_params) and each iteration solves n_series small
+normal-equation systems with one batched ``np.linalg.solve``.  Damping is
+adapted per series, and series stop updating once they have converged.
+Missing points are NaN and get zero weight.
+
+From the parameters come the growth rate r (1/h), the carrying capacity K
+(the upper asymptote; none for the exponential model) and the lag time: the
+time at which the tangent at the inflection point crosses y = 0, i.e.
+tm - 2/r for the logistic and tm - 1/r for the Gompertz curve.  Standard
+errors come from the covariance s^2 (J^T J)^-1 at the solution, with
+s^2 = SSE / (points - params); they are NaN when there are no degrees of
+freedom left.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from labvis.doubling import elapsed_hours, nominal_hours
+
+GrowthFit = namedtuple('GrowthFit', [
+    'model',
+    'params',       # (n, n_params), see MODELS[model].params
+    'stderr',       # (n, n_params)
+    'rate', 'rate_se',
+    'lag', 'lag_se',
+    'capacity', 'capacity_se',
+    'sse',          # weighted sum of squared residuals
+    'dof',          # points used - parameters
+    'converged',
+])
+
+# Exponents are clipped so that extreme trial steps stay finite
+_EXP_LIMIT = 60.0
+
+
+def _exp(x):
+    return np.exp(np.clip(x, -_EXP_LIMIT, _EXP_LIMIT))
+
+
+# --------------------------------------------------
+# 1) Models: value, Jacobian and starting values
+# --------------------------------------------------
+def _exponential(t, p):
+    n0, r = p[..., :1], p[..., 1:2]
+    growth = _exp(r * t)
+    return n0 * growth, np.stack([growth, n0 * t * growth], axis=-1)
+
+
+def _logistic(t, p):
+    k, r, tm = p[..., :1], p[..., 1:2], p[..., 2:3]
+    u = _exp(-r * (t - tm))
+    s = 1.0 / (1.0 + u)
+    d = k * s * s * u
+    return k * s, np.stack([s, d * (t - tm), -d * r], axis=-1)
+
+
+def _gompertz(t, p):
+    k, r, tm = p[..., :1], p[..., 1:2], p[..., 2:3]
+    u = _exp(-r * (t - tm))
+    e = _exp(-u)
+    d = k * e * u
+    return k * e, np.stack([e, d * (t - tm), -d * r], axis=-1)
+
+
+def _line_fit(t, z, w):
+    """Weighted least-squares slope and intercept of every row of z against t."""
+    sw = w.sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mt = (w * t).sum(axis=-1) / sw
+        mz = (w * z).sum(axis=-1) / sw
+        dt = np.where(w > 0, t - mt[:, None], 0.0)
+        slope = (w * dt * (z - mz[:, None])).sum(axis=-1) / (w * dt * dt).sum(axis=-1)
+    return np.nan_to_num(slope), np.nan_to_num(mz - slope * mt)
+
+
+def _sigmoid_start(t, y, w, linearise):
+    """Starting (K, r, tm) from a straight-line fit of the linearised curve."""
+    span = np.ptp(t, axis=-1)
+    k = 1.2 * np.nanmax(np.where(w > 0, y, np.nan), axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = linearise(np.clip(y / k[:, None], 1e-6, 1 - 1e-6))
+    slope, intercept = _line_fit(t, np.where(w > 0, z, 0.0), w)
+    # A flat or falling series still starts from a (slowly) growing curve
+    r = np.where(slope > 0, slope, 1.0 / np.maximum(span, 1.0))
+    return np.stack([k, r, -intercept / np.where(slope > 0, slope, r)], axis=-1)
+
+
+def _exponential_start(t, y, w):
+    positive = w * (y > 0)
+    slope, intercept = _line_fit(t, np.log(np.where(positive > 0, y, 1.0)), positive)
+    return np.stack([np.exp(intercept), slope], axis=-1)
+
+
+Model = namedtuple('Model', 'params function start lag_offset')
+
+MODELS = {
+    'exponential': Model(('N0', 'r'), _exponential, _exponential_start, None),
+    'logistic': Model(('K', 'r', 'tm'), _logistic,
+                      lambda t, y, w: _sigmoid_start(t, y, w, lambda q: np.log(q / (1 - q))),
+                      2.0),
+    'gompertz': Model(('K', 'r', 'tm'), _gompertz,
+                      lambda t, y, w: _sigmoid_start(t, y, w, lambda q: -np.log(-np.log(q))),
+                      1.0),
+}
+
+
+def growth_curve(model, params, t):
+    """
+    Model values for each parameter row at times ``t``.
+
+    Parameters:
+    model (str): Key of MODELS
+    params (array): (n, n_params) fitted parameters
+    t (array): Times, broadcastable to (n, n_times)
+
+    Returns:
+    ndarray: (n, n_times) curve values
+    """
+    params = np.asarray(params, dtype=float)
+    return MODELS[model].function(np.asarray(t, dtype=float), params)[0]
+
+
+# --------------------------------------------------
+# 2) Batched Levenberg-Marquardt
+# --------------------------------------------------
+def _residuals(model, t, y, w, p):
+    value, jac = model.function(t, p)
+    return np.where(w > 0, y - value, 0.0), jac * w[..., None]
+
+
+def fit_growth(t, y, model='logistic', max_iter=200, tol=1e-10):
+    """
+    Fit one growth model to every row of ``y`` at once.
+
+    Parameters:
+    t (array): Times (h), shape (n_points,) or (n_series, n_points)
+    y (array): Readings, (n_series, n_points); NaN marks a missing point
+    model (str): 'exponential', 'logistic' or 'gompertz'
+    max_iter (int): Levenberg-Marquardt iterations at most
+    tol (float): Stop a series once an accepted step improves its SSE by less
+        than this fraction
+
+    Returns:
+    GrowthFit: Parameters, standard errors and derived quantities per series
+    """
+    spec = MODELS[model]
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    t = np.broadcast_to(np.asarray(t, dtype=float), y.shape)
+    w = np.isfinite(y).astype(float)
+    y = np.where(w > 0, y, 0.0)
+    n, n_params = len(y), len(spec.params)
+    dof = w.sum(axis=-1) - n_params
+    fittable = w.sum(axis=-1) >= n_params
+
+    p = np.where(fittable[:, None], np.nan_to_num(spec.start(t, y, w)), 0.0)
+    resid, jac = _residuals(spec, t, y, w, p)
+    sse = (resid ** 2).sum(axis=-1)
+    damping = np.full(n, 1e-3)
+    active = fittable.copy()
+    converged = ~fittable
+    eye = np.eye(n_params)
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        idx = np.flatnonzero(active)
+        J, r = jac[idx], resid[idx]
+        A = np.einsum('npi,npj->nij', J, J)
+        g = np.einsum('npi,np->ni', J, r)
+        diag = np.einsum('nii->ni', A)
+        # Marquardt scaling plus a floor keeps every system positive definite
+        scale = damping[idx, None] * diag + 1e-12 * (1.0 + diag.max(axis=-1, keepdims=True))
+        step = np.linalg.solve(A + scale[:, :, None] * eye, g[..., None])[..., 0]
+        trial = p[idx] + step
+        trial_resid, trial_jac = _residuals(spec, t[idx], y[idx], w[idx], trial)
+        trial_sse = (trial_resid ** 2).sum(axis=-1)
+        better = np.isfinite(trial_sse) & (trial_sse <= sse[idx])
+
+        gain = sse[idx] - np.where(better, trial_sse, sse[idx])
+        done = better & (gain <= tol * np.maximum(sse[idx], 1e-300))
+        stuck = damping[idx] > 1e12
+        accepted = idx[better]
+        p[accepted] = trial[better]
+        resid[accepted] = trial_resid[better]
+        jac[accepted] = trial_jac[better]
+        sse[accepted] = trial_sse[better]
+        damping[idx] = np.where(better, damping[idx] / 3.0, damping[idx] * 4.0)
+        converged[idx[done | stuck]] = True
+        active[idx[done | stuck]] = False
+    converged &= fittable
+
+    # Covariance s^2 (J^T J)^-1 at the solution
+    A = np.einsum('npi,npj->nij', jac, jac)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        s2 = np.where(dof > 0, sse / np.maximum(dof, 1), np.nan)
+        cov = np.linalg.pinv(A) * s2[:, None, None]
+    cov[~fittable] = np.nan
+    p[~fittable] = np.nan
+    stderr = np.sqrt(np.einsum('nii->ni', cov).clip(min=0))
+    stderr[~np.isfinite(np.einsum('nii->ni', cov))] = np.nan
+
+    rate, rate_se = p[:, 1], stderr[:, 1]
+    if spec.lag_offset is None:
+        nan = np.full(n, np.nan)
+        lag = lag_se = capacity = capacity_se = nan
+    else:
+        capacity, capacity_se = p[:, 0], stderr[:, 0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            lag = p[:, 2] - spec.lag_offset / rate
+            # Gradient of tm - c/r with respect to (K, r, tm)
+            grad = np.stack([np.zeros(n), spec.lag_offset / rate ** 2, np.ones(n)], axis=-1)
+            lag_se = np.sqrt(np.einsum('ni,nij,nj->n', grad, cov, grad).clip(min=0))
+    return GrowthFit(model, p, stderr, rate, rate_se, lag, lag_se, capacity, capacity_se,
+                     sse, dof, converged)
+
+
+def plausible_fits(fit):
+    """
+    Series whose fit can be shown as a growth curve: converged, with a
+    positive growth rate and finite parameters.  Flat or shrinking series
+    often come back unconverged or with r <= 0, and their curves mean nothing.
+
+    Returns:
+    ndarray: bool per series
+    """
+    return fit.converged & (fit.rate > 0) & np.isfinite(fit.params).all(axis=-1)
+
+
+# --------------------------------------------------
+# 3) Series from plate readings
+# --------------------------------------------------
+def kinetic_series(table, time_points, by=('density', 'cell_type', 'well')):
+    """
+    Arrange readings as one row per series and one column per time point.
+
+    Readings that share the ``by`` fields and time point (replicate wells
+    when ``by`` leaves out 'well') are stacked along a replicate axis.
+
+    Parameters:
+    table (ReadingTable): Readings of one group/medium
+    time_points (list): Time point labels in order, e.g. ['0h', '24h', '48h', '72h']
+    by (tuple): Fields identifying a series
+
+    Returns:
+    tuple: (keys, hours, values): the series keys, the (n_series, n_times)
+    hours of each read after the first time point's nominal hour (from the
+    plates' read times where usable, see ``labvis.doubling.elapsed_hours``)
+    and a (n_series, n_replicates, n_times) array of readings, NaN where missing
+    """
+    table = table.where(time_point=list(time_points))
+    codes, uniques = [], []
+    for field in by:
+        labels, code = np.unique(table[field], return_inverse=True)
+        uniques.append(labels)
+        codes.append(code.reshape(-1))
+    series, series_code = np.unique(np.ravel_multi_index(codes, [len(u) for u in uniques])
+                                    if codes else np.zeros(len(table), dtype=int),
+                                    return_inverse=True)
+    series_code = series_code.reshape(-1)
+    time_index = {tp: i for i, tp in enumerate(time_points)}
+    t_code = np.array([time_index[tp] for tp in table['time_point'].tolist()], dtype=int)
+
+    # Rank of each reading among those with the same series and time point
+    cell = series_code * len(time_points) + t_code
+    order = np.argsort(cell, kind='stable')
+    sorted_cell = cell[order]
+    starts = np.flatnonzero(np.r_[True, sorted_cell[1:] != sorted_cell[:-1]])
+    rank = np.empty(len(cell), dtype=int)
+    rank[order] = np.arange(len(cell)) - np.repeat(starts, np.diff(np.r_[starts, len(cell)]))
+
+    shape = (len(series), rank.max() + 1 if len(rank) else 0, len(time_points))
+    values = np.full(shape, np.nan)
+    values[series_code, rank, t_code] = table['value']
+    read_at = np.full(shape, np.nan)
+    read_at[series_code, rank, t_code] = table['read_at']
+    key_codes = np.unravel_index(series, [len(u) for u in uniques])
+    keys = list(zip(*[u[c].tolist() for u, c in zip(uniques, key_codes)]))
+
+    nominal = np.array([nominal_hours(tp) for tp in time_points])
+    # Replicates of a series share their plate's read time; fmax skips NaN
+    read_at = np.fmax.reduce(read_at, axis=1) if shape[1] else np.full(shape[::2], np.nan)
+    hours = nominal[0] + elapsed_hours(read_at[:, :1], read_at, nominal - nominal[0])
+    return keys, hours, values
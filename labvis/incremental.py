@@ -0,0 +1,424 @@
+"""
+Incremental rebuilds: redo only the work an edit to the workbook touched.
+
+``render-all`` keys each PNG on the whole workbook, so changing one well
+re-renders every chart.  ``IncrementalBuild`` instead treats the pipeline as
+a dependency graph and gives every node a fingerprint of its inputs:
+
+    ingest     one per sheet      CRC-32 and size of the sheet's zip member
+                                  and of the shared strings (XlsxReader.fingerprint)
+    aggregate  one per condition  hash of its replicate readings and read times
+    derive     one per condition  hash of its first and last time point's
+               and cell type      aggregate fingerprints -> doubling time,
+                                  propagated error and fold change
+    render     one per chart      chart script and labvis source, plus a hash
+                                  of the nodes it plots (labvis.charts.ChartInputs):
+                                  the derive nodes of its conditions for
+                                  doubling-time charts, their aggregate
+                                  fingerprints for every other chart
+
+``update`` walks the graph top-down and stops wherever a fingerprint matches
+the one recorded by the previous run.  A sheet whose zip entry is unchanged
+is never parsed.  In a changed sheet every condition is re-hashed (one
+vectorised pass), but only conditions whose readings differ are re-derived,
+and only charts that plot one of them are rebuilt.  Editing one plate of a
+1,000-plate sheet therefore costs one sheet parse plus one or two charts,
+not a full rebuild.
+
+Fingerprints and derived values are kept in ``.labvis-graph.json`` next to
+the charts, together with the size and mtime of each PNG written, so a
+deleted or overwritten PNG is rendered again.  Every chart the update leaves
+up to date is also recorded in ``render-all``'s manifest
+(``labvis.manifest``), so a following ``render-all`` skips them.  Charts that fail to render
+lose their record and are retried on the next update.
+
+Run with ``python -m labvis update``.
+"""
+import hashlib
+import json
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from labvis import DEFAULT_WORKBOOK, PROJECT_ROOT
+from labvis.ingest import KEY_FIELDS
+from labvis.profiling import stage
+
+GRAPH_NAME = '.labvis-graph.json'
+# Bump when the meaning of a recorded fingerprint or derived value changes
+GRAPH_VERSION = 2
+
+# Values of each derive node (a condition minus its time point), first to last time point
+DERIVED_FIELDS = ('hours', 'doubling_time', 'doubling_error', 'fold_change')
+
+SheetSummary = namedtuple('SheetSummary', 'keys fingerprints n mean sem read_at')
+UpdateReport = namedtuple('UpdateReport', [
+    'sheets',       # sheets parsed by this update
+    'conditions',   # (changed, total) conditions of the parsed sheets
+    'derived',      # (re-derived, total) derive nodes of the parsed sheets
+    'rendered',     # labvis.render.Rendered of every chart rebuilt
+    'current',      # names of the charts left as they were
+    'seconds',
+])
+
+
+def _hash(*parts):
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+    return digest.hexdigest()
+
+
+def condition_name(key):
+    """
+    JSON key of a condition: its KEY_FIELDS values joined by '|'.
+    """
+    return '|'.join(str(value) for value in key)
+
+
+def sheet_fingerprints(path):
+    """
+    Sheet name -> change token of every plate sheet of a workbook ({} if it is missing).
+    """
+    from labvis.ingest import plate_sheets
+    from labvis.xlsx import XlsxReader
+
+    if not os.path.exists(path):
+        return {}
+    with XlsxReader(path) as book:
+        return {sheet: book.fingerprint(sheet) for sheet in plate_sheets(book)}
+
+
+def summarise_sheet(table):
+    """
+    Fingerprint, n, mean, SEM and read time of every condition in a ReadingTable.
+
+    Each condition's fingerprint hashes its readings and plate read times in
+    table order, so it changes exactly when one of its wells does.  The
+    statistics match ``ReplicateStore.aggregate``.
+
+    Returns:
+    SheetSummary: keys (KEY_FIELDS tuples) plus one entry per condition in each field
+    """
+    from labvis.replicates import _encode_keys
+
+    codes, keys = _encode_keys([np.asarray(table[name]) for name in KEY_FIELDS], len(table))
+    order = np.argsort(codes, kind='stable')
+    values = np.ascontiguousarray(np.asarray(table['value'], dtype=np.float64)[order])
+    read_at = np.ascontiguousarray(np.asarray(table['read_at'], dtype=np.float64)[order])
+    bounds = np.searchsorted(codes[order], np.arange(len(keys) + 1))
+    fingerprints = [_hash(values[lo:hi].tobytes(), read_at[lo:hi].tobytes())
+                    for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist())]
+
+    n = np.diff(bounds)
+    sorted_codes = codes[order]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.bincount(sorted_codes, weights=values, minlength=len(keys)) / n
+        squares = np.bincount(sorted_codes, weights=(values - mean[sorted_codes]) ** 2,
+                              minlength=len(keys))
+        sd = np.where(n > 1, np.sqrt(squares / (n - 1)), 0.0)
+        sem = sd / np.sqrt(n)
+        when = np.bincount(sorted_codes, weights=read_at, minlength=len(keys)) / n
+    return SheetSummary(keys, fingerprints, n, mean, sem, when)
+
+
+def derive_pairs(summary):
+    """
+    First and last time point of every (group, medium, concentration, density, cell type).
+
+    Returns:
+    dict: Pair name -> (start index, end index) into ``summary``
+    """
+    from labvis.doubling import nominal_hours
+
+    by_condition = {}
+    for i, key in enumerate(summary.keys):
+        by_condition.setdefault(key[:-1], []).append(i)
+    pairs = {}
+    for key, rows in by_condition.items():
+        rows = sorted(rows, key=lambda i: nominal_hours(summary.keys[i][-1]))
+        if len(rows) > 1:
+            pairs[condition_name(key)] = (rows[0], rows[-1])
+    return pairs
+
+
+def derive_values(summary, start, end):
+    """
+    DERIVED_FIELDS of the given start/end condition rows, one array each.
+    """
+    from labvis.doubling import doubling_times, elapsed_hours, nominal_hours
+
+    nominal = np.array([nominal_hours(summary.keys[j][-1]) - nominal_hours(summary.keys[i][-1])
+                        for i, j in zip(start, end)], dtype=float)
+    hours = elapsed_hours(summary.read_at[start], summary.read_at[end], nominal)
+    result = doubling_times(summary.mean[start], summary.mean[end],
+                            summary.sem[start], summary.sem[end], hours=hours)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fold = summary.mean[end] / summary.mean[start]
+    return hours, result.time, result.error, fold
+
+
+def _matches(key, criteria):
+    return all(key[KEY_FIELDS.index(field)] in values for field, values in criteria.items())
+
+
+class IncrementalBuild:
+    """
+    Dependency graph from one workbook to the charts rendered from it.
+
+    Parameters:
+    output_dir (str): Directory the PNGs and ``.labvis-graph.json`` are written to
+    workbook (str): Workbook to fingerprint and parse.  Chart builders load
+        DEFAULT_WORKBOOK themselves, so any other workbook is only accepted
+        when ``root`` holds no chart scripts (the graph then stops at the
+        derive nodes)
+    root (str): Directory holding the chart scripts
+
+    Raises ValueError if ``root`` has charts and ``workbook`` is not DEFAULT_WORKBOOK.
+    """
+
+    def __init__(self, output_dir=None, workbook=DEFAULT_WORKBOOK, root=PROJECT_ROOT):
+        from labvis.render import DEFAULT_OUTPUT, discover_charts
+
+        self.output_dir = output_dir or DEFAULT_OUTPUT
+        self.workbook = os.path.abspath(workbook)
+        self.root = root
+        self.path = os.path.join(self.output_dir, GRAPH_NAME)
+        self.sources = {}
+        self.charts = discover_charts(root, self.sources)
+        if self.charts and self.workbook != os.path.abspath(DEFAULT_WORKBOOK):
+            raise ValueError(f'the charts in {root} read {DEFAULT_WORKBOOK}, '
+                             f'not {self.workbook}')
+        self.state = self._load()
+
+    # --------------------------------------------------
+    # Persisted fingerprints
+    # --------------------------------------------------
+    def _empty(self):
+        return {'version': GRAPH_VERSION, 'workbook': self.workbook,
+                'sheets': {}, 'conditions': {}, 'derived': {}, 'charts': {}}
+
+    def _load(self):
+        try:
+            with open(self.path) as fh:
+                state = json.load(fh)
+        except (OSError, ValueError):
+            return self._empty()
+        if state.get('version') != GRAPH_VERSION or state.get('workbook') != self.workbook:
+            return self._empty()
+        return state
+
+    def save(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Not mkstemp (files 0600): like the render manifest, the graph gets the
+        # umask's mode, and the pid keeps concurrent updates' temporary files apart
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(self.state, fh, separators=(',', ':'))
+        os.replace(tmp, self.path)
+
+    def derived(self, sheet):
+        """
+        Derived values of one sheet as recorded by the last update.
+
+        Returns:
+        dict: Pair name (condition_name without the time point) -> {DERIVED_FIELDS: value}
+        """
+        return {name: dict(zip(DERIVED_FIELDS, entry[1:]))
+                for name, entry in self.state['derived'].get(sheet, {}).items()}
+
+    # --------------------------------------------------
+    # Nodes
+    # --------------------------------------------------
+    def _chart_sheets(self, name, sheets):
+        from labvis.charts import chart_inputs
+
+        inputs = chart_inputs(self.charts[name])
+        return sorted(sheets) if inputs is None else list(inputs.sheets)
+
+    def _code_key(self, name, shared):
+        from labvis.manifest import chart_key
+
+        return chart_key(name, self.sources[name], shared)
+
+    def _is_current(self, name, entry):
+        try:
+            stat = os.stat(os.path.join(self.output_dir, name + '.png'))
+        except OSError:
+            return False
+        return entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+
+    def _aggregate(self, sheet, summary):
+        """Record a parsed sheet's condition fingerprints; return how many changed."""
+        old = self.state['conditions'].get(sheet, {})
+        new = {condition_name(key): fp for key, fp in zip(summary.keys, summary.fingerprints)}
+        self.state['conditions'][sheet] = new
+        return sum(old.get(name) != fp for name, fp in new.items()) + len(set(old) - set(new))
+
+    def _derive(self, sheet, summary):
+        """Recompute the derive nodes of a parsed sheet whose inputs changed; return how many."""
+        old = self.state['derived'].get(sheet, {})
+        pairs = derive_pairs(summary)
+        entries, stale = {}, []
+        for name, (i, j) in pairs.items():
+            fp = _hash(summary.fingerprints[i], summary.fingerprints[j])
+            if name in old and old[name][0] == fp:
+                entries[name] = old[name]
+            else:
+                entries[name] = [fp]
+                stale.append(name)
+        if stale:
+            start, end = (np.array([pairs[name][k] for name in stale]) for k in (0, 1))
+            columns = derive_values(summary, start, end)
+            for row, name in enumerate(stale):
+                entries[name].extend(float(column[row]) for column in columns)
+        self.state['derived'][sheet] = entries
+        return len(stale)
+
+    def _data_key(self, name, sheet, summary):
+        """
+        Hash of the nodes of ``sheet`` chart ``name`` plots: the recorded derive
+        nodes (fingerprint and values) of its pairs if it plots derived
+        values, else the aggregate fingerprints of its conditions.
+        """
+        from labvis.charts import chart_inputs
+
+        inputs = chart_inputs(self.charts[name])
+        criteria = inputs.criteria if inputs is not None else {}
+        if summary is None:
+            return _hash(sheet)
+        if inputs is not None and inputs.derived:
+            derived = self.state['derived'].get(sheet, {})
+            criteria = {field: values for field, values in criteria.items()
+                        if field != 'time_point'}
+            return _hash(sheet, 'derived', *(
+                f'{pair}={json.dumps(derived[pair])}'
+                for pair, (i, _) in derive_pairs(summary).items()
+                if _matches(summary.keys[i], criteria)))
+        return _hash(sheet, *(f'{condition_name(key)}={fp}'
+                              for key, fp in zip(summary.keys, summary.fingerprints)
+                              if _matches(key, criteria)))
+
+    def _record_renders(self, entries):
+        """
+        Record every chart this graph holds up to date in ``render-all``'s
+        manifest, so ``render-all`` does not redraw what ``update`` just drew.
+        """
+        if self.workbook != os.path.abspath(DEFAULT_WORKBOOK):
+            return
+        from labvis.manifest import RenderManifest, chart_key, inputs_digest
+        from labvis.render import SAVE_OPTIONS
+
+        manifest = RenderManifest(self.output_dir)
+        shared = inputs_digest(SAVE_OPTIONS)
+        for name, entry in entries.items():
+            if name in self.charts and self._is_current(name, entry):
+                manifest.record(name, chart_key(name, self.sources[name], shared),
+                                os.path.join(self.output_dir, name + '.png'))
+        manifest.save()
+
+    # --------------------------------------------------
+    # Update
+    # --------------------------------------------------
+    def update(self, force=False):
+        """
+        Bring every node up to date and re-render the charts whose inputs changed.
+
+        Parameters:
+        force (bool): Re-render every chart, as if none had been written
+
+        Returns:
+        UpdateReport: What was parsed, re-derived and rendered
+        """
+        from labvis.cache import WorkbookCache
+        from labvis.manifest import inputs_digest
+        from labvis.render import SAVE_OPTIONS, render_chart, use_headless_backend
+
+        started = time.perf_counter()
+        use_headless_backend()
+        shared = inputs_digest(SAVE_OPTIONS, workbook=None)
+
+        # Ingest: sheets whose zip entry changed, plus any a chart has no record for
+        with stage('ingest', node='fingerprint'):
+            tokens = sheet_fingerprints(self.workbook)
+        recorded = self.state['sheets']
+        changed = {s for s in set(tokens) | set(recorded) if tokens.get(s) != recorded.get(s)}
+        known = sorted(set(tokens) | set(recorded))
+        entries = self.state['charts']
+        for name in self.charts:
+            data = entries.get(name, {}).get('data', {})
+            changed.update(s for s in self._chart_sheets(name, known) if s not in data)
+        parse = sorted(s for s in changed if s in tokens)
+
+        summaries = {}
+        n_changed = n_conditions = n_derived = n_pairs = 0
+        if parse:
+            cache = WorkbookCache(self.workbook)
+            for sheet in parse:
+                table = cache.load([sheet])
+                with stage('aggregate', sheet=sheet, node='fingerprint'):
+                    summaries[sheet] = summary = summarise_sheet(table)
+                    n_changed += self._aggregate(sheet, summary)
+                    n_conditions += len(summary.keys)
+                with stage('derive', sheet=sheet):
+                    n_derived += self._derive(sheet, summary)
+                    n_pairs += len(self.state['derived'][sheet])
+        for sheet in changed - set(tokens):
+            for part in ('conditions', 'derived'):
+                self.state[part].pop(sheet, None)
+        self.state['sheets'] = tokens
+
+        # Render: charts whose code, plotted conditions or PNG changed
+        stale = []
+        for name in self.charts:
+            entry = entries.get(name)
+            code = self._code_key(name, shared)
+            data = dict(entry['data']) if entry else {}
+            for sheet in self._chart_sheets(name, known):
+                if sheet in changed:
+                    data[sheet] = self._data_key(name, sheet, summaries.get(sheet))
+            if (force or entry is None or entry['code'] != code or entry['data'] != data
+                    or not self._is_current(name, entry)):
+                stale.append((name, code, data))
+                entries.pop(name, None)
+
+        rendered = []
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            for name, code, data in stale:
+                result = render_chart(name, self.charts[name], self.output_dir)
+                stat = os.stat(result.path)
+                entries[name] = {'code': code, 'data': data,
+                                 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+                rendered.append(result)
+        finally:
+            self.save()
+            self._record_renders(entries)
+        rebuilt = {name for name, _, _ in stale}
+        current = [name for name in self.charts if name not in rebuilt]
+        return UpdateReport(parse, (n_changed, n_conditions), (n_derived, n_pairs), rendered,
+                            current, time.perf_counter() - started)
+
+
+def print_update(report, stream=None):
+    """
+    Print which nodes an update recomputed and the charts it rendered.
+    """
+    import sys
+
+    from labvis.render import print_report
+
+    stream = stream or sys.stdout
+    changed, conditions = report.conditions
+    derived, pairs = report.derived
+    print(f'ingest     {", ".join(report.sheets) or "no sheets changed"}', file=stream)
+    print(f'aggregate  {changed} of {conditions} conditions changed', file=stream)
+    print(f'derive     {derived} of {pairs} doubling times / fold changes recomputed', file=stream)
+    print(f'render     {len(report.rendered)} charts, {len(report.current)} up to date',
+          file=stream)
+    if report.rendered:
+        print_report(report.rendered, report.seconds, stream)
+    else:
+        print(f'done in {report.seconds:.2f} s', file=stream)
@@ -0,0 +1,373 @@
+"""
+Plate-reader ingest for "All biomaterial experiment data.xlsx".
+
+The workbook holds raw 96-well reads laid out as A-H x 1-12 blocks: a header
+row with the plate column numbers 1..12, the row letters A..H in the column
+to its left, a label row above the numbers naming which cell type occupies
+which triplicate of columns ('DM', 'HeLa', 'Normal', 'PBS', 'Medium'), and
+a section header such as "0 hour incubation", "48 hour" or
+"0-hour for 2.5mM & 5mM" a row or two above that.  Which plate row holds
+which nutrient concentration and seeding density is a property of the plate
+map used for the experiment, described here by a layout per sheet.  Some
+blocks also carry the plate reader's timestamp next to their header (e.g.
+"29/01/2025 16:41:04+00:00"); it is kept per reading as ``read_at`` in Unix
+seconds, NaN where the block has none.
+
+Sheets are streamed row by row through ``labvis.xlsx.XlsxReader``; blocks
+are assembled as their rows go past and turned into one reading per well.
+"""
+import re
+from collections import deque, namedtuple
+from datetime import datetime, timezone
+
+import numpy as np
+
+from labvis import DEFAULT_WORKBOOK  # noqa: F401  (re-exported)
+from labvis.profiling import stage
+from labvis.xlsx import XlsxReader, column_letters
+
+# --------------------------------------------------
+# 1) Defaults for the bundled workbook
+# --------------------------------------------------
+# DEFAULT_WORKBOOK is defined in labvis/__init__.py so it can be named
+# without importing NumPy
+PLATE_ROWS = 'ABCDEFGH'
+PLATE_COLUMNS = 12
+# A label names a triplicate of columns; later columns need a label of their own
+LABEL_SPAN = 3
+
+# Plate maps: plate row -> (index into the block's concentrations, density x10^4)
+GROUP1_LAYOUT = {
+    'B': (0, 5.0), 'C': (0, 3.9), 'D': (0, 3.04),
+    'E': (0, 2.37), 'F': (0, 1.85), 'G': (0, 1.5),
+}
+GROUP2_LAYOUT = {
+    'B': (0, 3.9), 'C': (0, 2.97), 'D': (0, 1.85),
+    'E': (1, 3.9), 'F': (1, 2.97), 'G': (1, 1.85),
+}
+LAYOUTS = {'Group1': GROUP1_LAYOUT, 'Group2': GROUP2_LAYOUT}
+
+# Blocks whose header does not name the concentrations (the glutamine plates
+# only say "0 hour"/"48 hour") or names the wrong ones (the FBS 10/12.5 mM
+# plates are headed "for 15mM & 25mM").  Keyed by the cell of well A1.
+BLOCK_CONCENTRATIONS = {
+    ('Group2', 'W6'):   ('0.5mM', '2mM'),
+    ('Group2', 'AK6'):  ('5mM', '8mM'),
+    ('Group2', 'W18'):  ('0.5mM', '2mM'),
+    ('Group2', 'AK18'): ('5mM', '8mM'),
+    ('Group2', 'AL55'): ('10mM', '12.5mM'),
+    ('Group2', 'AL66'): ('10mM', '12.5mM'),
+}
+
+MEDIA = ('FBS', 'Glucose', 'Glutamine')
+CELL_TYPES = {'dm': 'DM', 'hela': 'HeLa', 'normal': 'Normal',
+              'pbs': 'PBS', 'medium': 'Medium'}
+
+_HOURS = re.compile(r'(\d+)\s*-?\s*hours?\b', re.IGNORECASE)
+_CONCENTRATION = re.compile(r'(\d+(?:\.\d+)?)\s*mM')
+_READ_TIME = re.compile(r'\b(\d{1,2}/\d{1,2}/\d{4} \d{1,2}:\d{2}:\d{2})\s*([+-]\d{2}:?\d{2})?')
+_MEDIUM = re.compile(r'\b(' + '|'.join(MEDIA) + r')\b', re.IGNORECASE)
+
+# --------------------------------------------------
+# 2) Typed reading table
+# --------------------------------------------------
+KEY_FIELDS = ('group', 'medium', 'concentration', 'density', 'cell_type', 'time_point')
+FIELDS = ('plate',) + KEY_FIELDS + ('well', 'value', 'read_at')
+FLOAT_FIELDS = ('density', 'value', 'read_at')
+
+Reading = namedtuple('Reading', FIELDS)
+
+
+class ReadingTable:
+    """
+    Column-oriented table of single-well readings.
+
+    String columns are fixed-width NumPy unicode arrays and ``density``/
+    ``value`` are float64, so the table can be filtered with boolean masks
+    and written out column by column.  Rows are keyed by ``KEY_FIELDS``:
+    (group, medium, concentration, density, cell_type, time_point); the
+    replicate wells of a condition share a key.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    @classmethod
+    def from_records(cls, records):
+        records = list(records)
+        columns = {}
+        for i, name in enumerate(FIELDS):
+            values = [r[i] for r in records]
+            if name in FLOAT_FIELDS:
+                columns[name] = np.array(values, dtype=np.float64)
+            else:
+                columns[name] = np.array(values, dtype=str)
+        return cls(columns)
+
+    @classmethod
+    def concat(cls, tables):
+        tables = list(tables)
+        if not tables:
+            return cls.from_records([])
+        if len(tables) == 1:
+            return tables[0]
+        return cls({name: np.concatenate([t.columns[name] for t in tables])
+                    for name in FIELDS})
+
+    def __len__(self):
+        return len(self.columns['value'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __iter__(self):
+        return self.records()
+
+    def records(self):
+        cols = [self.columns[name] for name in FIELDS]
+        for row in zip(*cols):
+            yield Reading(*(v.item() for v in row))
+
+    def keys(self):
+        """
+        Yield the condition key of every row, in row order.
+        """
+        cols = [self.columns[name] for name in KEY_FIELDS]
+        for row in zip(*cols):
+            yield tuple(v.item() for v in row)
+
+    def where(self, **criteria):
+        """
+        Return the rows matching every ``field=value`` criterion.
+
+        A criterion value may also be a list/tuple/set of accepted values.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for name, wanted in criteria.items():
+            column = self.columns[name]
+            if isinstance(wanted, (list, tuple, set, frozenset)):
+                mask &= np.isin(column, list(wanted))
+            else:
+                mask &= column == wanted
+        return ReadingTable({name: col[mask] for name, col in self.columns.items()})
+
+
+# --------------------------------------------------
+# 3) Block detection
+# --------------------------------------------------
+class _Block:
+    """A 96-well block whose A-H rows are still being read."""
+
+    def __init__(self, sheet, header_row, first_col, labels, header, medium, read_at):
+        self.sheet = sheet
+        self.header_row = header_row
+        self.first_col = first_col
+        self.labels = labels
+        self.header = header
+        self.medium = medium
+        self.read_at = read_at
+        self.wells = {}
+        self.next_letter = 0
+
+    @property
+    def anchor(self):
+        # Cell holding well A1
+        return f'{column_letters(self.first_col)}{self.header_row + 1}'
+
+    def feed(self, row_number, cells):
+        """Consume a row; return False once the block is complete."""
+        if row_number <= self.header_row:
+            return True
+        letter = str(cells.get(self.first_col - 1, '')).strip().upper()
+        if letter != PLATE_ROWS[self.next_letter]:
+            return False
+        for plate_col in range(1, PLATE_COLUMNS + 1):
+            value = cells.get(self.first_col + plate_col - 1)
+            if isinstance(value, float):
+                self.wells[(letter, plate_col)] = value
+        self.next_letter += 1
+        return self.next_letter < len(PLATE_ROWS)
+
+
+def _header_run(cells):
+    """Columns where a 1..12 plate-column header run starts."""
+    starts = []
+    for col, value in cells.items():
+        if value != 1.0 or isinstance(value, bool):
+            continue
+        if all(cells.get(col + k) == float(k + 1) for k in range(1, PLATE_COLUMNS)):
+            starts.append(col)
+    return starts
+
+
+def _cell_type_labels(cells, first_col):
+    """Map plate column -> cell type from the label row above a header run."""
+    starts = []
+    for plate_col in range(1, PLATE_COLUMNS + 1):
+        text = cells.get(first_col + plate_col - 1)
+        if isinstance(text, str) and text.strip():
+            name = text.strip().lower()
+            if name.endswith(' cells'):
+                name = name[:-len(' cells')]
+            starts.append((plate_col, CELL_TYPES.get(name, text.strip())))
+    labels = {}
+    for i, (plate_col, name) in enumerate(starts):
+        stop = starts[i + 1][0] if i + 1 < len(starts) else PLATE_COLUMNS + 1
+        for c in range(plate_col, min(stop, plate_col + LABEL_SPAN)):
+            labels[c] = name
+    return labels
+
+
+def _section_header(recent, first_col):
+    """Nearest "N hour" header at or left of the block, in the rows above it."""
+    best = None
+    for _, cells in recent:
+        for col, text in cells.items():
+            if (isinstance(text, str) and col <= first_col
+                    and _HOURS.search(text) and (best is None or col >= best[0])):
+                best = (col, text)
+    return best[1] if best else ''
+
+
+def parse_read_time(text):
+    """
+    Unix seconds of a plate-reader timestamp such as '29/01/2025 16:41:04+00:00'.
+
+    Dates are day first; timestamps without an offset are taken as UTC.
+    Returns NaN if ``text`` holds no timestamp.
+    """
+    match = _READ_TIME.search(text)
+    if not match:
+        return float('nan')
+    stamp = datetime.strptime(match.group(1), '%d/%m/%Y %H:%M:%S')
+    offset = (match.group(2) or '+00:00').replace(':', '')
+    if offset == '+0000':
+        return stamp.replace(tzinfo=timezone.utc).timestamp()
+    stamp = datetime.strptime(f'{match.group(1)} {offset}', '%d/%m/%Y %H:%M:%S %z')
+    return stamp.timestamp()
+
+
+def _read_time(recent, first_col):
+    """Timestamp above the block, within its columns, in the nearest row that has one."""
+    for _, cells in reversed(recent):
+        for col, text in cells.items():
+            if (isinstance(text, str) and first_col <= col < first_col + PLATE_COLUMNS
+                    and _READ_TIME.search(text)):
+                return parse_read_time(text)
+    return float('nan')
+
+
+def _block_readings(block, layout):
+    hours = _HOURS.search(block.header)
+    time_point = f'{int(hours.group(1))}h' if hours else ''
+    concentrations = BLOCK_CONCENTRATIONS.get((block.sheet, block.anchor))
+    if concentrations is None:
+        concentrations = tuple(f'{c}mM' for c in _CONCENTRATION.findall(block.header))
+    plate = f'{block.sheet}!{block.anchor}'
+    for (letter, plate_col), value in sorted(block.wells.items()):
+        if letter not in layout or plate_col not in block.labels:
+            continue
+        slot, density = layout[letter]
+        concentration = concentrations[slot] if slot < len(concentrations) else ''
+        yield Reading(plate, block.sheet, block.medium, concentration, density,
+                      block.labels[plate_col], time_point, f'{letter}{plate_col}', value,
+                      block.read_at)
+
+
+def iter_sheet_readings(book, sheet, layout=None):
+    """
+    Stream the readings of every 96-well block on one sheet.
+
+    Parameters:
+    book (XlsxReader): Open workbook
+    sheet (str): Sheet name
+    layout (dict): Plate row -> (concentration slot, density); defaults to LAYOUTS[sheet]
+
+    Returns:
+    generator: Reading tuples, one per labelled well of each block
+    """
+    layout = layout if layout is not None else LAYOUTS[sheet]
+    recent = deque(maxlen=3)
+    labels_by_col = {}
+    open_blocks = []
+    medium = ''
+    for row_number, cells in book.iter_rows(sheet):
+        still_open = []
+        for block in open_blocks:
+            if block.feed(row_number, cells):
+                still_open.append(block)
+            else:
+                yield from _block_readings(block, layout)
+        open_blocks = still_open
+
+        for first_col in _header_run(cells):
+            above = recent[-1][1] if recent and recent[-1][0] == row_number - 1 else {}
+            labels = _cell_type_labels(above, first_col) or labels_by_col.get(first_col, {})
+            labels_by_col[first_col] = labels
+            header = _section_header(recent, first_col)
+            open_blocks.append(_Block(sheet, row_number, first_col, labels, header, medium,
+                                      _read_time(recent, first_col)))
+
+        for text in cells.values():
+            if isinstance(text, str):
+                match = _MEDIUM.search(text)
+                if match:
+                    medium = next(m for m in MEDIA if m.lower() == match.group(1).lower())
+        recent.append((row_number, cells))
+
+    for block in open_blocks:
+        yield from _block_readings(block, layout)
+
+
+def read_sheet(book, sheet):
+    """
+    Read the plate blocks of one sheet of an open workbook into a ReadingTable.
+    """
+    return ReadingTable.from_records(iter_sheet_readings(book, sheet))
+
+
+def plate_sheets(book):
+    """
+    Names of the sheets of ``book`` that have a plate layout.
+    """
+    return [s for s in book.sheet_names if s in LAYOUTS]
+
+
+def read_workbook(path=DEFAULT_WORKBOOK, sheets=None):
+    """
+    Parse every plate block of a workbook, bypassing the on-disk cache.
+
+    Parameters:
+    path (str): Path to the .xlsx file
+    sheets (list): Sheet names to read; defaults to the sheets in LAYOUTS
+
+    Returns:
+    ReadingTable: One row per well
+    """
+    with XlsxReader(path) as book:
+        if sheets is None:
+            sheets = plate_sheets(book)
+        return ReadingTable.concat([read_sheet(book, sheet) for sheet in sheets])
+
+
+def load_workbook(path=DEFAULT_WORKBOOK, sheets=None, use_cache=True):
+    """
+    Read every plate block of a workbook into a ReadingTable.
+
+    Parsed sheets are kept in a columnar cache next to the workbook (see
+    ``labvis.cache``), so only the first load after the file changes pays
+    for the XML parse.
+
+    Parameters:
+    path (str): Path to the .xlsx file
+    sheets (list): Sheet names to read; defaults to the sheets in LAYOUTS
+    use_cache (bool): Set to False to always parse the workbook
+
+    Returns:
+    ReadingTable: One row per well
+    """
+    with stage('ingest', sheets=list(sheets or LAYOUTS), cached=use_cache):
+        if not use_cache:
+            return read_workbook(path, sheets)
+        from labvis.cache import WorkbookCache
+        return WorkbookCache(path).load(sheets)
@@ -0,0 +1,266 @@
+"""
+Cached figure layout: margins and save bounding boxes measured once per chart shape.
+
+Every chart used to lay itself out with ``tight_layout()`` and then be saved
+with ``bbox_inches='tight'``.  Both measure the extent of every piece of
+text: ``tight_layout`` in a layout pass of its own, and the tight bounding
+box in a full extra draw of the figure before the one that produces the
+PNG.  So each chart was measured twice and drawn twice per save.
+
+Yet the result depends only on the chart's shape: its figure size, its
+text (title, tick labels, legend entries, density key...) and where that
+text sits relative to the axes.  ``fit_layout`` and ``save_figure`` key
+the outcome on exactly that:
+
+- ``fit_layout(fig, key, source)`` replaces ``tight_layout()``.  On the first
+  render of a shape it runs ``tight_layout`` and stores the resulting
+  subplot parameters; afterwards it applies them with ``subplots_adjust``.
+- ``save_figure(fig, target, **options)`` replaces ``savefig``.  With
+  ``bbox_inches='tight'`` the first save measures the padded tight box as
+  usual and stores it (per dpi); later saves pass the stored box, so
+  ``savefig`` draws the figure once.
+
+The key combines the caller's ``key`` (e.g. the chart's spec), the contents
+of the ``source`` file that builds the chart, the matplotlib version, the
+figure size and a signature of the figure's text taken without drawing: the
+string, font size and rotation of every Text artist and every tick label,
+the axis offset strings, the position of texts placed in axes or figure
+coordinates, and the position of texts placed in data coordinates as a
+fraction of the axes; plus the rcParams that style text or figures
+(``_STYLE_PREFIXES``).  Bars and lines moving inside the axes do not
+change the margins, so charts whose text stays put share a layout, and
+anything that could move the margins is a new key.
+
+Entries persist in ``.labvis_cache/layout.json`` in the project root, so
+``render-all`` and its worker processes measure each shape once, not once
+per process.  The stored boxes are the exact values ``savefig`` measured,
+so a cached save writes the same PNG bytes as a measured one.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+from labvis import PROJECT_ROOT
+from labvis.cache import CACHE_DIR_NAME
+
+DEFAULT_PATH = os.path.join(PROJECT_ROOT, CACHE_DIR_NAME, 'layout.json')
+# Bump when the stored entries change meaning
+LAYOUT_VERSION = 3
+
+_SUBPLOT_PARAMS = ('left', 'bottom', 'right', 'top', 'wspace', 'hspace')
+# rcParams groups that can change text extents, figure size or the saved box
+_STYLE_PREFIXES = ('font.', 'text.', 'mathtext.', 'axes.', 'xtick.', 'ytick.', 'legend.',
+                   'figure.', 'savefig.', 'lines.', 'patch.')
+
+
+class LayoutCache:
+    """
+    Layout key -> subplot parameters and tight boxes, kept in a JSON file.
+
+    Parameters:
+    path (str): JSON file; None keeps the entries in memory only
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._entries = None
+
+    @property
+    def entries(self):
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    def _read(self):
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path) as fh:
+                entries = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        return entries if entries.pop('version', None) == LAYOUT_VERSION else {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, value):
+        """
+        Store an entry; entries written meanwhile by other processes are kept.
+        """
+        self.entries[key] = value
+        if self.path is None:
+            return
+        merged = self._read()
+        merged.update(self.entries)
+        self._entries = merged
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.json')
+        with os.fdopen(fd, 'w') as fh:
+            json.dump(dict(merged, version=LAYOUT_VERSION), fh)
+        os.replace(tmp, self.path)
+
+
+_active = None
+
+
+def active_cache():
+    """
+    LayoutCache used by fit_layout and save_figure, or None if caching is off.
+    """
+    global _active
+    if _active is None:
+        _active = LayoutCache()
+    return _active or None
+
+
+def use_cache(cache):
+    """
+    Make ``cache`` the active LayoutCache; pass False to always measure.
+
+    Returns:
+    The previously active cache (None if none was created yet)
+    """
+    global _active
+    previous, _active = _active, cache
+    return previous
+
+
+_source_digests = {}
+
+
+def _source_digest(path):
+    stat = os.stat(path)
+    token = (stat.st_size, stat.st_mtime_ns)
+    cached = _source_digests.get(path)
+    if cached is None or cached[0] != token:
+        with open(path, 'rb') as fh:
+            cached = _source_digests[path] = (token, hashlib.sha256(fh.read()).hexdigest())
+    return cached[1]
+
+
+def _round(values):
+    return [round(float(v), 6) for v in values]
+
+
+def text_signature(fig):
+    """
+    Everything about a figure's text that can move its margins, computed without drawing.
+
+    Returns:
+    list: JSON-able description of the figure size, tick labels and Text artists
+    """
+    from matplotlib.text import Text
+
+    signature = [_round(fig.get_size_inches())]
+    texts = set()
+    for ax in fig.axes:
+        signature.append(_round(ax.get_position(original=True).bounds))
+        for axis in (ax.xaxis, ax.yaxis):
+            labels = axis.get_majorticklabels()
+            texts.update(labels)
+            signature.append([label.get_text() for label in labels])
+            signature.append(axis.major.formatter.get_offset())
+    for text in fig.findobj(Text):
+        if not text.get_visible() or not text.get_text() or text in texts:
+            continue
+        entry = [text.get_text(), text.get_fontsize(), text.get_rotation()]
+        ax = text.axes
+        transform = text.get_transform()
+        if ax is not None and transform == ax.transData:
+            # Even a text anchored inside the view can reach past the axes,
+            # so its position (as a fraction of the axes) is part of the key
+            entry.append(_round(ax.transLimits.transform(text.get_position())))
+        elif transform in (fig.transFigure, fig.transSubfigure) or (
+                ax is not None and transform == ax.transAxes):
+            entry.append(_round(text.get_position()))
+        # Other texts (titles, legend entries) are placed by their owner at draw time
+        signature.append(entry)
+    return signature
+
+
+def _style():
+    import matplotlib
+
+    return sorted((name, str(value)) for name, value in matplotlib.rcParams.items()
+                  if name.startswith(_STYLE_PREFIXES))
+
+
+def _key(fig, key, source, *extra):
+    import matplotlib
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(key), _source_digest(source), matplotlib.__version__,
+                              _style(), text_signature(fig), *extra], default=str).encode())
+    return digest.hexdigest()
+
+
+def fit_layout(fig, key, source, **tight_kw):
+    """
+    ``fig.tight_layout(**tight_kw)``, or the subplot parameters it gave last time.
+
+    Parameters:
+    fig (Figure): Figure whose artists are all in place
+    key: Identity of the chart shape, e.g. its spec or name (only its str() is used)
+    source (str): Path of the file that builds the chart
+    **tight_kw: Passed to tight_layout (pad, rect, ...)
+    """
+    cache = active_cache()
+    fig._labvis_layout = (key, source)
+    if cache is None:
+        fig.tight_layout(**tight_kw)
+        return
+    layout_key = 'subplots-' + _key(fig, key, source, tight_kw)
+    params = cache.get(layout_key)
+    if params is not None:
+        fig.subplots_adjust(**dict(zip(_SUBPLOT_PARAMS, params)))
+        return
+    fig.tight_layout(**tight_kw)
+    cache.put(layout_key, [getattr(fig.subplotpars, name) for name in _SUBPLOT_PARAMS])
+
+
+def _capture_tightbbox(fig, found):
+    """Record the boxes savefig's tight-bbox pass measures on ``fig``; undo with ``del``."""
+    measure = fig.get_tightbbox
+
+    def capture(*args, **kwargs):
+        bbox = measure(*args, **kwargs)
+        found.append(bbox)
+        return bbox
+
+    fig.get_tightbbox = capture
+
+
+def save_figure(fig, target, **options):
+    """
+    ``fig.savefig(target, **options)``, reusing the tight box of an identical layout.
+
+    Figures laid out with ``fit_layout`` and saved with ``bbox_inches='tight'``
+    are measured on their first save only; other saves are passed through.
+    """
+    import matplotlib
+
+    cache = active_cache()
+    layout = getattr(fig, '_labvis_layout', None)
+    if cache is None or layout is None or options.get('bbox_inches') != 'tight':
+        fig.savefig(target, **options)
+        return
+    dpi = options.get('dpi', matplotlib.rcParams['savefig.dpi'])
+    pad = options.get('pad_inches', matplotlib.rcParams['savefig.pad_inches'])
+    layout_key = 'bbox-' + _key(fig, *layout, dpi, pad,
+                                [getattr(fig.subplotpars, name) for name in _SUBPLOT_PARAMS])
+    extents = cache.get(layout_key)
+    if extents is not None:
+        from matplotlib.transforms import Bbox
+
+        fig.savefig(target, **dict(options, bbox_inches=Bbox.from_extents(*extents)))
+        return
+    found = []
+    _capture_tightbbox(fig, found)
+    try:
+        fig.savefig(target, **options)
+    finally:
+        del fig.get_tightbbox
+    if len(found) == 1:
+        cache.put(layout_key, list(found[0].padded(pad).extents))
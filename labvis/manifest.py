@@ -0,0 +1,109 @@
+"""
+Content-addressed record of which rendered charts are up to date.
+
+A chart's key is the SHA-256 of everything its PNG depends on:
+
+- the source of the script that defines the chart,
+- the source of the ``labvis`` package (ingest, aggregation, bar layout...),
+- the content digest of the workbook the data is read from,
+- the savefig options and the matplotlib version.
+
+``render-all`` keeps a ``.render-manifest.json`` next to the PNGs mapping
+chart name -> key plus the size and mtime of the file it wrote.  A chart
+whose key is unchanged and whose PNG is still the one that was written is
+skipped without building the figure or calling ``savefig``.
+"""
+import glob
+import hashlib
+import json
+import os
+
+from labvis import DEFAULT_WORKBOOK
+from labvis.cache import WorkbookCache
+
+MANIFEST_NAME = '.render-manifest.json'
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _update_with_file(digest, path):
+    digest.update(os.path.basename(path).encode())
+    with open(path, 'rb') as fh:
+        digest.update(fh.read())
+
+
+def inputs_digest(save_options, workbook=DEFAULT_WORKBOOK):
+    """
+    Digest of the inputs shared by every chart: package source, workbook
+    contents, savefig options and matplotlib version.  Pass ``workbook=None``
+    to leave the workbook out (see ``labvis.incremental``).
+    """
+    import matplotlib
+
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(PACKAGE_DIR, '*.py'))):
+        _update_with_file(digest, path)
+    workbook_key = (WorkbookCache(workbook).digest()
+                    if workbook and os.path.exists(workbook) else None)
+    digest.update(json.dumps({'workbook': workbook_key,
+                              'save': save_options,
+                              'matplotlib': matplotlib.__version__},
+                             sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def chart_key(name, source, shared_digest):
+    """
+    Key of one chart: its name, the source of the script that defines it
+    and the shared inputs digest.
+    """
+    digest = hashlib.sha256()
+    digest.update(name.encode())
+    digest.update(shared_digest.encode())
+    _update_with_file(digest, source)
+    return digest.hexdigest()
+
+
+class RenderManifest:
+    """
+    Chart name -> key of the inputs its PNG in ``output_dir`` was rendered from.
+
+    Parameters:
+    output_dir (str): Directory holding the rendered charts
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        try:
+            with open(self.path) as fh:
+                self.entries = json.load(fh)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def is_current(self, name, key, output):
+        """
+        True if ``output`` was rendered from ``key`` and has not changed since.
+        """
+        entry = self.entries.get(name)
+        if not entry or entry['key'] != key:
+            return False
+        try:
+            stat = os.stat(output)
+        except OSError:
+            return False
+        return entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+
+    def record(self, name, key, output):
+        stat = os.stat(output)
+        self.entries[name] = {'key': key, 'file': os.path.basename(output),
+                              'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def save(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        # A plain file (not mkstemp, which creates it 0600) gets the umask's
+        # mode, like the PNGs beside it; the pid keeps concurrent runs on one
+        # output directory from sharing a temporary file
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(self.entries, fh, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
@@ -0,0 +1,123 @@
+"""
+Per-stage timing of the chart pipeline, written out as a Chrome trace.
+
+The pipeline marks its stages with ``stage(name)``:
+
+    ingest     load_workbook (cache lookup or XML parse)
+    aggregate  replicate wells -> per-condition mean/SD/SEM
+    derive     values computed from the aggregates (doubling times)
+    layout     bar geometry and tight_layout
+    build      the chart builder as a whole (artist creation)
+    draw       Agg rendering of the figure (once per savefig pass)
+    encode     savefig: tight bbox, rendering and PNG encoding
+    write      writing the PNG bytes to disk
+
+Stages nest, e.g. ingest runs inside build and draw inside encode.  When no
+profiler is active ``stage`` is a no-op, so the markers cost one global
+lookup.  ``render-all --profile trace.json`` activates one for the run and
+also records peak traced memory and the artist count of every figure; load
+the file in chrome://tracing or https://ui.perfetto.dev.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+STAGES = ('ingest', 'aggregate', 'derive', 'layout', 'build', 'draw', 'encode', 'write')
+
+_active = None
+
+
+class Profiler:
+    """
+    Collects stage spans and per-figure statistics for one run.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.figures = {}
+
+    @contextmanager
+    def stage(self, name, **args):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            self.events.append({'name': name, 'cat': 'labvis', 'ph': 'X',
+                                'ts': start / 1000, 'dur': (end - start) / 1000,
+                                'pid': os.getpid(), 'tid': threading.get_ident(),
+                                'args': args})
+
+    def record_figure(self, chart, artists, peak_bytes):
+        self.figures[chart] = {'artists': artists, 'peak_bytes': peak_bytes}
+
+    def merge(self, events, figures):
+        """
+        Add the spans and figure statistics collected by another process.
+        """
+        self.events.extend(events)
+        self.figures.update(figures)
+
+    def totals(self):
+        """
+        Inclusive seconds per stage name, summed over every span.
+        """
+        totals = {}
+        for event in self.events:
+            totals[event['name']] = totals.get(event['name'], 0.0) + event['dur'] / 1e6
+        return totals
+
+    def chrome_trace(self):
+        """
+        The spans as a Chrome trace-event document, timestamps relative to the first span.
+        """
+        origin = min((e['ts'] for e in self.events), default=0)
+        events = [dict(e, ts=e['ts'] - origin) for e in sorted(self.events, key=lambda e: e['ts'])]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'figures': self.figures}}
+
+    def write(self, path):
+        import json
+
+        with open(path, 'w') as fh:
+            json.dump(self.chrome_trace(), fh)
+
+    def print_summary(self, stream=None):
+        totals = self.totals()
+        for name in STAGES + tuple(sorted(set(totals) - set(STAGES))):
+            if name in totals:
+                print(f'{name:10s} {totals[name] * 1000:10.1f} ms', file=stream)
+        for chart, stats in self.figures.items():
+            print(f'{chart:24s} {stats["artists"]:6d} artists  '
+                  f'{stats["peak_bytes"] / 1e6:8.2f} MB peak', file=stream)
+
+
+def active():
+    """
+    The profiler collecting spans, or None.
+    """
+    return _active
+
+
+def stage(name, **args):
+    """
+    Context manager timing one pipeline stage if a profiler is active.
+    """
+    if _active is None:
+        return nullcontext()
+    return _active.stage(name, **args)
+
+
+@contextmanager
+def profiling(profiler=None):
+    """
+    Make ``profiler`` (a new one by default) the active profiler for the block.
+    """
+    global _active
+    previous = _active
+    _active = profiler if profiler is not None else Profiler()
+    try:
+        yield _active
+    finally:
+        _active = previous
@@ -0,0 +1,205 @@
+"""
+Compact per-condition records with integer-coded categorical keys.
+
+The chart code used to look values up in dicts such as
+
+    means[('2.5mM', 3.9, 'DM')]['0h']
+
+which hashes a (str, float, str) tuple and then a string per lookup and
+keeps a dict object per condition.  A ``ConditionTable`` stores the same
+information as parallel NumPy columns instead: one small-integer code column
+per key field (concentration, density, cell type, time point), each backed
+by a ``Categorical`` that interns the labels, and one float64 column per
+statistic (mean, SEM, ...).  A value column may also be 2-D, one row per
+condition, e.g. the NaN-padded replicate readings.
+
+Rows are kept sorted by a single int64 key combining the codes.  Lookups
+binary-search each field's labels for their codes, combine them and
+binary-search the key column, so a whole grid of lookups is a handful of
+vectorised operations.  ``from_nested``/``to_nested``
+convert from and to the old dict layout.
+"""
+import numpy as np
+
+CONDITION_FIELDS = ('concentration', 'density', 'cell_type', 'time_point')
+
+
+class Categorical:
+    """
+    Interned labels of one key field; label <-> small integer code.
+    """
+
+    def __init__(self, labels=()):
+        self.labels = []
+        self._codes = {}
+        self._sorted = None
+        for label in labels:
+            self.code(label)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def code(self, label):
+        """
+        Code of ``label``, interning it if unseen.
+        """
+        code = self._codes.get(label)
+        if code is None:
+            code = self._codes[label] = len(self.labels)
+            self.labels.append(label)
+            self._sorted = None
+        return code
+
+    def encode(self, labels, add=True):
+        """
+        Codes of many labels at once; unknown labels are -1 unless ``add``.
+
+        Returns:
+        ndarray: int32 codes
+        """
+        labels = np.asarray(labels)
+        if add:
+            uniques, inverse = np.unique(labels, return_inverse=True)
+            lookup = np.array([self.code(u.item()) for u in uniques], dtype=np.int32)
+            return lookup[inverse.reshape(labels.shape)]
+        if not self.labels:
+            return np.full(labels.shape, -1, dtype=np.int32)
+        # Binary search in the sorted labels: O(n log k) for k distinct labels
+        if self._sorted is None:
+            order = np.argsort(np.asarray(self.labels), kind='stable')
+            self._sorted = (np.asarray(self.labels)[order], order.astype(np.int32))
+        sorted_labels, sorted_codes = self._sorted
+        pos = np.minimum(np.searchsorted(sorted_labels, labels), len(sorted_labels) - 1)
+        return np.where(sorted_labels[pos] == labels, sorted_codes[pos], -1).astype(np.int32)
+
+    def decode(self, codes):
+        """
+        Labels of an array of codes, as a list.
+        """
+        return [self.labels[c] for c in np.asarray(codes).tolist()]
+
+
+class ConditionTable:
+    """
+    Column store of per-condition statistics keyed by categorical codes.
+
+    Parameters:
+    codes (dict): field -> int32 code column, for every CONDITION_FIELDS field
+    categories (dict): field -> Categorical the codes refer to
+    values (dict): statistic name -> float64 column, e.g. 'mean', 'sem', or
+        (rows, k) array, e.g. 'replicates'
+    """
+
+    def __init__(self, codes, categories, values):
+        self.categories = categories
+        self._radix = [max(len(categories[f]), 1) for f in CONDITION_FIELDS]
+        keys = self._combine([np.asarray(codes[f], dtype=np.int32) for f in CONDITION_FIELDS])
+        # Rows are kept in key order so lookups are a binary search on _keys
+        order = np.argsort(keys, kind='stable')
+        self._keys = keys[order]
+        self.codes = {f: np.asarray(codes[f], dtype=np.int32)[order] for f in CONDITION_FIELDS}
+        self.values = {name: np.asarray(col, dtype=np.float64)[order]
+                       for name, col in values.items()}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def _combine(self, codes):
+        key = np.zeros(np.broadcast(*codes).shape, dtype=np.int64)
+        for code, radix in zip(codes, self._radix):
+            key = key * radix + code
+        return key
+
+    @classmethod
+    def from_columns(cls, labels, values):
+        """
+        Build from label columns (field -> sequence of labels) and value columns.
+        """
+        categories = {f: Categorical() for f in CONDITION_FIELDS}
+        codes = {f: categories[f].encode(labels[f]) for f in CONDITION_FIELDS}
+        return cls(codes, categories, values)
+
+    @classmethod
+    def from_nested(cls, *dicts, names=('mean', 'sem')):
+        """
+        Convert dicts shaped like ``means[(concentration, density, cell_type)][time_point]``.
+
+        Parameters:
+        *dicts: One nested dict per statistic, all with the same keys
+        names (tuple): Statistic name of each dict
+
+        Returns:
+        ConditionTable: One row per (concentration, density, cell_type, time_point)
+        """
+        first = dicts[0]
+        rows = [(key, tp) for key, by_time in first.items() for tp in by_time]
+        labels = {
+            'concentration': [key[0] for key, _ in rows],
+            'density': [key[1] for key, _ in rows],
+            'cell_type': [key[2] for key, _ in rows],
+            'time_point': [tp for _, tp in rows],
+        }
+        values = {name: [d[key][tp] for key, tp in rows] for name, d in zip(names, dicts)}
+        return cls.from_columns(labels, values)
+
+    def to_nested(self, name):
+        """
+        The old dict layout for one statistic.
+        """
+        labels = [self.categories[f].decode(self.codes[f]) for f in CONDITION_FIELDS]
+        nested = {}
+        for conc, dens, ct, tp, value in zip(*labels, self.values[name].tolist()):
+            nested.setdefault((conc, dens, ct), {})[tp] = value
+        return nested
+
+    def rows(self, concentration, density, cell_type, time_point):
+        """
+        Row numbers of the given conditions; arguments broadcast against each other.
+
+        Each argument is a label or an array/list of labels.  Conditions that
+        are not in the table give -1.
+
+        Returns:
+        ndarray: int64 row numbers with the broadcast shape of the arguments
+        """
+        wanted = (concentration, density, cell_type, time_point)
+        codes = [self.categories[f].encode(np.asarray(w), add=False)
+                 for f, w in zip(CONDITION_FIELDS, wanted)]
+        shape = np.broadcast(*codes).shape
+        if not len(self):
+            return np.full(shape, -1, dtype=np.int64)
+        missing = np.zeros(shape, dtype=bool)
+        for code in codes:
+            missing |= code < 0
+        keys = self._combine(codes)
+        pos = np.minimum(np.searchsorted(self._keys, keys), len(self) - 1)
+        return np.where(~missing & (self._keys[pos] == keys), pos, -1)
+
+    def take(self, name, concentration, density, cell_type, time_point):
+        """
+        Values of statistic ``name`` for the given (broadcast) conditions; NaN if absent.
+
+        A 2-D column adds its second axis after the broadcast shape.
+        """
+        rows = self.rows(concentration, density, cell_type, time_point)
+        column = self.values[name]
+        if not len(self):
+            return np.full(rows.shape + column.shape[1:], np.nan)
+        found = (rows >= 0).reshape(rows.shape + (1,) * (column.ndim - 1))
+        return np.where(found, column[np.maximum(rows, 0)], np.nan)
+
+    def get(self, name, concentration, density, cell_type, time_point):
+        """
+        Single value of statistic ``name``, or NaN if the condition is absent.
+        """
+        return float(self.take(name, concentration, density, cell_type, time_point))
+
+    def nbytes(self):
+        """
+        Bytes held by the code and value columns and the key index.
+        """
+        arrays = list(self.codes.values()) + list(self.values.values()) + [self._keys]
+        return sum(a.nbytes for a in arrays)
@@ -0,0 +1,302 @@
+"""
+Batch rendering of every chart in one Python process.
+
+Each chart script in the project root exposes a ``CHARTS`` dict mapping an
+output name to a zero-argument function that builds and returns the figure.
+``render_all`` imports the scripts once, renders every chart with the
+non-interactive Agg backend and writes ``<name>.png`` files, so matplotlib,
+NumPy and the workbook cache are loaded once for the whole batch instead of
+once per script.
+
+Charts are independent, and the 300 dpi ``savefig`` is CPU-bound, so with
+``jobs > 1`` they are fanned out to a ``ProcessPoolExecutor``.  Each worker
+selects Agg, imports pyplot and the chart scripts once in its initializer
+and then renders whichever charts it is handed.  Every chart goes to its own
+file and results are reported in chart name order, so the output does not
+depend on the number of workers or on which worker finished first.
+
+Charts whose inputs have not changed since they were last written are
+skipped; see ``labvis.manifest``.
+
+Run with ``python -m labvis render-all [--jobs N]``; add ``--profile
+trace.json`` to time every pipeline stage (see ``labvis.profiling``).
+
+Running a chart script directly goes through ``run_script``, which saves the
+PNGs next to the script and then shows them.  Set ``LABVIS_HEADLESS=1`` or
+pass ``--headless`` to use Agg instead, never open a window and close each
+figure as soon as it is saved.
+"""
+import glob
+import importlib.util
+import io
+import os
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+from labvis import PROJECT_ROOT, profiling
+from labvis.profiling import stage
+
+DEFAULT_OUTPUT = os.path.join(PROJECT_ROOT, 'Charts')
+
+# Same options the scripts pass to plt.savefig when run on their own
+SAVE_OPTIONS = {'dpi': 300, 'bbox_inches': 'tight'}
+
+# cached is True for charts skipped because their PNG was already current
+HEADLESS_ENV = 'LABVIS_HEADLESS'
+
+Rendered = namedtuple('Rendered', 'name path build_seconds save_seconds cached',
+                      defaults=(False,))
+
+
+def use_headless_backend():
+    """
+    Select the Agg backend; must run before any figure is created.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def is_headless(argv=None):
+    """
+    True if ``--headless`` is in ``argv`` (default: sys.argv) or LABVIS_HEADLESS is set.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    flag = os.environ.get(HEADLESS_ENV, '').strip().lower()
+    return '--headless' in argv or flag not in ('', '0', 'false', 'no')
+
+
+def run_script(charts, argv=None):
+    """
+    Entry point of a chart script run on its own.
+
+    Builds every chart in ``charts`` and saves it as ``<name>.png`` in the
+    working directory.  Interactive runs then show the figures; headless runs
+    close each one after saving and never block.
+
+    Parameters:
+    charts (dict): The script's CHARTS
+    argv (list): Command line arguments; defaults to sys.argv[1:]
+    """
+    headless = is_headless(argv)
+    if headless:
+        use_headless_backend()
+    import matplotlib.pyplot as plt
+
+    from labvis.layout import save_figure
+
+    for name, build in charts.items():
+        fig = build()
+        save_figure(fig, name + '.png', **SAVE_OPTIONS)
+        if headless:
+            plt.close(fig)
+    if not headless:
+        plt.show()
+
+
+def _load_module(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(f'labvis_charts.{name}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def discover_charts(root=PROJECT_ROOT, sources=None):
+    """
+    Collect the chart builders defined by the scripts in ``root``.
+
+    Parameters:
+    root (str): Directory holding the chart scripts
+    sources (dict): If given, filled with output name -> path of the defining script
+
+    Returns:
+    dict: Output name -> build function, in script name order
+    """
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    charts = {}
+    for path in sorted(glob.glob(os.path.join(root, '*.py'))):
+        with open(path, encoding='utf-8') as fh:
+            if 'CHARTS' not in fh.read():
+                continue
+        module = _load_module(path)
+        for name, build in getattr(module, 'CHARTS', {}).items():
+            if name in charts:
+                raise ValueError(f'chart {name!r} is defined by more than one script')
+            charts[name] = build
+            if sources is not None:
+                sources[name] = path
+    return charts
+
+
+def _time_draws(fig, name):
+    """Record every Agg draw of ``fig`` (savefig may draw more than once) as a 'draw' stage."""
+    draw = fig.draw
+
+    def timed_draw(renderer):
+        with stage('draw', chart=name):
+            return draw(renderer)
+
+    fig.draw = timed_draw
+
+
+def render_chart(name, build, output_dir=DEFAULT_OUTPUT):
+    """
+    Build one chart, save it as ``<output_dir>/<name>.png`` and close it.
+
+    The PNG is encoded in memory and then written, so encoding and disk I/O
+    show up as separate stages.  While a profiler is active the figure's
+    artist count and the peak memory traced while building and saving it are
+    recorded as well.
+
+    Returns:
+    Rendered: Output path and build/save wall times
+    """
+    import matplotlib.pyplot as plt
+
+    from labvis.layout import save_figure
+
+    profiler = profiling.active()
+    trace_memory = profiler is not None and not tracemalloc.is_tracing()
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with stage('chart', chart=name):
+            start = time.perf_counter()
+            with stage('build', chart=name):
+                fig = build()
+            built = time.perf_counter()
+            if profiler is not None:
+                _time_draws(fig, name)
+            buffer = io.BytesIO()
+            with stage('encode', chart=name):
+                save_figure(fig, buffer, format='png', **SAVE_OPTIONS)
+            path = os.path.join(output_dir, name + '.png')
+            with stage('write', chart=name, bytes=buffer.tell()):
+                with open(path, 'wb') as fh:
+                    fh.write(buffer.getbuffer())
+            saved = time.perf_counter()
+        if profiler is not None:
+            peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+            profiler.record_figure(name, len(fig.findobj()), peak)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    plt.close(fig)
+    return Rendered(name, path, built - start, saved - built)
+
+
+# --------------------------------------------------
+# Worker processes
+# --------------------------------------------------
+_worker_charts = None
+
+
+def _init_worker(root):
+    global _worker_charts
+    use_headless_backend()
+    import matplotlib.pyplot  # noqa: F401  (pay the import once per worker)
+    _worker_charts = discover_charts(root)
+
+
+def _render_in_worker(name, output_dir, profile=False):
+    """Render one chart; with ``profile`` also return the worker's spans and figure stats."""
+    if not profile:
+        return render_chart(name, _worker_charts[name], output_dir), None
+    with profiling.profiling() as profiler:
+        rendered = render_chart(name, _worker_charts[name], output_dir)
+    return rendered, (profiler.events, profiler.figures)
+
+
+def resolve_jobs(jobs):
+    """
+    Number of worker processes for ``jobs``; 0 or None means one per CPU.
+    """
+    if not jobs:
+        return os.cpu_count() or 1
+    return max(1, int(jobs))
+
+
+def render_all(output_dir=DEFAULT_OUTPUT, root=PROJECT_ROOT, names=None, jobs=1,
+               force=False):
+    """
+    Render every discovered chart (or just ``names``) to ``output_dir``.
+
+    Parameters:
+    output_dir (str): Directory the PNG files are written to
+    root (str): Directory holding the chart scripts
+    names (list): Chart names to render; defaults to all of them
+    jobs (int): Worker processes; 1 renders in this process, 0 uses every CPU
+    force (bool): Re-render charts even if their PNG is current
+
+    Spans recorded by worker processes are merged into the active profiler,
+    if any, so a profiled run gives one trace whatever the number of jobs.
+
+    Returns:
+    list: Rendered tuples, in chart name order
+    """
+    from labvis.manifest import RenderManifest, chart_key, inputs_digest
+
+    use_headless_backend()
+    sources = {}
+    charts = discover_charts(root, sources)
+    if names:
+        unknown = sorted(set(names) - set(charts))
+        if unknown:
+            raise KeyError(f'unknown chart(s): {", ".join(unknown)}')
+        charts = {name: charts[name] for name in charts if name in names}
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest = RenderManifest(output_dir)
+    shared = inputs_digest(SAVE_OPTIONS)
+    keys = {name: chart_key(name, sources[name], shared) for name in charts}
+    results = {}
+    for name in charts:
+        path = os.path.join(output_dir, name + '.png')
+        if not force and manifest.is_current(name, keys[name], path):
+            results[name] = Rendered(name, path, 0.0, 0.0, cached=True)
+    stale = [name for name in charts if name not in results]
+
+    jobs = min(resolve_jobs(jobs), len(stale)) or 1
+    if jobs == 1:
+        rendered = [render_chart(name, charts[name], output_dir) for name in stale]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(root,)) as pool:
+            profiler = profiling.active()
+            futures = [pool.submit(_render_in_worker, name, output_dir, profiler is not None)
+                       for name in stale]
+            rendered = []
+            for future in futures:
+                result, trace = future.result()
+                if trace is not None:
+                    profiler.merge(*trace)
+                rendered.append(result)
+    for r in rendered:
+        manifest.record(r.name, keys[r.name], r.path)
+        results[r.name] = r
+    if rendered:
+        manifest.save()
+    return [results[name] for name in charts]
+
+
+def print_report(results, total_seconds, stream=None):
+    """
+    Print per-chart build/save times and the batch total.
+    """
+    stream = stream or sys.stdout
+    for r in results:
+        if r.cached:
+            print(f'{r.name:24s} up to date{"":28s}-> {os.path.relpath(r.path)}', file=stream)
+            continue
+        print(f'{r.name:24s} build {r.build_seconds * 1000:8.1f} ms  '
+              f'save {r.save_seconds * 1000:8.1f} ms  -> {os.path.relpath(r.path)}',
+              file=stream)
+    busy = sum(r.build_seconds + r.save_seconds for r in results)
+    cached = sum(r.cached for r in results)
+    print(f'{len(results) - cached} charts rendered, {cached} up to date in '
+          f'{total_seconds:.2f} s ({busy:.2f} s of rendering)', file=stream)
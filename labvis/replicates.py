@@ -0,0 +1,162 @@
+"""
+Raw replicate store: every well reading, grouped by plate, indexed by condition.
+
+Each plate is kept as one contiguous float64 array of well readings plus a
+parallel int32 array giving the condition each well belongs to.  Conditions
+are the distinct ``KEY_FIELDS`` tuples (group, medium, concentration,
+density, cell_type, time_point) and are numbered in the order they are first
+added, so the replicate wells of one condition may sit on several plates.
+
+``aggregate`` computes n, mean, SD and SEM for every condition in a fixed
+number of grouped passes (``np.bincount`` with weights) over all wells, so
+its cost is linear in the number of wells and adding a plate or a replicate
+never means re-deriving a constant by hand.
+
+Each plate also keeps its read time (Unix seconds, NaN if unknown), and a
+condition's ``read_at`` is the mean read time of its wells.  The readings
+themselves come back as a (conditions x max replicates) matrix, NaN-padded,
+for statistics that need every replicate (see ``labvis.significance``).
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from labvis.ingest import KEY_FIELDS
+
+Plate = namedtuple('Plate', 'values conditions wells read_at', defaults=(float('nan'),))
+Summary = namedtuple('Summary', 'keys n mean sd sem read_at replicates')
+
+
+def _encode_keys(columns, n_rows):
+    """Per-row condition code and the distinct key tuples, in first-seen order."""
+    if n_rows == 0:
+        return np.zeros(0, dtype=np.int64), []
+    combined = np.zeros(n_rows, dtype=np.int64)
+    for column in columns:
+        uniques, codes = np.unique(column, return_inverse=True)
+        combined = combined * len(uniques) + codes
+    _, first, codes = np.unique(combined, return_index=True, return_inverse=True)
+    # Renumber so codes follow first appearance rather than sort order
+    order = np.argsort(first, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    codes = rank[codes]
+    keys = [tuple(col[i].item() for col in columns) for i in first[order]]
+    return codes, keys
+
+
+class ReplicateStore:
+    """
+    Well readings per plate with a well -> condition index.
+
+    Build one from a ReadingTable with ``from_table`` and add further plates
+    or replicates with ``add_plate``.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self._codes = {}
+        self.plates = {}
+
+    def __len__(self):
+        return sum(len(p.values) for p in self.plates.values())
+
+    def condition_code(self, key):
+        """
+        Integer code of a condition key, assigning a new one if unseen.
+        """
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self.keys)
+            self.keys.append(key)
+        return code
+
+    @classmethod
+    def from_table(cls, table):
+        """
+        Store built from the rows of a ReadingTable.
+        """
+        store = cls()
+        codes, keys = _encode_keys([np.asarray(table[name]) for name in KEY_FIELDS], len(table))
+        for key in keys:
+            store.condition_code(key)
+        plates = np.asarray(table['plate'])
+        values = np.asarray(table['value'], dtype=np.float64)
+        wells = np.asarray(table['well'])
+        read_at = np.asarray(table['read_at'], dtype=np.float64)
+        if not len(plates):
+            return store
+        # One sort groups the rows by plate (keeping row order within a plate),
+        # so each plate is a contiguous slice rather than a scan of the table
+        names, first, plate_codes = np.unique(plates, return_index=True, return_inverse=True)
+        plate_codes = plate_codes.reshape(-1)
+        order = np.argsort(plate_codes, kind='stable')
+        ends = np.cumsum(np.bincount(plate_codes, minlength=len(names)))
+        starts = ends - np.bincount(plate_codes, minlength=len(names))
+        values, codes, wells = values[order], codes[order].astype(np.int32), wells[order]
+        # Plates in first-seen order, as before
+        for i in np.argsort(first, kind='stable').tolist():
+            lo, hi = starts[i], ends[i]
+            store.plates[names[i].item()] = Plate(values[lo:hi], codes[lo:hi], wells[lo:hi],
+                                                  float(read_at[first[i]]))
+        return store
+
+    def add_plate(self, plate, values, keys, wells=None, read_at=float('nan')):
+        """
+        Add (or extend) a plate's readings.
+
+        Parameters:
+        plate (str): Plate id, e.g. 'Group2!W55'
+        values (array): Well readings
+        keys (list): Condition key (KEY_FIELDS tuple) of each reading
+        wells (list): Well names, e.g. 'B5'; optional
+        read_at (float): Read time in Unix seconds; NaN if unknown
+        """
+        values = np.asarray(values, dtype=np.float64)
+        codes = np.array([self.condition_code(tuple(k)) for k in keys], dtype=np.int32)
+        wells = np.asarray(wells if wells is not None else [''] * len(values), dtype=str)
+        if plate in self.plates:
+            old = self.plates[plate]
+            values = np.concatenate([old.values, values])
+            codes = np.concatenate([old.conditions, codes])
+            wells = np.concatenate([old.wells, wells])
+            read_at = old.read_at if np.isnan(read_at) else read_at
+        self.plates[plate] = Plate(values, codes, wells, read_at)
+
+    def aggregate(self):
+        """
+        n, mean, sample SD (ddof=1) and SEM of every condition.
+
+        Conditions with a single well get SD and SEM of 0.  ``read_at`` is NaN
+        for conditions with any well on a plate without a read time.
+        ``replicates`` holds each condition's readings in plate and well
+        order, padded with NaN to the largest replicate count.
+
+        Returns:
+        Summary: keys list plus one array per statistic, indexed by condition code
+        """
+        n_conditions = len(self.keys)
+        if self.plates:
+            values = np.concatenate([p.values for p in self.plates.values()])
+            codes = np.concatenate([p.conditions for p in self.plates.values()])
+            read_at = np.concatenate([np.full(len(p.values), p.read_at)
+                                      for p in self.plates.values()])
+        else:
+            values, codes, read_at = np.zeros(0), np.zeros(0, dtype=np.int32), np.zeros(0)
+
+        n = np.bincount(codes, minlength=n_conditions)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.bincount(codes, weights=values, minlength=n_conditions) / n
+            squares = np.bincount(codes, weights=(values - mean[codes]) ** 2,
+                                  minlength=n_conditions)
+            sd = np.where(n > 1, np.sqrt(squares / (n - 1)), 0.0)
+            sem = np.where(n > 1, sd / np.sqrt(n), 0.0)
+            read_time = np.bincount(codes, weights=read_at, minlength=n_conditions) / n
+
+        # Rank of each well among its condition's wells, from a stable sort
+        order = np.argsort(codes, kind='stable')
+        rank = np.empty(len(codes), dtype=np.int64)
+        rank[order] = np.arange(len(codes)) - np.repeat(np.cumsum(n) - n, n)
+        replicates = np.full((n_conditions, n.max() if n_conditions else 0), np.nan)
+        replicates[codes, rank] = values
+        return Summary(list(self.keys), n, mean, sd, sem, read_time, replicates)
@@ -0,0 +1,371 @@
+"""
+Local experiment store: plates, wells, conditions and derived metrics in one SQLite file.
+
+Each chart script reads its own sheet, so a question that spans experiments
+("every HeLa result at density 3.9 across FBS, glucose and glutamine") used
+to mean loading several of them by hand.  ``ExperimentStore`` keeps every
+ingested reading in one database instead:
+
+    plates      id, name, workbook, read_at       (workbook, name unique together)
+    conditions  id, group_name, medium, concentration, density, cell_type,
+                time_point, stiffness            (unique together)
+    wells       plate_id, well, condition_id, value
+    metrics     condition_id, name, value        (n, mean, sd, sem, read_at, ...)
+
+Conditions carry a ``stiffness`` label ('' for the plate-reader sheets) so
+that substrate experiments such as Group 3 fit the same schema.  Every
+condition field has its own index, and wells are indexed by condition and
+by plate, so a query that narrows on any of them touches only the matching
+rows.  Every ingest ends with a sampled ANALYZE (``analysis_limit``), which
+lets SQLite pick the most selective index for each query.
+
+``add_readings`` bulk-inserts a ReadingTable in one transaction (plates
+the same workbook already stored are replaced; a plate is identified by its
+workbook and name, so runs with the same sheet layout are kept side by
+side) and refreshes the n/mean/SD/SEM/read_at
+metrics of the conditions it touched.  ``readings`` returns a ReadingTable
+and ``condition_table`` a ConditionTable, so query results feed
+``labvis.aggregate``, ``labvis.growth`` and the chart code unchanged.
+"""
+import os
+import sqlite3
+
+import numpy as np
+
+from labvis import DEFAULT_WORKBOOK, PROJECT_ROOT
+from labvis.ingest import FIELDS, FLOAT_FIELDS, KEY_FIELDS, ReadingTable
+
+DEFAULT_STORE = os.path.join(PROJECT_ROOT, 'experiments.sqlite')
+
+# Condition fields a query can filter on, and their column names
+CONDITION_COLUMNS = {'group': 'group_name', 'medium': 'medium',
+                     'concentration': 'concentration', 'density': 'density',
+                     'cell_type': 'cell_type', 'time_point': 'time_point',
+                     'stiffness': 'stiffness'}
+FILTER_FIELDS = tuple(CONDITION_COLUMNS)
+
+# Metrics refreshed from the wells on every ingest
+SUMMARY_METRICS = ('n', 'mean', 'sd', 'sem', 'read_at')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plates (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    workbook TEXT NOT NULL DEFAULT '',
+    read_at REAL,
+    UNIQUE (workbook, name)
+);
+CREATE TABLE IF NOT EXISTS conditions (
+    id INTEGER PRIMARY KEY,
+    group_name TEXT NOT NULL,
+    medium TEXT NOT NULL,
+    concentration TEXT NOT NULL,
+    density REAL NOT NULL,
+    cell_type TEXT NOT NULL,
+    time_point TEXT NOT NULL,
+    stiffness TEXT NOT NULL DEFAULT '',
+    UNIQUE (group_name, medium, concentration, density, cell_type, time_point, stiffness)
+);
+CREATE TABLE IF NOT EXISTS wells (
+    plate_id INTEGER NOT NULL REFERENCES plates (id),
+    well TEXT NOT NULL,
+    condition_id INTEGER NOT NULL REFERENCES conditions (id),
+    value REAL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    condition_id INTEGER NOT NULL REFERENCES conditions (id),
+    name TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (condition_id, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS wells_condition ON wells (condition_id);
+CREATE INDEX IF NOT EXISTS wells_plate ON wells (plate_id);
+""" + ''.join(f'CREATE INDEX IF NOT EXISTS conditions_{column} ON conditions ({column});\n'
+              for column in CONDITION_COLUMNS.values())
+
+_CONDITION_KEY = ', '.join(CONDITION_COLUMNS.values())
+
+
+def _where(filters, alias='c'):
+    """SQL condition and parameters for ``field=value`` filters; lists become IN (...)."""
+    clauses, params = [], []
+    for field, wanted in filters.items():
+        if field not in CONDITION_COLUMNS:
+            raise ValueError(f'unknown field {field!r}; expected one of {FILTER_FIELDS}')
+        column = f'{alias}.{CONDITION_COLUMNS[field]}'
+        if isinstance(wanted, (list, tuple, set, frozenset, np.ndarray)):
+            wanted = list(wanted)
+            clauses.append(f'{column} IN ({", ".join("?" * len(wanted))})')
+            params.extend(wanted)
+        else:
+            clauses.append(f'{column} = ?')
+            params.append(wanted)
+    return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+
+class ExperimentStore:
+    """
+    SQLite database of plate readings from any number of workbooks.
+
+    Parameters:
+    path (str): Database file, created if missing; ':memory:' for a throwaway store
+    """
+
+    def __init__(self, path=DEFAULT_STORE):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        # WAL commits without rewriting the database file; NORMAL sync is
+        # still crash-safe in WAL mode
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        # ANALYZE samples this many index entries, so it stays cheap on large stores
+        self.connection.execute('PRAGMA analysis_limit = 1000')
+        self._migrate()
+        self.connection.executescript(_SCHEMA)
+
+    def _migrate(self):
+        """Rebuild a plates table from before plates were keyed by (workbook, name)."""
+        row = self.connection.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'plates'").fetchone()
+        if row is None or 'UNIQUE (workbook, name)' in row[0]:
+            return
+        # Copy, drop, rename: renaming the old table instead would point the
+        # wells' foreign key at it
+        table = _SCHEMA.split(');', 1)[0] + ');'
+        with self.connection:
+            self.connection.execute(table.replace('IF NOT EXISTS plates', 'plates_new'))
+            self.connection.execute('INSERT INTO plates_new (id, name, workbook, read_at) '
+                                    'SELECT id, name, workbook, read_at FROM plates')
+            self.connection.execute('DROP TABLE plates')
+            self.connection.execute('ALTER TABLE plates_new RENAME TO plates')
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM wells').fetchone()[0]
+
+    # --------------------------------------------------
+    # Ingestion
+    # --------------------------------------------------
+    def _condition_ids(self, keys, stiffness):
+        """Ids of (KEY_FIELDS) condition keys, inserting the unseen ones."""
+        # Staged in a temporary table so the lookup is one join on the unique index
+        self.connection.execute(
+            f'CREATE TEMP TABLE IF NOT EXISTS staged_conditions (position INTEGER PRIMARY KEY, '
+            f'{_CONDITION_KEY})')
+        self.connection.execute('DELETE FROM staged_conditions')
+        self.connection.executemany(
+            'INSERT INTO staged_conditions VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            ((i,) + tuple(key) + (stiffness,) for i, key in enumerate(keys)))
+        self.connection.execute(f'INSERT OR IGNORE INTO conditions ({_CONDITION_KEY}) '
+                                f'SELECT {_CONDITION_KEY} FROM staged_conditions')
+        joined = ' AND '.join(f'c.{column} = s.{column}' for column in CONDITION_COLUMNS.values())
+        return [row[0] for row in self.connection.execute(
+            f'SELECT c.id FROM staged_conditions s JOIN conditions c ON {joined} '
+            'ORDER BY s.position')]
+
+    def add_readings(self, table, workbook='', stiffness=''):
+        """
+        Insert every reading of a ReadingTable; its plates already stored for
+        ``workbook`` are replaced, those of other workbooks are kept.
+
+        Parameters:
+        table (ReadingTable): Readings, e.g. from labvis.ingest.load_workbook
+        workbook (str): Source file name recorded with each plate
+        stiffness (str): Substrate label of every reading, '' if none
+
+        Returns:
+        int: Number of wells inserted
+        """
+        from labvis.replicates import _encode_keys
+
+        if not len(table):
+            return 0
+        codes, keys = _encode_keys([np.asarray(table[name]) for name in KEY_FIELDS], len(table))
+        plate_names, plate_codes = np.unique(table['plate'], return_inverse=True)
+        # One read time per plate: that of its first well
+        first = np.unique(plate_codes.reshape(-1), return_index=True)[1]
+        plate_read_at = np.asarray(table['read_at'], dtype=float)[first]
+
+        with self.connection:
+            ids = np.asarray(self._condition_ids(keys, stiffness), dtype=np.int64)
+            names = plate_names.tolist()
+            old = [row[0] for row in self._select_in(
+                'SELECT id FROM plates WHERE workbook = ? AND name', names, params=[workbook])]
+            touched = {row[0] for row in self._select_in(
+                'SELECT DISTINCT condition_id FROM wells WHERE plate_id', old)}
+            self._execute_in('DELETE FROM wells WHERE plate_id', old)
+            self.connection.executemany(
+                'INSERT INTO plates (name, workbook, read_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (workbook, name) DO UPDATE SET workbook = excluded.workbook, '
+                'read_at = excluded.read_at',
+                zip(names, [workbook] * len(names), plate_read_at.tolist()))
+            plate_ids = dict(self._select_in('SELECT name, id FROM plates WHERE workbook = ? AND name',
+                                             names, params=[workbook]))
+            plate_id = np.array([plate_ids[name] for name in names], dtype=np.int64)
+            self.connection.executemany(
+                'INSERT INTO wells (plate_id, well, condition_id, value) VALUES (?, ?, ?, ?)',
+                zip(plate_id[plate_codes.reshape(-1)].tolist(), np.asarray(table['well']).tolist(),
+                    ids[codes].tolist(), np.asarray(table['value'], dtype=float).tolist()))
+            self._refresh_summaries(sorted(touched | set(ids.tolist())))
+            self.connection.execute('ANALYZE')
+        return len(table)
+
+    def add_workbook(self, path=DEFAULT_WORKBOOK, sheets=None):
+        """
+        Ingest a workbook's plate blocks (through the parsed-sheet cache).
+
+        Returns:
+        int: Number of wells inserted
+        """
+        from labvis.ingest import load_workbook
+
+        return self.add_readings(load_workbook(path, sheets), workbook=os.path.basename(path))
+
+    def put_metric(self, name, keys, values, stiffness=''):
+        """
+        Store a derived metric (e.g. a doubling time or a cell count) per condition.
+
+        Parameters:
+        name (str): Metric name
+        keys (list): KEY_FIELDS tuples of the conditions
+        values (array): One value per key
+        stiffness (str): Substrate label of the conditions, '' if none
+        """
+        keys = [tuple(key) for key in keys]
+        with self.connection:
+            ids = self._condition_ids(keys, stiffness)
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO metrics (condition_id, name, value) VALUES (?, ?, ?)',
+                zip(ids, [name] * len(ids), np.asarray(values, dtype=float).tolist()))
+
+    def _refresh_summaries(self, condition_ids):
+        """Recompute SUMMARY_METRICS of the given conditions from their wells."""
+        if not condition_ids:
+            return
+        summary_names = ', '.join(f"'{name}'" for name in SUMMARY_METRICS)
+        self._execute_in(f'DELETE FROM metrics WHERE name IN ({summary_names}) '
+                         'AND condition_id', condition_ids)
+        # Two passes, like ReplicateStore.aggregate: the mean, then squares about it
+        rows = np.array(self._select_in(
+            'SELECT w.condition_id, COUNT(w.value), s.mean, '
+            'SUM((w.value - s.mean) * (w.value - s.mean)), AVG(p.read_at) '
+            'FROM wells w JOIN plates p ON p.id = w.plate_id '
+            'JOIN (SELECT condition_id, AVG(value) AS mean FROM wells WHERE condition_id',
+            condition_ids, suffix=' GROUP BY condition_id) s ON s.condition_id = w.condition_id '
+                                  'GROUP BY w.condition_id'),
+            dtype=float).reshape(-1, 5)
+        ids, n, mean, squares, read_at = rows.T
+        # Any unstamped plate makes the condition's read time unknown, as in
+        # ReplicateStore.aggregate
+        unstamped = {row[0] for row in self._select_in(
+            'SELECT DISTINCT w.condition_id FROM wells w JOIN plates p ON p.id = w.plate_id '
+            'WHERE p.read_at IS NULL AND w.condition_id', condition_ids)}
+        read_at[np.isin(ids, list(unstamped))] = np.nan
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sd = np.where(n > 1, np.sqrt(squares / (n - 1)), 0.0)
+            sem = np.where(n > 1, sd / np.sqrt(n), 0.0)
+        columns = dict(zip(SUMMARY_METRICS, (n, mean, sd, sem, read_at)))
+        self.connection.executemany(
+            'INSERT INTO metrics (condition_id, name, value) VALUES (?, ?, ?)',
+            ((int(i), name, value) for name, column in columns.items()
+             for i, value in zip(ids.tolist(), column.tolist())))
+
+    # SQLite caps the number of bound parameters, so long IN lists go in chunks
+    _CHUNK = 900
+
+    def _select_in(self, sql, values, suffix='', params=()):
+        rows = []
+        for start in range(0, len(values), self._CHUNK):
+            chunk = list(values[start:start + self._CHUNK])
+            rows.extend(self.connection.execute(
+                f'{sql} IN ({", ".join("?" * len(chunk))}){suffix}', list(params) + chunk))
+        return rows
+
+    def _execute_in(self, sql, values):
+        for start in range(0, len(values), self._CHUNK):
+            chunk = list(values[start:start + self._CHUNK])
+            self.connection.execute(f'{sql} IN ({", ".join("?" * len(chunk))})', chunk)
+
+    # --------------------------------------------------
+    # Queries
+    # --------------------------------------------------
+    def readings(self, **filters):
+        """
+        Every stored well matching ``field=value`` filters on FILTER_FIELDS.
+
+        A filter value may be a list of accepted values, e.g.
+        ``store.readings(cell_type='HeLa', density=3.9, medium=['FBS', 'Glucose'])``.
+
+        Returns:
+        ReadingTable: One row per well, in insertion order
+        """
+        where, params = _where(filters)
+        rows = self.connection.execute(
+            'SELECT p.name, c.group_name, c.medium, c.concentration, c.density, c.cell_type, '
+            'c.time_point, w.well, w.value, p.read_at '
+            'FROM conditions c JOIN wells w ON w.condition_id = c.id '
+            f'JOIN plates p ON p.id = w.plate_id{where} ORDER BY w.rowid', params).fetchall()
+        columns = list(zip(*rows)) or [()] * len(FIELDS)
+        return ReadingTable({name: np.array(column, dtype=np.float64 if name in FLOAT_FIELDS
+                                            else str)
+                             for name, column in zip(FIELDS, columns)})
+
+    def metrics(self, names=SUMMARY_METRICS, **filters):
+        """
+        Stored metrics of every condition matching the filters, one row per condition.
+
+        Parameters:
+        names (tuple): Metrics to return; NaN where a condition has none
+        **filters: ``field=value`` filters on FILTER_FIELDS
+
+        Returns:
+        dict: FILTER_FIELDS label columns plus one float64 column per metric
+        """
+        names = list(names)
+        where, params = _where(filters)
+        rows = self.connection.execute(
+            f'SELECT c.id, {", ".join("c." + col for col in CONDITION_COLUMNS.values())}, '
+            f'm.name, m.value FROM conditions c JOIN metrics m ON m.condition_id = c.id{where}'
+            f'{" AND" if where else " WHERE"} m.name IN ({", ".join("?" * len(names))})',
+            params + names).fetchall()
+        # Rows come back in index order; np.unique sorts the conditions by id
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        conditions, first, index = np.unique(ids, return_index=True, return_inverse=True)
+        result = {field: np.array([rows[i][1 + k] for i in first.tolist()],
+                                  dtype=np.float64 if field == 'density' else str)
+                  for k, field in enumerate(FILTER_FIELDS)}
+        name_index = {name: i for i, name in enumerate(names)}
+        table = np.full((len(conditions), len(names)), np.nan)
+        if rows:
+            table[index.reshape(-1), [name_index[row[-2]] for row in rows]] = \
+                np.array([row[-1] for row in rows], dtype=float)
+        result.update({name: table[:, i] for i, name in enumerate(names)})
+        return result
+
+    def condition_table(self, names=SUMMARY_METRICS, **filters):
+        """
+        Stored metrics as a ConditionTable, for the chart code.
+
+        The filters must pin group, medium and stiffness down to one
+        experiment so that (concentration, density, cell_type, time_point)
+        identifies a condition.
+
+        Returns:
+        ConditionTable: One row per condition, one value column per metric
+        """
+        from labvis.records import CONDITION_FIELDS, ConditionTable
+
+        found = self.metrics(names, **filters)
+        for field in ('group', 'medium', 'stiffness'):
+            if len(set(found[field].tolist())) > 1:
+                raise ValueError(f'the query spans several values of {field!r}; filter on it')
+        labels = {f: found[f].tolist() for f in CONDITION_FIELDS}
+        return ConditionTable.from_columns(labels, {name: found[name] for name in names})
@@ -0,0 +1,245 @@
+"""
+Synthetic plate-reader data for benchmarks.
+
+``synthetic_table`` builds a ReadingTable shaped like the Group 2
+experiments: for every medium, concentration, seeding density, cell type and
+time point, ``replicates`` wells whose absorbance follows a simple
+exponential growth model with multiplicative noise.  Wells are packed row by
+row onto 96-, 384- or 1536-well plates, one set of plates per medium and
+time point, as a plate reader would export them.  Every plate is read
+at its nominal time after seeding plus up to an hour or two of drift, so
+``read_at`` differs from plate to plate like real plate-reader timestamps.
+
+``scale`` multiplies the number of concentrations per medium, so scale 1 is
+today's Group 2 design (3 media x 4 concentrations x 3 densities x 2 cell
+types x 2 time points, in triplicate) and scale 10 or 100 is ten or a
+hundred times as many conditions and readings.
+
+``write_workbook`` writes the same design as an .xlsx file in the layout of
+the real workbook's Group2 sheet (96-well blocks, two concentrations per
+block, plate rows B-G, a read timestamp beside each block header), so
+ingest can be measured on workbooks of any size.
+"""
+import zipfile
+from collections import namedtuple
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from labvis.ingest import FIELDS, GROUP2_LAYOUT, PLATE_COLUMNS, PLATE_ROWS, ReadingTable
+from labvis.xlsx import column_letters
+
+# Plate format -> (rows, columns)
+PLATE_FORMATS = {96: (8, 12), 384: (16, 24), 1536: (32, 48)}
+
+PlateDesign = namedtuple('PlateDesign', [
+    'wells',           # plate format: 96, 384 or 1536
+    'media',
+    'concentrations',  # concentrations per medium at scale 1
+    'densities',       # seeding densities (x10^4)
+    'cell_types',
+    'time_points',
+    'replicates',
+], defaults=(96, ('FBS', 'Glucose', 'Glutamine'), 4, (3.9, 2.97, 1.85), ('DM', 'HeLa'),
+             ('0h', '48h'), 3))
+
+# Growth model: doubling time (h) per cell type at saturating nutrient
+_DOUBLING_HOURS = {'DM': 30.0, 'HeLa': 24.0}
+
+# Seeding time of every synthetic experiment (Unix seconds) and the spread of
+# the read times around their nominal hours
+SEEDED_AT = datetime(2025, 1, 27, 9, 0, tzinfo=timezone.utc).timestamp()
+_READ_DRIFT_HOURS = 1.0
+
+
+def concentration_labels(design, scale=1):
+    """
+    Concentration labels of every medium: '0.5mM', '1mM', ... in 0.5 mM steps.
+    """
+    return [f'{0.5 * (i + 1):g}mM' for i in range(design.concentrations * scale)]
+
+
+def row_names(n_rows):
+    """
+    Plate row names A..Z, AA, AB, ... for ``n_rows`` rows.
+    """
+    return [column_letters(i + 1) for i in range(n_rows)]
+
+
+def _absorbance(rng, medium, concentration, density, cell_type, hours):
+    """Modelled absorbance for broadcast condition arrays, with 5% noise."""
+    base = 0.05 + 0.1 * np.asarray(density) / 3.9
+    saturation = concentration / (concentration + 2.0) * (0.8 + 0.1 * medium)
+    doubling = np.vectorize(lambda ct: _DOUBLING_HOURS.get(ct, 36.0), otypes=[float])(cell_type)
+    value = base * np.exp2(hours * saturation / doubling)
+    return value * rng.lognormal(0.0, 0.05, np.shape(value))
+
+
+def _read_times(clock, hours, n_plates):
+    """Read times (Unix seconds) of ``n_plates`` plates nominally read ``hours`` after seeding."""
+    drift = clock.normal(0.0, _READ_DRIFT_HOURS, n_plates)
+    return SEEDED_AT + (hours + drift) * 3600.0
+
+
+def synthetic_table(design=PlateDesign(), scale=1, seed=0):
+    """
+    Readings of a synthetic experiment, ``scale`` times today's volume.
+
+    Parameters:
+    design (PlateDesign): Plate format and condition grid
+    scale (int): Multiplier of the number of concentrations per medium
+    seed (int): Seed of the noise and read-time generators
+
+    Returns:
+    ReadingTable: One row per well, group 'Synthetic'
+    """
+    n_rows, n_cols = PLATE_FORMATS[design.wells]
+    concentrations = concentration_labels(design, scale)
+    # Condition grid of one (medium, time point) plate set, replicates innermost
+    shape = (len(concentrations), len(design.densities), len(design.cell_types),
+             design.replicates)
+    conc_i, dens_i, cell_i, _ = (a.ravel() for a in np.indices(shape))
+    per_set = conc_i.size
+    well = np.arange(per_set) % (n_rows * n_cols)
+    plate_i = np.arange(per_set) // (n_rows * n_cols)
+    well_names = np.char.add(np.array(row_names(n_rows))[well // n_cols],
+                             (well % n_cols + 1).astype(str))
+
+    rng = np.random.default_rng(seed)
+    # Read times come from their own stream so the readings do not depend on them
+    clock = np.random.default_rng([seed, 1])
+    conc_values = np.array([float(c[:-len('mM')]) for c in concentrations])
+    columns = {name: [] for name in FIELDS}
+    for m, medium in enumerate(design.media):
+        for time_point in design.time_points:
+            hours = float(time_point.rstrip('h'))
+            plates = np.char.add(f'Synthetic{design.wells}!{medium}-{time_point}-', plate_i.astype(str))
+            cell_type = np.asarray(design.cell_types)[cell_i]
+            density = np.asarray(design.densities, dtype=float)[dens_i]
+            columns['plate'].append(plates)
+            columns['group'].append(np.full(per_set, 'Synthetic'))
+            columns['medium'].append(np.full(per_set, medium))
+            columns['concentration'].append(np.asarray(concentrations)[conc_i])
+            columns['density'].append(density)
+            columns['cell_type'].append(cell_type)
+            columns['time_point'].append(np.full(per_set, time_point))
+            columns['well'].append(well_names)
+            columns['value'].append(_absorbance(rng, m, conc_values[conc_i], density,
+                                                cell_type, hours))
+            columns['read_at'].append(_read_times(clock, hours, plate_i[-1] + 1)[plate_i])
+    return ReadingTable({name: np.concatenate(parts) for name, parts in columns.items()})
+
+
+# --------------------------------------------------
+# Workbook writer
+# --------------------------------------------------
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>')
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="xl/workbook.xml" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/officeDocument"/></Relationships>')
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Group2" sheetId="1" r:id="rId1"/></sheets></workbook>')
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="worksheets/sheet1.xml" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/worksheet"/></Relationships>')
+
+# Columns of the 0h and 48h blocks' well 1, side by side like the real sheet
+_BLOCK_COLUMNS = (3, 17)
+
+
+def _cell(row, col, value):
+    ref = f'{column_letters(col)}{row}'
+    if isinstance(value, str):
+        return f'<c r="{ref}" t="inlineStr"><is><t>{escape(value)}</t></is></c>'
+    return f'<c r="{ref}"><v>{value!r}</v></c>'
+
+
+def _sheet_rows(design, scale, rng, clock):
+    """Yield (row number, {column: value}) of a Group2-style sheet."""
+    if tuple(design.densities) != (3.9, 2.97, 1.85) or len(design.time_points) != 2:
+        raise ValueError('the Group2 plate map needs densities (3.9, 2.97, 1.85) '
+                         'and two time points')
+    concentrations = concentration_labels(design, scale)
+    span = PLATE_COLUMNS // len(design.cell_types)
+    row = 1
+    for m, medium in enumerate(design.media):
+        yield row, {1: medium}
+        row += 2
+        for pair in range(0, len(concentrations), 2):
+            pair_labels = concentrations[pair:pair + 2]
+            header, labels, numbers = {}, {}, {}
+            for col, time_point in zip(_BLOCK_COLUMNS, design.time_points):
+                header[col] = f'{time_point[:-1]} hour incubation for {" & ".join(pair_labels)}'
+                read_at = _read_times(clock, float(time_point.rstrip('h')), 1)[0]
+                header[col + 4] = datetime.fromtimestamp(read_at, timezone.utc).strftime(
+                    '%d/%m/%Y %H:%M:%S+00:00')
+                for i, cell_type in enumerate(design.cell_types):
+                    labels[col + i * span] = f'{cell_type} cells'
+                numbers.update({col + k: float(k + 1) for k in range(PLATE_COLUMNS)})
+            yield row, header
+            yield row + 1, labels
+            yield row + 2, numbers
+            for r, letter in enumerate(PLATE_ROWS):
+                cells = {}
+                for col, time_point in zip(_BLOCK_COLUMNS, design.time_points):
+                    cells[col - 1] = letter
+                    if letter not in GROUP2_LAYOUT:
+                        continue
+                    slot, density = GROUP2_LAYOUT[letter]
+                    if slot >= len(pair_labels):
+                        continue
+                    concentration = float(pair_labels[slot][:-len('mM')])
+                    for i, cell_type in enumerate(design.cell_types):
+                        values = _absorbance(rng, m, concentration, density,
+                                             np.full(design.replicates, cell_type),
+                                             float(time_point.rstrip('h')))
+                        for k, value in enumerate(values.tolist()):
+                            cells[col + i * span + k] = round(value, 4)
+                yield row + 3 + r, cells
+            row += 3 + len(PLATE_ROWS) + 2
+
+
+def write_workbook(path, design=PlateDesign(), scale=1, seed=0):
+    """
+    Write a synthetic experiment as an .xlsx file readable by labvis.ingest.
+
+    The sheet is named 'Group2' and uses its plate map, so the design must
+    have the Group 2 densities and two time points; ``design.wells`` is
+    ignored because the plate reader exports 96-well blocks.
+
+    Returns:
+    str: ``path``
+    """
+    rng = np.random.default_rng(seed)
+    clock = np.random.default_rng([seed, 1])
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as book:
+        book.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        book.writestr('_rels/.rels', _ROOT_RELS)
+        book.writestr('xl/workbook.xml', _WORKBOOK)
+        book.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        with book.open('xl/worksheets/sheet1.xml', 'w') as fh:
+            fh.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                     b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                     b'<sheetData>')
+            for row, cells in _sheet_rows(design, scale, rng, clock):
+                xml = ''.join(_cell(row, col, value) for col, value in sorted(cells.items()))
+                fh.write(f'<row r="{row}">{xml}</row>'.encode())
+            fh.write(b'</sheetData></worksheet>')
+    return path
@@ -0,0 +1,313 @@
+"""
+Watch mode: re-render charts as the chart workbook or scripts change.
+
+``watch`` runs until interrupted.  It waits for files in one directory to
+change and then brings everything downstream up to date:
+
+- the chart workbook (``DEFAULT_WORKBOOK``): an ``IncrementalBuild.update``,
+  so only the sheets, conditions and charts that changed are redone
+- any other ``.xlsx`` file: parsed into the workbook cache (only if new or
+  changed; see ``labvis.cache``) and, with ``store``, loaded into the
+  experiment store under its file name.  No chart reads these exports
+  (every chart script plots ``DEFAULT_WORKBOOK``), so they re-render
+  nothing; they are ready for ``store query`` and for code reading the cache
+- a chart script (``*.py`` with ``CHARTS``): charts are rediscovered and
+  the update re-renders the ones whose code changed
+
+Chart scripts are discovered in the watched directory, and only the chart
+workbook's changes reach them.  Watching another directory (e.g. an export
+folder, with ``store``) works but prints a warning at start-up, since no
+workbook change there re-renders a chart.
+
+Exporters, Excel and copy tools write files in bursts of events (create,
+several writes, rename), so changes are debounced: after the first event
+the watcher keeps collecting until ``debounce`` seconds pass without one.
+
+On Linux the directory is watched with inotify (through ctypes, so no extra
+package is needed) and waiting costs nothing.  Elsewhere, or with
+``poll=True``, the directory is rescanned every ``interval`` seconds and
+files are compared by size and mtime.
+
+Everything stays loaded between updates: pyplot, the chart scripts and the
+graph state are imported or read once, so an update only pays for parsing
+the changed sheet and drawing the affected charts.  Changes to the
+``labvis`` package itself need a restart.  An update that fails (e.g. a
+workbook that is still being written) is reported and retried on the next
+change; it never stops the watcher.
+
+Run with ``python -m labvis watch``.
+"""
+import os
+import struct
+import sys
+import time
+
+from labvis import DEFAULT_WORKBOOK, PROJECT_ROOT
+
+# Seconds without events that end a burst
+DEFAULT_DEBOUNCE = 0.3
+# Seconds between rescans of the polling watcher
+DEFAULT_INTERVAL = 1.0
+
+WATCHED_SUFFIXES = ('.xlsx', '.py')
+
+# inotify(7) event masks
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_EVENT = struct.Struct('iIII')
+
+
+def is_watched(name):
+    """
+    True for workbooks and scripts; False for Excel lock files (``~$...``) and hidden files.
+    """
+    return name.endswith(WATCHED_SUFFIXES) and not name.startswith(('~$', '.'))
+
+
+class InotifyWatcher:
+    """
+    Names of files changed in one directory, reported by Linux inotify.
+
+    Raises OSError if inotify is not available.
+    """
+
+    def __init__(self, directory):
+        import ctypes
+        import ctypes.util
+
+        self.directory = directory
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify is not available')
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_MOVED_FROM | _IN_DELETE | _IN_MODIFY
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), mask) < 0:
+            os.close(self._fd)
+            raise OSError(ctypes.get_errno(), f'cannot watch {directory}')
+
+    def changes(self, timeout=None):
+        """
+        Names changed within ``timeout`` seconds (None: wait for the first change).
+
+        Returns:
+        set: File names relative to the directory; empty if nothing changed
+        """
+        import select
+
+        names = set()
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return names
+        try:
+            data = os.read(self._fd, 1 << 16)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                # Events were dropped; report every file so nothing is missed
+                names.update(os.listdir(self.directory))
+            elif name:
+                names.add(os.fsdecode(name))
+        return {name for name in names if is_watched(name)}
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """
+    Names of files changed in one directory, found by rescanning it.
+    """
+
+    def __init__(self, directory, interval=DEFAULT_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._seen = self._scan()
+
+    def _scan(self):
+        seen = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if is_watched(entry.name) and entry.is_file():
+                    stat = entry.stat()
+                    seen[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return seen
+
+    def changes(self, timeout=None):
+        """
+        Names changed within ``timeout`` seconds (None: wait for the first change).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.interval if deadline is None else min(self.interval,
+                                                               deadline - time.monotonic())
+            time.sleep(max(wait, 0.0))
+            seen = self._scan()
+            names = {name for name in set(seen) | set(self._seen)
+                     if seen.get(name) != self._seen.get(name)}
+            self._seen = seen
+            if names or (deadline is not None and time.monotonic() >= deadline):
+                return names
+
+    def close(self):
+        pass
+
+
+def open_watcher(directory, poll=False, interval=DEFAULT_INTERVAL):
+    """
+    InotifyWatcher on Linux, PollingWatcher elsewhere or when ``poll`` is set.
+    """
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directory)
+        except OSError:
+            pass
+    return PollingWatcher(directory, interval)
+
+
+def next_burst(watcher, debounce=DEFAULT_DEBOUNCE):
+    """
+    Wait for a change, then collect further changes until ``debounce`` seconds pass quietly.
+
+    Returns:
+    set: Every file name changed in the burst
+    """
+    names = set()
+    while not names:
+        names = watcher.changes()
+    while True:
+        more = watcher.changes(debounce)
+        if not more:
+            return names
+        names |= more
+
+
+class WatchSession:
+    """
+    In-process state kept warm between updates: the incremental graph,
+    its discovered charts and, optionally, an open experiment store.
+
+    Parameters:
+    directory (str): Directory watched for workbooks and chart scripts
+    output_dir (str): Directory the charts are rendered to
+    store (str): SQLite experiment store other workbooks are loaded into, or None
+    """
+
+    def __init__(self, directory=PROJECT_ROOT, output_dir=None, store=None):
+        from labvis.incremental import IncrementalBuild
+        from labvis.render import use_headless_backend
+
+        use_headless_backend()
+        import matplotlib.pyplot  # noqa: F401  (pay the import once, not on the first update)
+
+        self.directory = os.path.abspath(directory)
+        self.output_dir = output_dir
+        self.workbook = os.path.abspath(DEFAULT_WORKBOOK)
+        # Only a change to the chart workbook can re-render charts from its data
+        self.watches_workbook = os.path.dirname(self.workbook) == self.directory
+        self.build = IncrementalBuild(output_dir, root=self.directory)
+        self.store = None
+        if store:
+            from labvis.store import ExperimentStore
+            self.store = ExperimentStore(store)
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+
+    def handle(self, names, stream=None):
+        """
+        Ingest changed workbooks and re-render the charts the changes affect.
+
+        Parameters:
+        names (set): File names in the watched directory that changed
+        """
+        from labvis.incremental import IncrementalBuild
+
+        stream = stream or sys.stdout
+        paths = {name: os.path.join(self.directory, name) for name in sorted(names)}
+        if any(name.endswith('.py') for name in paths):
+            self.build = IncrementalBuild(self.output_dir, root=self.directory)
+        for name, path in paths.items():
+            if not name.endswith('.xlsx') or path == self.workbook or not os.path.exists(path):
+                continue
+            start = time.perf_counter()
+            try:
+                if self.store is not None:
+                    wells = self.store.add_workbook(path)
+                else:
+                    from labvis.cache import WorkbookCache
+                    wells = len(WorkbookCache(path).load())
+            except Exception as exc:  # noqa: BLE001  (a half-written export must not stop the watcher)
+                print(f'{_now()}  {name}: not ingested ({exc})', file=stream)
+                continue
+            print(f'{_now()}  {name}: {wells} wells ingested in '
+                  f'{(time.perf_counter() - start) * 1000:.0f} ms', file=stream)
+        if self.workbook in paths.values() or any(name.endswith('.py') for name in paths):
+            self.update(stream)
+
+    def update(self, stream=None):
+        """
+        Run one incremental update of the charts and print a one-line summary.
+        """
+        stream = stream or sys.stdout
+        try:
+            report = self.build.update()
+        except Exception as exc:  # noqa: BLE001
+            print(f'{_now()}  update failed: {exc}', file=stream)
+            return None
+        changed, _ = report.conditions
+        charts = ', '.join(r.name for r in report.rendered) or 'none'
+        print(f'{_now()}  {", ".join(report.sheets) or "no sheets"} parsed, '
+              f'{changed} conditions changed, charts: {charts} '
+              f'({report.seconds * 1000:.0f} ms)', file=stream)
+        return report
+
+
+def _now():
+    return time.strftime('%H:%M:%S')
+
+
+def watch(directory=PROJECT_ROOT, output_dir=None, store=None, debounce=DEFAULT_DEBOUNCE,
+          poll=False, interval=DEFAULT_INTERVAL, stream=None):
+    """
+    Keep ``output_dir`` up to date with the workbooks in ``directory`` until interrupted.
+
+    Parameters:
+    directory (str): Directory to watch (not recursive)
+    output_dir (str): Chart directory; defaults to Charts/
+    store (str): Also load other workbooks into this experiment store
+    debounce (float): Quiet seconds that end a burst of file events
+    poll (bool): Rescan the directory instead of using inotify
+    interval (float): Seconds between rescans when polling
+    """
+    stream = stream or sys.stdout
+    session = WatchSession(directory, output_dir, store)
+    watcher = open_watcher(session.directory, poll, interval)
+    try:
+        session.update(stream)
+        if not session.watches_workbook:
+            print(f'warning: {session.directory} does not contain the chart workbook '
+                  f'({session.workbook}); workbook changes there re-render no charts',
+                  file=stream)
+        print(f'watching {session.directory} ({type(watcher).__name__}); Ctrl+C to stop',
+              file=stream, flush=True)
+        while True:
+            names = next_burst(watcher, debounce)
+            session.handle(names, stream)
+            stream.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        session.close()
@@ -0,0 +1,206 @@
+"""
+Streaming reader for .xlsx workbooks.
+
+Only the parts of the OOXML package that are needed to get cell values out
+are touched: the workbook part (sheet names), its relationships (sheet part
+paths), the shared-string table and the sheet XML itself.  Sheets are parsed
+with ``iterparse`` and every ``<row>`` element is cleared as soon as it has
+been yielded, so memory use is bounded by the widest row rather than by the
+size of the sheet.
+"""
+import posixpath
+import re
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+# --------------------------------------------------
+# 1) OOXML names
+# --------------------------------------------------
+_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+_ROW = _MAIN_NS + 'row'
+_CELL = _MAIN_NS + 'c'
+_VALUE = _MAIN_NS + 'v'
+_INLINE = _MAIN_NS + 'is'
+_TEXT = _MAIN_NS + 't'
+_SI = _MAIN_NS + 'si'
+
+_CELL_REF = re.compile(r'([A-Z]+)(\d+)')
+
+
+# --------------------------------------------------
+# 2) Cell reference helpers
+# --------------------------------------------------
+def column_index(letters):
+    """
+    Convert spreadsheet column letters to a 1-based column index.
+
+    Parameters:
+    letters (str): Column letters, e.g. 'A' or 'AB'
+
+    Returns:
+    int: 1-based column index ('A' -> 1, 'AB' -> 28)
+    """
+    index = 0
+    for ch in letters:
+        index = index * 26 + (ord(ch) - 64)
+    return index
+
+
+def column_letters(index):
+    """
+    Convert a 1-based column index back to spreadsheet column letters.
+
+    Parameters:
+    index (int): 1-based column index
+
+    Returns:
+    str: Column letters
+    """
+    letters = ''
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def split_ref(ref):
+    """
+    Split a cell reference such as 'AB12' into (row, column) indices.
+    """
+    match = _CELL_REF.match(ref)
+    return int(match.group(2)), column_index(match.group(1))
+
+
+# --------------------------------------------------
+# 3) Workbook reader
+# --------------------------------------------------
+class XlsxReader:
+    """
+    Read-only, row-streaming view of an .xlsx file.
+
+    Use as a context manager so the underlying zip file is closed:
+
+        with XlsxReader(path) as book:
+            for row_number, cells in book.iter_rows('Group2'):
+                ...
+
+    ``cells`` maps 1-based column index to the cell value: ``float`` for
+    numeric cells, ``str`` for shared/inline strings and ``bool`` for boolean
+    cells.  Empty cells are not present in the mapping.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        self._sheet_parts = self._read_sheet_parts()
+        self._shared = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._zip.close()
+
+    @property
+    def sheet_names(self):
+        return list(self._sheet_parts)
+
+    def _read_sheet_parts(self):
+        rels = {}
+        with self._zip.open('xl/_rels/workbook.xml.rels') as fh:
+            for _, elem in iterparse(fh):
+                if elem.tag == _PKG_REL_NS + 'Relationship':
+                    target = elem.get('Target')
+                    if not target.startswith('/'):
+                        target = posixpath.join('xl', target)
+                    rels[elem.get('Id')] = target.lstrip('/')
+        parts = {}
+        with self._zip.open('xl/workbook.xml') as fh:
+            for _, elem in iterparse(fh):
+                if elem.tag == _MAIN_NS + 'sheet':
+                    parts[elem.get('name')] = rels[elem.get(_REL_NS + 'id')]
+        return parts
+
+    def fingerprint(self, sheet):
+        """
+        Change token of one sheet, read from the zip directory alone.
+
+        The CRC-32 and size of the sheet part and of the shared-string table
+        change whenever a cell value of the sheet does, and reading them
+        decompresses nothing.
+
+        Returns:
+        str: e.g. '3f2a01bc-51234-00000000-0'
+        """
+        names = set(self._zip.namelist())
+        infos = [self._zip.getinfo(part) if part in names else None
+                 for part in (self._sheet_parts[sheet], 'xl/sharedStrings.xml')]
+        return '-'.join(f'{info.CRC:08x}-{info.file_size}' if info else '00000000-0'
+                        for info in infos)
+
+    def _shared_strings(self):
+        if self._shared is None:
+            self._shared = []
+            if 'xl/sharedStrings.xml' in self._zip.namelist():
+                with self._zip.open('xl/sharedStrings.xml') as fh:
+                    for _, elem in iterparse(fh):
+                        if elem.tag == _SI:
+                            # Rich text runs are concatenated, phonetic hints dropped
+                            self._shared.append(''.join(
+                                t.text or '' for t in elem.iter(_TEXT)))
+                            elem.clear()
+        return self._shared
+
+    def iter_rows(self, sheet):
+        """
+        Yield (row_number, {column_index: value}) for every non-empty row.
+
+        Parameters:
+        sheet (str): Sheet name as shown in Excel, e.g. 'Group2'
+
+        Returns:
+        generator: (int, dict) pairs in sheet order
+        """
+        shared = self._shared_strings()
+        with self._zip.open(self._sheet_parts[sheet]) as fh:
+            for _, elem in iterparse(fh):
+                if elem.tag != _ROW:
+                    continue
+                cells = {}
+                row_number = int(elem.get('r'))
+                col = 0
+                for cell in elem.iter(_CELL):
+                    # The r attribute is optional; without it cells are sequential
+                    ref = cell.get('r')
+                    col = split_ref(ref)[1] if ref else col + 1
+                    value = _cell_value(cell, shared)
+                    if value is not None:
+                        cells[col] = value
+                if cells:
+                    yield row_number, cells
+                elem.clear()
+
+
+def _cell_value(cell, shared):
+    kind = cell.get('t', 'n')
+    if kind == 'inlineStr':
+        inline = cell.find(_INLINE)
+        if inline is None:
+            return None
+        return ''.join(t.text or '' for t in inline.iter(_TEXT))
+    raw = cell.findtext(_VALUE)
+    if raw is None:
+        return None
+    if kind == 's':
+        return shared[int(raw)]
+    if kind == 'b':
+        return raw == '1'
+    if kind in ('str', 'e'):
+        return raw
+    return float(raw)
@@ -1,10 +1,3 @@
 @echo off
-setlocal enabledelayedexpansion
-
-rem Get all Python files in the directory
-for %%f in (*.py) do (
-    if "%%f" neq "Analysis_Grp3.py" (
-        echo Running %%f...
-        python "%%f"
-    )
-)
+rem Render every chart into Charts\ in a single Python process
+python -m labvis render-all %*